@@ -1,6 +1,7 @@
 import frappe
-import requests
 from frappe.utils import get_datetime
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
 
 AANIRIDS_BRANCH_API = "http://172.24.160.1:5003/api/branches"
 
@@ -13,9 +14,9 @@ def sync_branches():
     """
 
     try:
-        response = requests.get(AANIRIDS_BRANCH_API, timeout=20)
+        response = backend_request("get", AANIRIDS_BRANCH_API, timeout=20)
         response.raise_for_status()
-        branches = response.json()
+        branches = response_json(response)
     except Exception as e:
         frappe.throw(f"Failed to fetch branches: {str(e)}")
 
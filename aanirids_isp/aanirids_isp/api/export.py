@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+
+import frappe
+from frappe.model.db_query import DatabaseQuery
+from frappe.utils import cint
+from werkzeug.wrappers import Response
+
+EXPORTABLE_DOCTYPES = ("Subscriber", "IP Address", "Salesperson")
+
+# never written to an export
+EXCLUDED_FIELDTYPES = {"Password", "Section Break", "Column Break", "Tab Break", "HTML", "Button", "Attach"}
+
+# Link field -> (linked doctype, external id column) resolved to backend ids
+EXTERNAL_ID_LINKS = {
+    "Subscriber": {
+        "package_link": ("Plan", "external_id"),
+        "nas_server": ("NAS", "external_id"),
+        "salesperson": ("Salesperson", "external_id"),
+        "branch": ("Branch", "custom_external_id"),
+    },
+    "IP Address": {
+        "ip_pool": ("IP Pool", "external_id"),
+        "branch": ("Branch", "custom_external_id"),
+    },
+    "Salesperson": {
+        "branch": ("Branch", "custom_external_id"),
+    },
+}
+
+FLUSH_EVERY = 500
+
+
+def _export_fields(doctype):
+    meta = frappe.get_meta(doctype)
+    permlevels = meta.get_permlevel_access("read")
+    return ["name"] + [
+        df.fieldname
+        for df in meta.fields
+        if df.fieldtype not in EXCLUDED_FIELDTYPES and not df.hidden and df.permlevel in permlevels
+    ] + ["modified"]
+
+
+def _external_id_maps(doctype):
+    """{link_field: {name: external_id}} - master tables are small, load once."""
+    maps = {}
+    for field, (link_doctype, column) in EXTERNAL_ID_LINKS.get(doctype, {}).items():
+        maps[field] = {
+            r.name: r.get(column)
+            for r in frappe.get_all(link_doctype, fields=["name", column])
+        }
+    return maps
+
+
+def _stream_rows(site, user, doctype, fields, fmt, maps):
+    """
+    Generator consumed by werkzeug *after* the request context is torn down,
+    so it opens its own site connection and reads through an unbuffered
+    (server-side) cursor. Only FLUSH_EVERY rows are held in memory at a time.
+    Rows are limited by the user's match conditions (User Permissions,
+    if_owner, permission_query_conditions), same as get_list.
+    """
+    frappe.init(site=site)
+    frappe.connect()
+    frappe.set_user(user)
+
+    header = fields + [f"{field}_external_id" for field in maps]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+
+    try:
+        if writer:
+            writer.writerow(header)
+
+        columns = ", ".join(f"`{f}`" for f in fields)
+        conditions = DatabaseQuery(doctype, user=user).build_match_conditions()
+        where = f"WHERE {conditions}" if conditions else ""
+        with frappe.db.unbuffered_cursor():
+            rows = frappe.db.sql(
+                f"SELECT {columns} FROM `tab{doctype}` {where} ORDER BY name",
+                as_dict=True,
+                as_iterator=True,
+            )
+            for i, row in enumerate(rows, start=1):
+                for field, mapping in maps.items():
+                    row[f"{field}_external_id"] = mapping.get(row.get(field))
+
+                if writer:
+                    writer.writerow([row.get(col) for col in header])
+                else:
+                    buffer.write(json.dumps(row, default=str))
+                    buffer.write("\n")
+
+                if i % FLUSH_EVERY == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate(0)
+
+        yield buffer.getvalue()
+    finally:
+        frappe.destroy()
+
+
+@frappe.whitelist()
+def export_records(doctype="Subscriber", fmt="csv", resolve_external_ids=1):
+    """
+    Stream a full export of Subscriber / IP Address / Salesperson as CSV or NDJSON.
+    Linked Plan / NAS / Salesperson / Branch are resolved to backend external ids
+    from an in-memory map. Memory use does not grow with row count.
+    """
+    if doctype not in EXPORTABLE_DOCTYPES:
+        frappe.throw(f"Export not supported for {doctype}")
+
+    if fmt not in ("csv", "ndjson"):
+        frappe.throw("fmt must be csv or ndjson")
+
+    # raw cursor export: requires doctype-level export permission
+    frappe.has_permission(doctype, "export", throw=True)
+
+    fields = _export_fields(doctype)
+    maps = _external_id_maps(doctype) if cint(resolve_external_ids) else {}
+
+    filename = f"{frappe.scrub(doctype)}_export.{fmt}"
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+
+    return Response(
+        _stream_rows(frappe.local.site, frappe.session.user, doctype, fields, fmt, maps),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        direct_passthrough=True,
+    )
+
+
+@frappe.whitelist()
+def export_subscribers(fmt="csv"):
+    return export_records("Subscriber", fmt)
@@ -0,0 +1,182 @@
+import frappe
+from frappe.utils import cint, flt
+
+from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import (
+    HEATMAP_PRECISION,
+    scoped_counts,
+    subscriber_match_conditions,
+)
+from aanirids_isp.aanirids_isp.utils import geo
+
+SUBSCRIBER_FIELDS = [
+    "name",
+    "username",
+    "full_name",
+    "status",
+    "nas_server",
+    "branch",
+    "latitude",
+    "longitude",
+]
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+# hard cap on candidate rows pulled from the geohash prefix scan
+MAX_SCAN = 20000
+
+
+def _subscribers_in_cells(cells):
+    """
+    Index range scans on Subscriber.geohash, one per covering prefix.
+    Returns (rows, truncated); truncated means MAX_SCAN cut the candidates short.
+    """
+    if cells == [""]:
+        frappe.throw("Area too large for a spatial query")
+
+    rows = frappe.get_list(
+        "Subscriber",
+        or_filters=[["geohash", "like", f"{cell}%"] for cell in cells],
+        fields=SUBSCRIBER_FIELDS,
+        limit_page_length=MAX_SCAN + 1,
+    )
+    return rows[:MAX_SCAN], len(rows) > MAX_SCAN
+
+
+def _point(subscriber=None, latitude=None, longitude=None):
+    if subscriber:
+        frappe.has_permission("Subscriber", "read", doc=subscriber, throw=True)
+        latitude, longitude = frappe.db.get_value(
+            "Subscriber", subscriber, ["latitude", "longitude"]
+        ) or (None, None)
+
+    if not geo.has_coordinates(latitude, longitude):
+        frappe.throw("A valid latitude/longitude (or a subscriber with a location) is required")
+
+    return flt(latitude), flt(longitude)
+
+
+@frappe.whitelist()
+def subscribers_within_radius(latitude, longitude, radius_km=2, limit=DEFAULT_LIMIT):
+    """
+    Subscribers within `radius_km` of a point, nearest first.
+    truncated: the area held more than MAX_SCAN candidates, narrow it down.
+    """
+    frappe.has_permission("Subscriber", "read", throw=True)
+
+    latitude, longitude = _point(latitude=latitude, longitude=longitude)
+    radius_km = flt(radius_km) or 2
+    limit = min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
+
+    cells = geo.cover_bbox(*geo.radius_to_bbox(latitude, longitude, radius_km))
+
+    candidates, truncated = _subscribers_in_cells(cells)
+
+    results = []
+    for row in candidates:
+        distance = geo.haversine_km(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_km:
+            row.distance_km = round(distance, 3)
+            results.append(row)
+
+    results.sort(key=lambda r: r.distance_km)
+    return {"subscribers": results[:limit], "truncated": truncated or len(results) > limit}
+
+
+@frappe.whitelist()
+def subscribers_in_bbox(min_lat, min_lon, max_lat, max_lon, limit=DEFAULT_LIMIT):
+    """Subscribers inside a bounding box (map viewport); truncated as in subscribers_within_radius."""
+    frappe.has_permission("Subscriber", "read", throw=True)
+
+    min_lat, min_lon, max_lat, max_lon = map(flt, (min_lat, min_lon, max_lat, max_lon))
+    limit = min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
+
+    cells = geo.cover_bbox(min_lat, min_lon, max_lat, max_lon)
+    candidates, truncated = _subscribers_in_cells(cells)
+
+    results = [
+        row
+        for row in candidates
+        if min_lat <= flt(row.latitude) <= max_lat and min_lon <= flt(row.longitude) <= max_lon
+    ]
+    return {"subscribers": results[:limit], "truncated": truncated or len(results) > limit}
+
+
+def _nearest(points, latitude, longitude, limit):
+    ranked = []
+    for p in points:
+        if not geo.has_coordinates(p.latitude, p.longitude):
+            continue
+        p.distance_km = round(geo.haversine_km(latitude, longitude, p.latitude, p.longitude), 3)
+        ranked.append(p)
+
+    ranked.sort(key=lambda p: p.distance_km)
+    return ranked[: cint(limit) or 1]
+
+
+@frappe.whitelist()
+def nearest_nas(subscriber=None, latitude=None, longitude=None, limit=3):
+    """Closest NAS boxes (by their configured location) to a subscriber or point."""
+    frappe.has_permission("NAS", "read", throw=True)
+    latitude, longitude = _point(subscriber, latitude, longitude)
+    nas_list = frappe.get_list("NAS", fields=["name", "nasname", "latitude", "longitude"])
+    return _nearest(nas_list, latitude, longitude, limit)
+
+
+@frappe.whitelist()
+def nearest_branch(subscriber=None, latitude=None, longitude=None, limit=3):
+    """Closest branches (custom_latitude / custom_longitude) to a subscriber or point."""
+    frappe.has_permission("Branch", "read", throw=True)
+    latitude, longitude = _point(subscriber, latitude, longitude)
+    branches = frappe.get_list(
+        "Branch",
+        fields=["name", "custom_latitude as latitude", "custom_longitude as longitude"],
+    )
+    return _nearest(branches, latitude, longitude, limit)
+
+
+@frappe.whitelist()
+def get_coverage_heatmap(min_lat, min_lon, max_lat, max_lon, precision=HEATMAP_PRECISION, status=None):
+    """
+    Subscriber counts per geohash tile inside a bounding box.
+    Read from the precomputed geohash5 rollup; coarser precisions are summed up.
+    Users restricted by User Permissions get live counts over their own subscribers.
+    """
+    min_lat, min_lon, max_lat, max_lon = map(flt, (min_lat, min_lon, max_lat, max_lon))
+    precision = max(1, min(cint(precision) or HEATMAP_PRECISION, HEATMAP_PRECISION))
+
+    frappe.has_permission("Subscriber", "read", throw=True)
+
+    cells = geo.cover_bbox(min_lat, min_lon, max_lat, max_lon, max_cells=256, max_precision=precision)
+
+    conditions = subscriber_match_conditions()
+    if conditions:
+        rows = scoped_counts(
+            "geohash5", conditions, prefixes=[cell for cell in cells if cell], status=status
+        )
+    else:
+        filters = {"dimension": "geohash5", "dimension_value": ["!=", ""]}
+        if status:
+            filters["status"] = status
+
+        rows = frappe.get_all(
+            "Subscriber Rollup",
+            filters=filters,
+            or_filters=[["dimension_value", "like", f"{cell}%"] for cell in cells if cell],
+            fields=["dimension_value", "subscriber_count"],
+        )
+
+    tiles = {}
+    for r in rows:
+        if not r.dimension_value:
+            continue
+        tile = r.dimension_value[:precision]
+        tiles[tile] = tiles.get(tile, 0) + cint(r.subscriber_count)
+
+    result = []
+    for tile, count in sorted(tiles.items()):
+        if not count:
+            continue
+        lat, lon = geo.decode(tile)
+        result.append({"geohash": tile, "latitude": lat, "longitude": lon, "count": count})
+
+    return result
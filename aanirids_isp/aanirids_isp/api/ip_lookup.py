@@ -0,0 +1,221 @@
+import frappe
+from frappe.utils import cint
+
+from aanirids_isp.aanirids_isp.utils.ip import cidr_to_range, int_to_ip, ip_to_int
+
+SUBSCRIBER_FIELDS = [
+    "name",
+    "username",
+    "full_name",
+    "status",
+    "nas_server",
+    "branch",
+    "ip_address",
+    "cpe_ip_address",
+    "ip_address_int",
+    "cpe_ip_int",
+]
+
+# Subscriber columns that hold an IP, keyed by their integer shadow column
+IP_COLUMNS = {
+    "cpe_ip_int": "cpe_ip_address",
+    "ip_address_int": "ip_address",
+}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def _subscribers_in_range(start, end, limit):
+    """
+    Index range scan on both integer IP columns.
+    One query per column so each one can use its own index.
+    get_list: the caller's User Permissions apply.
+    """
+    found = {}
+
+    for column in IP_COLUMNS:
+        rows = frappe.get_list(
+            "Subscriber",
+            filters=[[column, ">=", start], [column, "<=", end]],
+            fields=SUBSCRIBER_FIELDS,
+            order_by=f"{column} asc",
+            limit_page_length=limit,
+        )
+        for row in rows:
+            found.setdefault(row.name, row)
+
+    return list(found.values())
+
+
+def _pool_addresses_in_range(start, end, limit):
+    if not frappe.has_permission("IP Address", "read"):
+        return []
+
+    rows = frappe.get_list(
+        "IP Address",
+        filters=[["ip_int", ">=", start], ["ip_int", "<=", end]],
+        fields=["name", "ip_address", "ip_int", "ip_pool", "isp", "branch"],
+        order_by="ip_int asc",
+        limit_page_length=limit,
+    )
+
+    pools = {r.ip_pool for r in rows if r.ip_pool}
+    pool_map = {}
+    if pools:
+        pool_map = {
+            p.name: p
+            for p in frappe.get_list(
+                "IP Pool",
+                filters={"name": ["in", list(pools)]},
+                fields=["name", "pool_name", "network", "subnet", "nas"],
+            )
+        }
+
+    for row in rows:
+        row.pool = pool_map.get(row.ip_pool)
+
+    return rows
+
+
+def _group_by_ip(subscribers):
+    """{ip_int: [subscriber, ...]} across both IP columns."""
+    grouped = {}
+    for row in subscribers:
+        for column in IP_COLUMNS:
+            value = row.get(column)
+            if value is None:
+                continue
+            grouped.setdefault(value, [])
+            if row not in grouped[value]:
+                grouped[value].append(row)
+    return grouped
+
+
+@frappe.whitelist()
+def lookup_ip(ip):
+    """
+    Who is on this IP right now?
+    Exact match on the indexed integer columns of Subscriber and IP Address.
+    """
+    frappe.has_permission("Subscriber", "read", throw=True)
+
+    value = ip_to_int(ip)
+    if value is None:
+        frappe.throw(f"Invalid IPv4 address: {ip}")
+
+    subscribers = _subscribers_in_range(value, value, DEFAULT_LIMIT)
+    addresses = _pool_addresses_in_range(value, value, 1)
+
+    return {
+        "ip": int_to_ip(value),
+        "subscribers": subscribers,
+        "ip_address": addresses[0] if addresses else None,
+        "conflict": len(subscribers) > 1,
+    }
+
+
+@frappe.whitelist()
+def lookup_cidr(cidr, limit=DEFAULT_LIMIT):
+    """
+    All subscribers inside a CIDR range, e.g. "10.20.30.0/24".
+    Results are grouped per IP; IPs held by more than one subscriber are flagged.
+    """
+    frappe.has_permission("Subscriber", "read", throw=True)
+
+    try:
+        start, end = cidr_to_range(cidr)
+    except ValueError as e:
+        frappe.throw(f"Invalid CIDR {cidr}: {str(e)}")
+
+    limit = min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
+
+    subscribers = _subscribers_in_range(start, end, limit)
+    grouped = _group_by_ip(subscribers)
+
+    addresses = {
+        row.ip_int: row for row in _pool_addresses_in_range(start, end, limit)
+    }
+
+    results = []
+    for value in sorted(grouped):
+        if value < start or value > end:
+            continue
+        results.append({
+            "ip": int_to_ip(value),
+            "subscribers": grouped[value],
+            "ip_address": addresses.get(value),
+            "conflict": len(grouped[value]) > 1,
+        })
+
+    return {
+        "cidr": cidr,
+        "range": [int_to_ip(start), int_to_ip(end)],
+        "total_subscribers": len(subscribers),
+        "results": results,
+    }
+
+
+@frappe.whitelist()
+def get_ip_conflicts(limit=DEFAULT_LIMIT):
+    """
+    IPs assigned to more than one subscriber (either IP column).
+    Only subscribers the caller may read are listed.
+    """
+    frappe.has_permission("Subscriber", "read", throw=True)
+    limit = min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
+
+    rows = frappe.db.sql(
+        """
+        SELECT ip_int, GROUP_CONCAT(DISTINCT sub ORDER BY sub SEPARATOR ',') AS subscribers
+        FROM (
+            SELECT name AS sub, cpe_ip_int AS ip_int
+            FROM `tabSubscriber` WHERE cpe_ip_int IS NOT NULL
+            UNION ALL
+            SELECT name AS sub, ip_address_int AS ip_int
+            FROM `tabSubscriber` WHERE ip_address_int IS NOT NULL
+        ) t
+        GROUP BY ip_int
+        HAVING COUNT(DISTINCT sub) > 1
+        ORDER BY ip_int
+        LIMIT %s
+        """,
+        (limit,),
+        as_dict=True,
+    )
+
+    names = {sub for r in rows for sub in r.subscribers.split(",")}
+    readable = set(
+        frappe.get_list("Subscriber", filters={"name": ["in", list(names)]}, pluck="name", limit_page_length=0)
+    ) if names else set()
+
+    conflicts = []
+    for r in rows:
+        subscribers = [sub for sub in r.subscribers.split(",") if sub in readable]
+        if subscribers:
+            conflicts.append({"ip": int_to_ip(r.ip_int), "subscribers": subscribers})
+    return conflicts
+
+
+def rebuild_ip_index(batch_size=1000):
+    """
+    Backfill integer IP columns for rows saved before the index existed.
+    Writes directly (no hooks, no modified bump).
+    """
+    for doctype, columns in (
+        ("Subscriber", IP_COLUMNS),
+        ("IP Address", {"ip_int": "ip_address"}),
+    ):
+        rows = frappe.get_all(doctype, fields=["name", *columns.values()])
+
+        for i, row in enumerate(rows, start=1):
+            values = {
+                int_column: ip_to_int(row.get(data_column))
+                for int_column, data_column in columns.items()
+            }
+            frappe.db.set_value(doctype, row.name, values, update_modified=False)
+
+            if i % batch_size == 0:
+                frappe.db.commit()
+
+    frappe.db.commit()
@@ -0,0 +1,150 @@
+import frappe
+from frappe.utils import cint
+
+from aanirids_isp.aanirids_isp.doctype.subscriber_search_token.subscriber_search_token import (
+    digits_only,
+    ngrams,
+    normalize_text,
+)
+
+RESULT_FIELDS = [
+    "name",
+    "username",
+    "full_name",
+    "phone",
+    "email",
+    "external_id",
+    "cpe_ip_address",
+    "status",
+    "nas_server",
+    "branch",
+]
+
+# tie-breakers between fields when match quality is equal
+FIELD_WEIGHT = {
+    "external_id": 8,
+    "username": 7,
+    "phone": 6,
+    "email": 6,
+    "cpe_ip_address": 5,
+    "ip_address": 5,
+    "full_name": 3,
+}
+
+EXACT_SCORE = 100
+PREFIX_SCORE = 60
+NGRAM_SCORE = 30
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+CANDIDATE_LIMIT = 500
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _query_variants(query):
+    text = normalize_text(query)
+    variants = [text] if text else []
+
+    # "+91 98450-12345" -> phone digits
+    digits = digits_only(query)
+    if len(digits) >= 3 and digits != text and len(digits) >= len(text.replace(" ", "")) * 0.6:
+        variants.append(digits)
+
+    return variants
+
+
+def _score_value_matches(variant, scores):
+    """
+    Exact tokens first, then the prefix scan in (kind, token) index order, so
+    the closest completions win the CANDIDATE_LIMIT instead of arbitrary rows.
+    """
+    exact = frappe.db.sql(
+        """
+        SELECT subscriber, field
+        FROM `tabSubscriber Search Token`
+        WHERE kind = 'value' AND token = %s
+        LIMIT %s
+        """,
+        (variant, CANDIDATE_LIMIT),
+        as_dict=True,
+    )
+    for r in exact:
+        _bump(scores, r.subscriber, EXACT_SCORE + FIELD_WEIGHT.get(r.field, 0))
+
+    prefix = frappe.db.sql(
+        """
+        SELECT subscriber, field
+        FROM `tabSubscriber Search Token`
+        WHERE kind = 'value' AND token LIKE %s AND token != %s
+        ORDER BY token
+        LIMIT %s
+        """,
+        (_escape_like(variant) + "%", variant, CANDIDATE_LIMIT),
+        as_dict=True,
+    )
+    for r in prefix:
+        _bump(scores, r.subscriber, PREFIX_SCORE + FIELD_WEIGHT.get(r.field, 0))
+
+
+def _score_ngram_matches(variant, scores):
+    grams = ngrams(variant)
+    if not grams:
+        return
+
+    rows = frappe.db.sql(
+        """
+        SELECT subscriber, field, COUNT(DISTINCT token) AS hits
+        FROM `tabSubscriber Search Token`
+        WHERE kind = 'ngram' AND token IN %s
+        GROUP BY subscriber, field
+        HAVING hits >= %s
+        LIMIT %s
+        """,
+        (tuple(grams), len(grams), CANDIDATE_LIMIT),
+        as_dict=True,
+    )
+    for r in rows:
+        _bump(scores, r.subscriber, NGRAM_SCORE + FIELD_WEIGHT.get(r.field, 0))
+
+
+def _bump(scores, subscriber, score):
+    if score > scores.get(subscriber, 0):
+        scores[subscriber] = score
+
+
+@frappe.whitelist()
+def search_subscribers(query, limit=DEFAULT_LIMIT):
+    """
+    Support desk lookup by username, name, phone, email, external_id or IP.
+    Exact > prefix > partial (trigram) matches, all served from the search index.
+    """
+    query = (query or "").strip()
+    if len(query) < 2:
+        return []
+
+    limit = min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
+
+    scores = {}
+    for variant in _query_variants(query):
+        _score_value_matches(variant, scores)
+        _score_ngram_matches(variant, scores)
+
+    if not scores:
+        return []
+
+    ranked = sorted(scores, key=lambda name: (-scores[name], name))[: limit * 2]
+
+    rows = frappe.get_list(
+        "Subscriber",
+        filters={"name": ["in", ranked]},
+        fields=RESULT_FIELDS,
+        limit_page_length=len(ranked),
+    )
+    for row in rows:
+        row.score = scores[row.name]
+
+    rows.sort(key=lambda r: (-r.score, r.name))
+    return rows[:limit]
@@ -0,0 +1,130 @@
+import base64
+import json
+
+import frappe
+from frappe.utils import cint, get_datetime
+
+DEFAULT_FIELDS = ["name", "username", "full_name", "status", "modified"]
+
+# never exposed through this API
+EXCLUDED_FIELDTYPES = {"Password", "Section Break", "Column Break", "Tab Break", "HTML", "Button"}
+
+FILTER_FIELDS = ("branch", "nas_server", "package_link", "status")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+# ============================================================
+# ✅ CURSOR HELPERS
+# ============================================================
+def encode_cursor(modified, name):
+    raw = json.dumps([str(modified), name]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        modified, name = json.loads(base64.urlsafe_b64decode(padded))
+        return get_datetime(modified), name
+    except Exception:
+        frappe.throw("Invalid cursor")
+
+
+def _allowed_fields():
+    """Visible fields at a permlevel the user can read (hidden ones hold internals like credentials_digest)."""
+    meta = frappe.get_meta("Subscriber")
+    permlevels = meta.get_permlevel_access("read")
+    fields = {
+        df.fieldname
+        for df in meta.fields
+        if df.fieldtype not in EXCLUDED_FIELDTYPES and not df.hidden and df.permlevel in permlevels
+    }
+    return fields | {"name", "modified", "creation"}
+
+
+def _projection(fields):
+    if not fields:
+        return list(DEFAULT_FIELDS)
+
+    if isinstance(fields, str):
+        fields = json.loads(fields) if fields.strip().startswith("[") else fields.split(",")
+
+    fields = [f.strip() for f in fields if f and f.strip()]
+    unknown = set(fields) - _allowed_fields()
+    if unknown:
+        frappe.throw(f"Fields not available: {', '.join(sorted(unknown))}")
+
+    # keyset columns are always returned so the client can page on
+    for f in ("name", "modified"):
+        if f not in fields:
+            fields.append(f)
+    return fields
+
+
+# ============================================================
+# ✅ KEYSET READ API
+# ============================================================
+@frappe.whitelist()
+def get_subscribers(
+    fields=None,
+    cursor=None,
+    limit=DEFAULT_LIMIT,
+    updated_since=None,
+    branch=None,
+    nas_server=None,
+    package_link=None,
+    status=None,
+):
+    """
+    Page through Subscribers ordered by (modified, name) ascending.
+
+    - fields: list / comma separated projection (password fields are never returned)
+    - cursor: `next_cursor` from the previous page
+    - updated_since: only rows modified at or after this datetime (incremental caches)
+    - branch / nas_server / package_link / status: equality filters
+
+    Each page is one index range scan from the cursor position, so page N
+    costs the same as page 1.
+    """
+    limit = min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
+    fields = _projection(fields)
+
+    values = {
+        "branch": branch,
+        "nas_server": nas_server,
+        "package_link": package_link,
+        "status": status,
+    }
+    filters = [[f, "=", v] for f, v in values.items() if v]
+
+    if updated_since:
+        filters.append(["modified", ">=", get_datetime(updated_since)])
+
+    or_filters = None
+    if cursor:
+        last_modified, last_name = decode_cursor(cursor)
+        # (modified, name) > (last_modified, last_name)
+        filters.append(["modified", ">=", last_modified])
+        or_filters = [["modified", ">", last_modified], ["name", ">", last_name]]
+
+    rows = frappe.get_list(
+        "Subscriber",
+        filters=filters,
+        or_filters=or_filters,
+        fields=fields,
+        order_by="modified asc, name asc",
+        limit_page_length=limit + 1,
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(rows[-1].modified, rows[-1].name) if rows else cursor
+
+    return {
+        "data": rows,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+    }
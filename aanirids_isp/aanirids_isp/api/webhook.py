@@ -0,0 +1,69 @@
+import hashlib
+import hmac
+import time
+
+import frappe
+from frappe.utils import cint
+
+from aanirids_isp.aanirids_isp.utils.change_events import queue_events
+from aanirids_isp.aanirids_isp.utils.codec import loads
+
+# site_config:
+#   aanirids_webhook_secret   shared secret for the signature (required)
+SIGNATURE_HEADER = "X-Aanirids-Signature"
+TIMESTAMP_HEADER = "X-Aanirids-Timestamp"
+MAX_CLOCK_SKEW = 300
+MAX_EVENTS = 1000
+
+
+def verify_signature(body, timestamp, signature):
+    """
+    signature = hex(HMAC-SHA256(secret, "<timestamp>." + raw body)), optionally
+    prefixed "sha256=". Old timestamps are rejected so a captured request
+    can't be replayed later.
+    """
+    secret = frappe.conf.get("aanirids_webhook_secret")
+    if not secret:
+        frappe.throw("Webhook secret is not configured", frappe.AuthenticationError)
+
+    if not timestamp or not signature or abs(time.time() - cint(timestamp)) > MAX_CLOCK_SKEW:
+        frappe.throw("Missing or expired webhook signature", frappe.AuthenticationError)
+
+    expected = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, signature.removeprefix("sha256=")):
+        frappe.throw("Invalid webhook signature", frappe.AuthenticationError)
+
+
+# ============================================================
+# ✅ BACKEND -> FRAPPE CHANGE EVENTS
+# POST /api/method/aanirids_isp.aanirids_isp.api.webhook.receive
+# body: one event, a list of events, or {"events": [...]}
+# (event format: utils/change_events.py)
+# ============================================================
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def receive():
+    body = frappe.request.get_data() or b""
+    verify_signature(
+        body,
+        frappe.get_request_header(TIMESTAMP_HEADER),
+        frappe.get_request_header(SIGNATURE_HEADER),
+    )
+
+    try:
+        payload = loads(body)
+    except ValueError:
+        frappe.throw("Invalid JSON body")
+
+    if isinstance(payload, dict):
+        events = payload.get("events") if "events" in payload else [payload]
+    else:
+        events = payload
+
+    if not isinstance(events, list):
+        frappe.throw("Expected an event or a list of events")
+    if len(events) > MAX_EVENTS:
+        frappe.throw(f"At most {MAX_EVENTS} events per request")
+
+    # acknowledge right away; applying happens in the coalescing flush job
+    accepted, rejected = queue_events(events)
+    return {"accepted": accepted, "rejected": rejected}
@@ -1,13 +1,23 @@
 # Copyright (c) 2026, Mohammed Zeeshan and contributors
 # For license information, please see license.txt
 
+import hashlib
+
 import frappe
-import requests
 from frappe.model.document import Document
+from frappe.utils import cint, now_datetime
+from aanirids_isp.aanirids_isp.utils.ip import ip_to_int
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import singleton_sync
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes
 
 
 class IPAddress(Document):
-	pass
+	def before_save(self):
+		# integer form used by IP reverse lookup
+		self.ip_int = ip_to_int(self.ip_address)
 
 IP_ADDRESS_URL = "http://172.24.160.1:5003/api/ip-addresses"
 TIMEOUT = 30
@@ -28,27 +38,91 @@ def clean_datetime(dt):
     except Exception:
         return None
 
-@frappe.whitelist()
-def sync_ip_addresses():
+def fetch_ip_addresses():
+    """
+    Fetch all IP Addresses from API.
+    Works if API returns LIST or {success:true,data:[...]}
     """
-    Sync IP Addresses from API into IPAddress DocType
-    Upsert based on external_id (id)
-    Works if API returns LIST or {success:true,data:[...]}"""
     try:
-        r = requests.get(IP_ADDRESS_URL, timeout=TIMEOUT)
+        r = backend_request("get", IP_ADDRESS_URL, timeout=TIMEOUT)
         r.raise_for_status()
-        payload = r.json()
+        payload = response_json(r)
     except Exception as e:
         frappe.throw(f"❌ IP Addresses API fetch failed: {str(e)}")
     
     if isinstance(payload, list):
-        ip_addresses = payload
+        return payload
     elif isinstance(payload, dict):
         if not payload.get("success"):
             frappe.throw(f"❌ API returned success=false: {payload}")
-        ip_addresses = payload.get("data") or []
+        return payload.get("data") or []
     else:
         frappe.throw(f"❌ Unexpected API response format: {type(payload)}")
+
+def map_ip_address_row(ip):
+    ip_pool_name = None
+    if ip.get("ip_pool_id"):
+        ip_pool_name = frappe.db.get_value(
+            "IP Pool",
+            {"external_id": ip.get("ip_pool_id")},
+            "name"
+        )
+
+    isp_name = None
+    if ip.get("isp_id"):
+        isp_name = frappe.db.get_value(
+            "ISP",
+            {"external_id": ip.get("isp_id")},
+            "name"
+        )
+
+    branch_name = None
+    if ip.get("branch_id"):
+        branch_name = frappe.db.get_value(
+            "Branch",
+            {"custom_external_id": ip.get("branch_id")},
+            "name"
+        )
+
+    mapped = {
+        "external_id": ip.get("id"),
+        "ip_pool": ip_pool_name,
+        "ip_address": ip.get("ip_address"),
+        "isp": isp_name,
+        "branch": branch_name,
+        "created_at": clean_datetime(ip.get("created_at")),
+        "updated_at": clean_datetime(ip.get("updated_at")),
+    }
+
+    # remove None values
+    return {k: v for k, v in mapped.items() if v is not None}
+
+
+def upsert_ip_address(ip, mapped=None):
+    """Upsert one backend IP address object by external_id -> "created" | "updated" | "unchanged"."""
+    mapped = mapped or map_ip_address_row(ip)
+    existing = frappe.db.exists("IP Address", {"external_id": ip.get("id")})
+
+    if existing:
+        doc = frappe.get_doc("IP Address", existing)
+        doc.update(mapped)
+        doc.save(ignore_permissions=True)
+        return "updated" if has_changes(doc) else "unchanged"
+
+    doc = frappe.new_doc("IP Address")
+    doc.update(mapped)
+    doc.insert(ignore_permissions=True)
+    return "created"
+
+
+@frappe.whitelist()
+@singleton_sync("IP Address")
+def sync_ip_addresses():
+    """
+    Sync IP Addresses from API into IPAddress DocType
+    Upsert based on external_id (id)
+    Works if API returns LIST or {success:true,data:[...]}"""
+    ip_addresses = fetch_ip_addresses()
     
     created = 0
     updated = 0
@@ -58,60 +132,16 @@ def sync_ip_addresses():
     for ip in ip_addresses:
         mapped = {}
         try:
-            external_id = ip.get("id")
-            if not external_id:
+            if not ip.get("id"):
                 skipped += 1
                 continue
-            
-            ip_pool_name = None
-            if ip.get("ip_pool_id"):
-                ip_pool_name = frappe.db.get_value(
-                    "IP Pool", 
-                    {"external_id":ip.get("ip_pool_id")},
-                    "name"
-                )
-            
-            isp_name = None
-            if ip.get("isp_id"):
-                isp_name = frappe.db.get_value(
-                    "ISP", 
-                    {"external_id":ip.get("isp_id")},
-                    "name"
-                )
-            
-            branch_name = None
-            if ip.get("branch_id"):
-                branch_name = frappe.db.get_value(
-                    "Branch", 
-                    {"custom_external_id":ip.get("branch_id")},
-                    "name"
-                )
-            
-            mapped = {
-                "external_id": external_id,
-                "ip_pool": ip_pool_name,
-                "ip_address": ip.get("ip_address"),
-                "isp": isp_name,
-                "branch": branch_name,
-                "created_at": clean_datetime(ip.get("created_at")),
-                "updated_at": clean_datetime(ip.get("updated_at")),
-            }
-            
-            # remove None values
-            mapped = {k: v for k, v in mapped.items() if v is not None}
-            
-            existing = frappe.db.exists("IP Address", {"external_id": external_id})
-            
-            if existing:
-                doc = frappe.get_doc("IP Address", existing)
-                doc.update(mapped)
-                doc.save(ignore_permissions=True)
-                updated += 1
-            else:
-                doc = frappe.new_doc("IP Address")
-                doc.update(mapped)
-                doc.insert(ignore_permissions=True)
+
+            mapped = map_ip_address_row(ip)
+            result = upsert_ip_address(ip, mapped)
+            if result == "created":
                 created += 1
+            elif result == "updated":
+                updated += 1
         except Exception as e:
             failed += 1
             frappe.log_error(
@@ -128,6 +158,9 @@ Mapped Data:
     
     frappe.db.commit()
     
+    # ✅ Records deleted upstream: archived + removed locally (no backend delete)
+    orphans = purge_orphans("IP Address", [ip.get("id") for ip in ip_addresses])
+
     return {
         "success": True,
         "message": f"✅ IPAddress Sync Completed | Created: {created}, Updated: {updated}, Skipped: {skipped}, Failed: {failed}, Total: {len(ip_addresses)}",
@@ -136,4 +169,190 @@ Mapped Data:
         "skipped": skipped,
         "failed": failed,
         "total_api_records": len(ip_addresses),
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
+    }
+
+
+# ============================================================
+# ✅ BULK INGEST (POOL-LEVEL DIFF)
+# ============================================================
+BULK_CHUNK_SIZE = 1000
+
+# fields compared between API rows and local rows
+DIFF_FIELDS = ("ip_pool", "ip_address", "isp", "branch", "created_at", "updated_at")
+
+
+def _link_map(doctype, external_id_field="external_id"):
+    """{str(external_id): name} for a whole doctype in one query."""
+    return {
+        str(r.get(external_id_field)): r.name
+        for r in frappe.get_all(doctype, fields=["name", external_id_field])
+        if r.get(external_id_field) is not None
+    }
+
+
+def _as_text(value):
+    return str(value) if value is not None else None
+
+
+def _pool_fingerprint(rows):
+    """Order-independent hash of the mapped rows of one pool."""
+    lines = sorted(
+        "|".join([str(r["external_id"])] + [_as_text(r.get(f)) or "" for f in DIFF_FIELDS])
+        for r in rows
+    )
+    return hashlib.sha1("\n".join(lines).encode()).hexdigest()
+
+
+@frappe.whitelist()
+@singleton_sync("IP Address")
+def sync_ip_addresses_bulk():
+    """
+    High-volume IP Address ingest.
+    Rows are grouped by ip_pool_id and each pool is diffed against local rows;
+    inserts / updates / deletes are applied as bulk operations.
+    Pools whose address set is unchanged since the last run are skipped.
+    """
+    ip_addresses = fetch_ip_addresses()
+
+    # 1) Resolve links once (instead of 3 get_value per address)
+    pool_map = _link_map("IP Pool")
+    isp_map = _link_map("ISP")
+    branch_map = _link_map("Branch", "custom_external_id")
+
+    # 2) Map + group by pool
+    pools = {}
+    skipped = 0
+    for ip in ip_addresses:
+        external_id = ip.get("id")
+        if not external_id or not ip.get("ip_address"):
+            skipped += 1
+            continue
+
+        pool_id = ip.get("ip_pool_id")
+        pools.setdefault(pool_id, []).append({
+            "external_id": cint(external_id),
+            "ip_pool": pool_map.get(str(pool_id)) if pool_id else None,
+            "ip_address": ip.get("ip_address"),
+            "isp": isp_map.get(str(ip.get("isp_id"))) if ip.get("isp_id") else None,
+            "branch": branch_map.get(str(ip.get("branch_id"))) if ip.get("branch_id") else None,
+            "created_at": clean_datetime(ip.get("created_at")),
+            "updated_at": clean_datetime(ip.get("updated_at")),
+        })
+
+    # 3) Skip pools whose fingerprint matches the last applied one
+    stored_hashes = {
+        r.name: r.addresses_hash
+        for r in frappe.get_all("IP Pool", fields=["name", "addresses_hash"])
+    }
+    changed = {}
+    for pool_id, rows in pools.items():
+        fingerprint = _pool_fingerprint(rows)
+        pool_name = rows[0]["ip_pool"]
+        if pool_name and stored_hashes.get(pool_name) == fingerprint:
+            continue
+        changed[pool_id] = (pool_name, fingerprint, rows)
+
+    incoming = {r["external_id"]: r for _, _, rows in changed.values() for r in rows}
+    changed_pool_names = [name for name, _, _ in changed.values() if name]
+
+    # 4) Local rows of changed pools (+ rows that moved into them) in one query
+    local_rows = []
+    if changed:
+        or_filters = [["external_id", "in", list(incoming)]]
+        if changed_pool_names:
+            or_filters.append(["ip_pool", "in", changed_pool_names])
+        local_rows = frappe.get_all(
+            "IP Address",
+            or_filters=or_filters,
+            fields=["name", "external_id", *DIFF_FIELDS],
+        )
+
+    local_by_id = {cint(r.external_id): r for r in local_rows if r.external_id}
+
+    # 5) Diff
+    to_insert = []
+    to_update = {}
+    for external_id, row in incoming.items():
+        local = local_by_id.get(external_id)
+        if not local:
+            to_insert.append(row)
+            continue
+        changes = {
+            f: row.get(f)
+            for f in DIFF_FIELDS
+            if row.get(f) is not None and _as_text(row.get(f)) != _as_text(local.get(f))
+        }
+        if changes:
+            if "ip_address" in changes:
+                changes["ip_int"] = ip_to_int(changes["ip_address"])
+            to_update[local.name] = changes
+
+    # 6) Records gone upstream first: archived + removed through the orphan
+    # cleanup (with its safety threshold). This also frees addresses that were
+    # re-created upstream under a new id before the inserts below.
+    orphans = purge_orphans("IP Address", [ip.get("id") for ip in ip_addresses])
+
+    # autoname is field:ip_address; an address still held locally (by a record
+    # that is live upstream, or kept because the cleanup was blocked) can't be inserted
+    failed = 0
+    held = {}
+    insert_names = [r["ip_address"] for r in to_insert]
+    if insert_names:
+        held = {
+            r.name: r.external_id
+            for r in frappe.get_all(
+                "IP Address", filters={"name": ["in", insert_names]}, fields=["name", "external_id"]
+            )
+        }
+        if held:
+            failed = len([r for r in to_insert if r["ip_address"] in held])
+            to_insert = [r for r in to_insert if r["ip_address"] not in held]
+            frappe.log_error(
+                title="IPAddress Bulk Sync Conflict",
+                message=f"Addresses already held by other records: {sorted(held.items())}",
+            )
+
+    # 7) Apply in bulk
+    if to_update:
+        frappe.db.bulk_update("IP Address", to_update, chunk_size=BULK_CHUNK_SIZE)
+
+    if to_insert:
+        now = now_datetime()
+        user = frappe.session.user
+        fields = ["name", "owner", "modified_by", "creation", "modified",
+                  "external_id", "ip_int", *DIFF_FIELDS]
+        values = [
+            (r["ip_address"], user, user, now, now, r["external_id"], ip_to_int(r["ip_address"]),
+             *(r.get(f) for f in DIFF_FIELDS))
+            for r in to_insert
+        ]
+        frappe.db.bulk_insert("IP Address", fields, values, chunk_size=BULK_CHUNK_SIZE)
+
+    # 8) Remember what was applied per pool (not for pools that hit a conflict: retry next run)
+    conflict_pools = {r["ip_pool"] for r in incoming.values() if r["ip_address"] in held}
+    for pool_name, fingerprint, _ in changed.values():
+        if pool_name and pool_name not in conflict_pools:
+            frappe.db.set_value("IP Pool", pool_name, "addresses_hash", fingerprint, update_modified=False)
+
+    frappe.db.commit()
+
+    created = len(to_insert)
+    updated = len(to_update)
+
+    return {
+        "success": True,
+        "message": f"✅ IPAddress Bulk Sync Completed | Created: {created}, Updated: {updated}, Deleted: {orphans['deleted']}, Skipped: {skipped}, Failed: {failed}, Pools Unchanged: {len(pools) - len(changed)}, Total: {len(ip_addresses)}",
+        "created": created,
+        "updated": updated,
+        "skipped": skipped,
+        "failed": failed,
+        "pools_total": len(pools),
+        "pools_unchanged": len(pools) - len(changed),
+        "total_api_records": len(ip_addresses),
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
     }
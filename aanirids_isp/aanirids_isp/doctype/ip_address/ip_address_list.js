@@ -2,7 +2,7 @@ frappe.listview_settings["IP Address"] = {
     onload: function (listview) {
         listview.page.add_inner_button("Sync IP Address", function () {
             frappe.call({
-                method: "aanirids_isp.aanirids_isp.doctype.ip_address.ip_address.sync_ip_addresses",
+                method: "aanirids_isp.aanirids_isp.doctype.ip_address.ip_address.sync_ip_addresses_bulk",
                 freeze: true,
                 freeze_message: "Syncing IP Address...",
                 callback: function (r) {
@@ -12,6 +12,8 @@ frappe.listview_settings["IP Address"] = {
                             message: `
                 Created: <b>${r.message.created}</b><br>
                 Updated: <b>${r.message.updated}</b><br>
+                Deleted: <b>${r.message.deleted}</b><br>
+                Pools Unchanged: <b>${r.message.pools_unchanged}</b><br>
                 Total: <b>${r.message.total_api_records}</b>
               `,
                             indicator: "green"
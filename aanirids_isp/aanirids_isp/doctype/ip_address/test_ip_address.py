@@ -1,9 +1,39 @@
 # Copyright (c) 2026, Mohammed Zeeshan and Contributors
 # See license.txt
 
-# import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from aanirids_isp.aanirids_isp.utils.ip import cidr_to_range, int_to_ip, ip_to_int
+
 
 class TestIPAddress(FrappeTestCase):
-	pass
+	def test_ip_to_int(self):
+		self.assertEqual(ip_to_int("10.0.0.1"), 167772161)
+		self.assertEqual(ip_to_int(" 192.168.1.10 "), 3232235786)
+		self.assertEqual(ip_to_int("0.0.0.0"), 0)
+		self.assertEqual(ip_to_int("255.255.255.255"), 2**32 - 1)
+
+	def test_ip_to_int_rejects_non_ipv4(self):
+		for value in (None, "", "not an ip", "10.0.0.256", "10.0.0", "::1", "2001:db8::1"):
+			self.assertIsNone(ip_to_int(value), value)
+
+	def test_int_to_ip_round_trip(self):
+		for ip in ("0.0.0.0", "10.20.30.40", "172.16.0.1", "255.255.255.255"):
+			self.assertEqual(int_to_ip(ip_to_int(ip)), ip)
+		self.assertIsNone(int_to_ip(None))
+
+	def test_cidr_to_range(self):
+		self.assertEqual(cidr_to_range("10.0.1.0/24"), (ip_to_int("10.0.1.0"), ip_to_int("10.0.1.255")))
+		# host bits set: not strict, same network
+		self.assertEqual(cidr_to_range("10.0.1.77/24"), cidr_to_range("10.0.1.0/24"))
+		self.assertEqual(cidr_to_range("10.0.0.0/8"), (ip_to_int("10.0.0.0"), ip_to_int("10.255.255.255")))
+
+	def test_cidr_bare_address_is_a_single_host(self):
+		value = ip_to_int("192.168.5.9")
+		self.assertEqual(cidr_to_range("192.168.5.9"), (value, value))
+		self.assertEqual(cidr_to_range("192.168.5.9/32"), (value, value))
+
+	def test_cidr_rejects_invalid_and_ipv6(self):
+		for value in ("10.0.0.0/33", "garbage", "2001:db8::/64"):
+			with self.assertRaises(ValueError):
+				cidr_to_range(value)
@@ -3,7 +3,11 @@
 
 import frappe
 from frappe.model.document import Document
-import requests
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import singleton_sync
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes
 
 
 class IPPool(Document):
@@ -13,15 +17,16 @@ IP_POOL_API_URL = "http://172.24.160.1:5003/api/ip-pools"
 TIMEOUT = 20
 
 @frappe.whitelist()
+@singleton_sync("IP Pool")
 def sync_ip_pools():
     """
     Sync IP Pools from API into IP Pool DocType
     Upsert based on external_id
     """
     try:
-        r = requests.get(IP_POOL_API_URL, timeout=TIMEOUT)
+        r = backend_request("get", IP_POOL_API_URL, timeout=TIMEOUT)
         r.raise_for_status()
-        payload = r.json()
+        payload = response_json(r)
     except Exception as e:
         frappe.throw(f"❌ IP Pools API fetch failed: {str(e)}")
     
@@ -67,7 +72,8 @@ def sync_ip_pools():
             doc = frappe.get_doc("IP Pool", existing)
             doc.update(mapped)
             doc.save(ignore_permissions=True)
-            updated += 1
+            if has_changes(doc):
+                updated += 1
         else:
             doc = frappe.new_doc("IP Pool")
             doc.update(mapped)
@@ -76,8 +82,14 @@ def sync_ip_pools():
 
     frappe.db.commit()
 
+    # ✅ Records deleted upstream: archived + removed locally (no backend delete)
+    orphans = purge_orphans("IP Pool", [row.get("id") for row in ip_pools])
+
     return {
         "total": len(ip_pools),
         "created": created,
-        "updated": updated
+        "updated": updated,
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
     }
@@ -2,9 +2,13 @@
 # For license information, please see license.txt
 
 import frappe
-import requests
 from frappe.model.document import Document
 from frappe.utils import get_datetime
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import singleton_sync
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes
 
 ISP_API_URL = "http://172.24.160.1:5003/api/isps"
 TIMEOUT = 20
@@ -30,15 +34,16 @@ def clean_datetime(dt):
         return None
 
 @frappe.whitelist()
+@singleton_sync("ISP")
 def sync_isps():
     """
     Sync ISPs from API into ISP DocType
     Upsert based on external_id
     """
     try:
-        r = requests.get(ISP_API_URL, timeout=TIMEOUT)
+        r = backend_request("get", ISP_API_URL, timeout=TIMEOUT)
         r.raise_for_status()
-        payload = r.json()
+        payload = response_json(r)
     except Exception as e:
         frappe.throw(f"❌ ISPs API fetch failed: {str(e)}")
     
@@ -81,7 +86,8 @@ def sync_isps():
             doc = frappe.get_doc("ISP", existing)
             doc.update(mapped)
             doc.save(ignore_permissions=True)
-            updated += 1
+            if has_changes(doc):
+                updated += 1
         else:
             doc = frappe.new_doc("ISP")
             doc.update(mapped)
@@ -90,9 +96,15 @@ def sync_isps():
 
     frappe.db.commit()
 
+    # ✅ Records deleted upstream: archived + removed locally (no backend delete)
+    orphans = purge_orphans("ISP", [row.get("id") for row in isps])
+
     return {
         "status": "success",
         "total": len(isps),
         "created": created,
-        "updated": updated
+        "updated": updated,
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
     }
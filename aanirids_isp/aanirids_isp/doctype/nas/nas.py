@@ -1,6 +1,15 @@
+import time
+
 import frappe
-import requests
 from frappe.model.document import Document
+from frappe.utils import cint
+
+from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import read_rollup_counts
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import singleton_sync, sync_lock, wait_for_unlock
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes
 
 
 class NAS(Document):
@@ -28,7 +37,44 @@ def clean_datetime(dt):
         return None
 
 
+def map_nas_row(row):
+    mapped = {
+        "external_id": row.get("id"),
+        "nasname": row.get("nasname"),
+        "shortname": row.get("shortname"),
+        "type": row.get("type"),
+        "ports": row.get("ports"),
+        "secret": row.get("secret"),
+        "server": row.get("server"),
+        "community": row.get("community"),
+        "description": row.get("description"),
+        "created_at": clean_datetime(row.get("created_at")),
+        "updated_at": clean_datetime(row.get("updated_at")),
+    }
+
+    # remove None values
+    return {k: v for k, v in mapped.items() if v is not None}
+
+
+def upsert_nas(row, mapped=None):
+    """Upsert one backend NAS object by external_id -> "created" | "updated" | "unchanged"."""
+    mapped = mapped or map_nas_row(row)
+    existing = frappe.db.exists("NAS", {"external_id": row.get("id")})
+
+    if existing:
+        doc = frappe.get_doc("NAS", existing)
+        doc.update(mapped)
+        doc.save(ignore_permissions=True)
+        return "updated" if has_changes(doc) else "unchanged"
+
+    doc = frappe.new_doc("NAS")
+    doc.update(mapped)
+    doc.insert(ignore_permissions=True)
+    return "created"
+
+
 @frappe.whitelist()
+@singleton_sync("NAS")
 def sync_nas():
     """
     Sync NAS records from API into NAS DocType
@@ -37,9 +83,9 @@ def sync_nas():
 
     # 1) Fetch API data
     try:
-        r = requests.get(NAS_API_URL, timeout=TIMEOUT)
+        r = backend_request("get", NAS_API_URL, timeout=TIMEOUT)
         r.raise_for_status()
-        payload = r.json()
+        payload = response_json(r)
     except Exception as e:
         frappe.throw(f"❌ NAS API fetch failed: {str(e)}")
 
@@ -59,40 +105,16 @@ def sync_nas():
         mapped = {}
 
         try:
-            external_id = row.get("id")
-            if not external_id:
+            if not row.get("id"):
                 skipped += 1
                 continue
 
-            mapped = {
-                "external_id": external_id,
-                "nasname": row.get("nasname"),
-                "shortname": row.get("shortname"),
-                "type": row.get("type"),
-                "ports": row.get("ports"),
-                "secret": row.get("secret"),
-                "server": row.get("server"),
-                "community": row.get("community"),
-                "description": row.get("description"),
-                "created_at": clean_datetime(row.get("created_at")),
-                "updated_at": clean_datetime(row.get("updated_at")),
-            }
-
-            # remove None values
-            mapped = {k: v for k, v in mapped.items() if v is not None}
-
-            existing = frappe.db.exists("NAS", {"external_id": external_id})
-
-            if existing:
-                doc = frappe.get_doc("NAS", existing)
-                doc.update(mapped)
-                doc.save(ignore_permissions=True)
-                updated += 1
-            else:
-                doc = frappe.new_doc("NAS")
-                doc.update(mapped)
-                doc.insert(ignore_permissions=True)
+            mapped = map_nas_row(row)
+            result = upsert_nas(row, mapped)
+            if result == "created":
                 created += 1
+            elif result == "updated":
+                updated += 1
 
         except Exception as e:
             failed += 1
@@ -110,6 +132,9 @@ Mapped Data:
 
     frappe.db.commit()
 
+    # ✅ Records deleted upstream: archived + removed locally (no backend delete)
+    orphans = purge_orphans("NAS", [row.get("id") for row in records])
+
     return {
         "success": True,
         "message": f"✅ NAS Sync Completed | Created: {created}, Updated: {updated}, Skipped: {skipped}, Failed: {failed}, Total: {len(records)}",
@@ -118,4 +143,141 @@ Mapped Data:
         "skipped": skipped,
         "failed": failed,
         "total_api_records": len(records),
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
     }
+
+
+# ============================================================
+# ✅ LEAST-LOADED NAS ASSIGNMENT
+# ============================================================
+DEFAULT_NAS_CAPACITY = 1000
+
+
+def get_eligible_nas(branch=None):
+    """
+    NAS boxes a new subscriber may be placed on.
+    With a branch, only NAS linked to that branch through NAS Group are used
+    (falls back to all NAS when the branch has none).
+    """
+    nas_list = frappe.get_all(
+        "NAS",
+        filters={"exclude_from_auto_assign": 0},
+        fields=["name", "max_subscribers"],
+    )
+
+    if branch:
+        branch_nas = set(frappe.get_all(
+            "NAS Group",
+            filters={"branch": branch, "nas_name": ["is", "set"]},
+            pluck="nas_name",
+        ))
+        in_branch = [n for n in nas_list if n.name in branch_nas]
+        if in_branch:
+            nas_list = in_branch
+
+    return nas_list
+
+
+def pick_least_loaded_nas(nas_list, active_counts):
+    """
+    Lowest active/capacity ratio wins; NAS at or over capacity are skipped.
+    Ties go to the NAS name so the choice is deterministic.
+    """
+    default_capacity = cint(frappe.conf.get("aanirids_default_nas_capacity")) or DEFAULT_NAS_CAPACITY
+
+    best = None
+    for nas in nas_list:
+        capacity = cint(nas.max_subscribers) or default_capacity
+        active = active_counts.get(nas.name, 0)
+        if active >= capacity:
+            continue
+        score = (active / capacity, nas.name)
+        if best is None or score < best[0]:
+            best = (score, nas.name)
+
+    return best[1] if best else None
+
+
+# ============================================================
+# ✅ NAS ASSIGNMENT
+# A pick is reserved in Redis until the subscriber's insert commits (and its
+# rollup counter is bumped) or rolls back. Only the pick itself is serialized;
+# no row lock is held across the backend calls in after_insert.
+# ============================================================
+ASSIGN_LOCK = "NAS:assign"
+ASSIGN_ATTEMPTS = 5
+# a reservation whose transaction never reported back stops counting after this
+RESERVATION_TTL = 10 * 60
+
+
+def _reservation_key(nas):
+    return frappe.cache().make_key(f"aanirids:nas_reservations:{nas}")
+
+
+def reserved_counts(nas_names):
+    """{nas: picks not yet committed}."""
+    cache = frappe.cache()
+    now = time.time()
+    counts = {}
+    for nas in nas_names:
+        key = _reservation_key(nas)
+        cache.zremrangebyscore(key, "-inf", now)
+        counts[nas] = cint(cache.zcard(key))
+    return counts
+
+
+def reserve_nas(nas):
+    """Count `nas` as taken until the current transaction commits or rolls back."""
+    cache = frappe.cache()
+    key = _reservation_key(nas)
+    token = frappe.generate_hash(length=16)
+    cache.zadd(key, {token: time.time() + RESERVATION_TTL})
+
+    def release():
+        frappe.cache().zrem(key, token)
+
+    frappe.db.after_commit.add(release)
+    frappe.db.after_rollback.add(release)
+
+
+def nas_load(names):
+    """{nas: active subscribers (Subscriber Rollup) + picks still in flight}."""
+    active = read_rollup_counts("nas_server", names, "Active")
+    reserved = reserved_counts(names)
+    return {n: active.get(n, 0) + reserved.get(n, 0) for n in names}
+
+
+def assign_least_loaded_nas(branch=None):
+    """
+    Pick a NAS for a new subscriber from the live Subscriber Rollup counters
+    (no COUNT over Subscriber) plus the picks still in flight.
+    """
+    nas_list = get_eligible_nas(branch)
+    if not nas_list:
+        return None
+
+    names = [n.name for n in nas_list]
+    for _ in range(ASSIGN_ATTEMPTS):
+        with sync_lock(ASSIGN_LOCK, ttl=30) as owner:
+            if owner:
+                nas = pick_least_loaded_nas(nas_list, nas_load(names))
+                if nas:
+                    reserve_nas(nas)
+                return nas
+
+        wait_for_unlock(ASSIGN_LOCK, timeout=5)
+
+    frappe.throw("NAS auto-assignment is busy, please try again")
+
+
+@frappe.whitelist()
+def suggest_nas(branch=None):
+    """Read-only preview of the NAS auto-assignment would pick (same load, no reservation)."""
+    frappe.has_permission("NAS", throw=True)
+
+    nas_list = get_eligible_nas(branch)
+    if not nas_list:
+        return None
+    return pick_least_loaded_nas(nas_list, nas_load([n.name for n in nas_list]))
@@ -1,9 +1,35 @@
 # Copyright (c) 2026, Mohammed Zeeshan and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from aanirids_isp.aanirids_isp.doctype.nas.nas import pick_least_loaded_nas
+
+
+def nas(name, capacity):
+	return frappe._dict(name=name, max_subscribers=capacity)
+
 
 class TestNAS(FrappeTestCase):
-	pass
+	def test_lowest_load_ratio_wins(self):
+		nas_list = [nas("NAS-A", 100), nas("NAS-B", 50)]
+		# 50/100 = 0.5 beats 30/50 = 0.6 even though B has fewer subscribers
+		self.assertEqual(pick_least_loaded_nas(nas_list, {"NAS-A": 50, "NAS-B": 30}), "NAS-A")
+		self.assertEqual(pick_least_loaded_nas(nas_list, {"NAS-A": 80, "NAS-B": 30}), "NAS-B")
+
+	def test_missing_counts_are_empty(self):
+		nas_list = [nas("NAS-A", 100), nas("NAS-B", 100)]
+		self.assertEqual(pick_least_loaded_nas(nas_list, {"NAS-A": 1}), "NAS-B")
+
+	def test_full_nas_is_skipped(self):
+		nas_list = [nas("NAS-A", 10), nas("NAS-B", 100)]
+		self.assertEqual(pick_least_loaded_nas(nas_list, {"NAS-A": 10, "NAS-B": 99}), "NAS-B")
+		self.assertIsNone(pick_least_loaded_nas(nas_list, {"NAS-A": 10, "NAS-B": 100}))
+
+	def test_ties_go_to_the_name(self):
+		nas_list = [nas("NAS-C", 100), nas("NAS-A", 100), nas("NAS-B", 100)]
+		self.assertEqual(pick_least_loaded_nas(nas_list, {}), "NAS-A")
+
+	def test_no_candidates(self):
+		self.assertIsNone(pick_least_loaded_nas([], {}))
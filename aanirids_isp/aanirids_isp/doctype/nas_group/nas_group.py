@@ -2,8 +2,12 @@
 # For license information, please see license.txt
 
 import frappe
-import requests
 from frappe.model.document import Document
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import singleton_sync
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes
 
 
 
@@ -30,15 +34,16 @@ def clean_datetime(dt):
         return None
 
 @frappe.whitelist()
+@singleton_sync("NAS Group")
 def sync_nas_groups():
     """
     Sync NAS Groups from API into NASGroup DocType
     Upsert based on external_id (id)
     Works if API returns LIST or {success:true,data:[...]}"""
     try:
-        r = requests.get(NASGroup_API_URL, timeout=TIMEOUT)
+        r = backend_request("get", NASGroup_API_URL, timeout=TIMEOUT)
         r.raise_for_status()
-        payload = r.json()
+        payload = response_json(r)
     except Exception as e:
         frappe.throw(f"❌ NAS Groups API fetch failed: {str(e)}")
     
@@ -107,7 +112,8 @@ def sync_nas_groups():
                 doc = frappe.get_doc("NAS Group", existing)
                 doc.update(mapped)
                 doc.save(ignore_permissions=True)
-                updated += 1
+                if has_changes(doc):
+                    updated += 1
             else:
                 doc = frappe.new_doc("NAS Group")
                 doc.update(mapped)
@@ -130,6 +136,9 @@ Mapped Data:
     
     frappe.db.commit()
     
+    # ✅ Records deleted upstream: archived + removed locally (no backend delete)
+    orphans = purge_orphans("NAS Group", [row.get("id") for row in nas_groups])
+
     return {
         "success": True,
         "message": f"✅ NASGroup Sync Completed | Created: {created}, Updated: {updated}, Skipped: {skipped}, Failed: {failed}, Total: {len(nas_groups)}",
@@ -138,4 +147,7 @@ Mapped Data:
         "skipped": skipped,
         "failed": failed,
         "total_api_records": len(nas_groups),
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
     }
@@ -1,10 +1,20 @@
 import frappe
-import requests
 from frappe.model.document import Document
 
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes, record_sync_version, start_sync_run
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import singleton_sync
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+
 
 class Plan(Document):
-    pass
+
+    def save_version(self):
+        # sync saves: at most one compact Version per run, none if unchanged
+        if getattr(self.flags, "from_backend_sync", False):
+            return record_sync_version(self)
+        return super().save_version()
 
 
 PACKAGE_API_URL = "http://172.24.160.1:5003/api/packages/"
@@ -26,18 +36,62 @@ def map_duration_type(api_duration_type):
     return "Months" if int(api_duration_type or 0) == 2 else "Days"
 
 
+def map_plan_row(item):
+    mapped = {
+        "external_id": item.get("id"),
+        "plan_name": item.get("name"),
+        "description": item.get("description"),
+        "invoice_description": item.get("invoice_description"),
+
+        "status": map_status(item.get("status")),
+        "billing_type": map_billing_type(item.get("billing_type")),
+
+        # stored as Data IDs
+        "isp": str(item.get("isp_id")) if item.get("isp_id") is not None else None,
+        "branch": str(item.get("branch_id")) if item.get("branch_id") is not None else None,
+
+        "duration": item.get("duration"),
+        "duration_type": map_duration_type(item.get("duration_type")),
+    }
+
+    # remove None values
+    return {k: v for k, v in mapped.items() if v is not None}
+
+
+def upsert_plan(item, mapped=None):
+    """Upsert one backend package object by external_id -> "created" | "updated" | "unchanged"."""
+    mapped = mapped or map_plan_row(item)
+    existing_name = frappe.db.exists("Plan", {"external_id": item.get("id")})
+
+    if existing_name:
+        doc = frappe.get_doc("Plan", existing_name)
+        doc.update(mapped)
+        doc.flags.from_backend_sync = True
+        doc.save(ignore_permissions=True)
+        return "updated" if has_changes(doc) else "unchanged"
+
+    doc = frappe.new_doc("Plan")
+    doc.update(mapped)
+    doc.flags.from_backend_sync = True
+    doc.insert(ignore_permissions=True)
+    return "created"
+
+
 @frappe.whitelist()
+@singleton_sync("Plan")
 def sync_plans():
     """
     Sync full Plan fields from Packages API into Plan DocType.
     Upsert using external_id (create if not exists, else update).
     """
 
+    start_sync_run()
+
     # 1) Fetch API data
     try:
-        r = requests.get(PACKAGE_API_URL, timeout=TIMEOUT)
+        r = backend_request("get", PACKAGE_API_URL, timeout=TIMEOUT)
         r.raise_for_status()
-        payload = r.json()
+        payload = response_json(r)
     except Exception as e:
         frappe.throw(f"❌ API fetch failed: {str(e)}")
 
@@ -56,44 +110,17 @@ def sync_plans():
         mapped = {}
 
         try:
-            external_id = item.get("id")
-            if not external_id:
+            if not item.get("id"):
                 skipped += 1
                 continue
 
-            mapped = {
-                "external_id": external_id,
-                "plan_name": item.get("name"),
-                "description": item.get("description"),
-                "invoice_description": item.get("invoice_description"),
-
-                "status": map_status(item.get("status")),
-                "billing_type": map_billing_type(item.get("billing_type")),
-
-                # stored as Data IDs
-                "isp": str(item.get("isp_id")) if item.get("isp_id") is not None else None,
-                "branch": str(item.get("branch_id")) if item.get("branch_id") is not None else None,
-
-                "duration": item.get("duration"),
-                "duration_type": map_duration_type(item.get("duration_type")),
-            }
-
-            # remove None values
-            mapped = {k: v for k, v in mapped.items() if v is not None}
-
             # 3) Upsert
-            existing_name = frappe.db.exists("Plan", {"external_id": external_id})
-
-            if existing_name:
-                doc = frappe.get_doc("Plan", existing_name)
-                doc.update(mapped)
-                doc.save(ignore_permissions=True)
-                updated += 1
-            else:
-                doc = frappe.new_doc("Plan")
-                doc.update(mapped)
-                doc.insert(ignore_permissions=True)
+            mapped = map_plan_row(item)
+            result = upsert_plan(item, mapped)
+            if result == "created":
                 created += 1
+            elif result == "updated":
+                updated += 1
 
         except Exception as e:
             failed += 1
@@ -111,6 +138,9 @@ Mapped Data:
 
     frappe.db.commit()
 
+    # ✅ Records deleted upstream: archived + removed locally (no backend delete)
+    orphans = purge_orphans("Plan", [item.get("id") for item in data])
+
     return {
         "success": True,
         "message": f"✅ Sync Completed | Created: {created}, Updated: {updated}, Skipped: {skipped}, Failed: {failed}, Total: {len(data)}",
@@ -119,4 +149,7 @@ Mapped Data:
         "skipped": skipped,
         "failed": failed,
         "total_api_records": len(data),
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
     }
@@ -1,6 +1,10 @@
 import frappe
-import requests
 from frappe.model.document import Document
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import singleton_sync
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes
 
 
 class Salesperson(Document):
@@ -27,6 +31,7 @@ def clean_datetime(dt):
         return None
 
 @frappe.whitelist()
+@singleton_sync("Salesperson")
 def sync_salespersons():
     """
     Sync Users from API into Salesperson DocType
@@ -36,9 +41,9 @@ def sync_salespersons():
 
     # 1) Fetch users
     try:
-        r = requests.get(USERS_API_URL, timeout=TIMEOUT)
+        r = backend_request("get", USERS_API_URL, timeout=TIMEOUT)
         r.raise_for_status()
-        payload = r.json()
+        payload = response_json(r)
     except Exception as e:
         frappe.throw(f"❌ Users API fetch failed: {str(e)}")
 
@@ -111,7 +116,8 @@ def sync_salespersons():
                 doc = frappe.get_doc("Salesperson", existing)
                 doc.update(mapped)
                 doc.save(ignore_permissions=True)
-                updated += 1
+                if has_changes(doc):
+                    updated += 1
             else:
                 doc = frappe.new_doc("Salesperson")
                 doc.update(mapped)
@@ -134,6 +140,9 @@ Mapped Data:
 
     frappe.db.commit()
 
+    # ✅ Records deleted upstream: archived + removed locally (no backend delete)
+    orphans = purge_orphans("Salesperson", [row.get("id") for row in users])
+
     return {
         "success": True,
         "message": f"✅ Salesperson Sync Completed | Created: {created}, Updated: {updated}, Skipped: {skipped}, Failed: {failed}, Total: {len(users)}",
@@ -142,4 +151,7 @@ Mapped Data:
         "skipped": skipped,
         "failed": failed,
         "total_api_records": len(users),
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
     }
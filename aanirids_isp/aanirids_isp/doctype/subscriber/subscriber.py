@@ -1,8 +1,65 @@
 import frappe
-import requests
 import json
-from frappe.utils import getdate, now_datetime
+import hashlib
+import hmac
+import time
+from frappe.utils import cint, getdate, now_datetime
+from frappe.utils.password import get_encryption_key
+from frappe.model import no_value_fields
 from frappe.model.document import Document
+from aanirids_isp.aanirids_isp.utils.ip import ip_to_int
+from aanirids_isp.aanirids_isp.utils import geo
+from aanirids_isp.aanirids_isp.utils.versioning import has_changes, record_sync_version, start_sync_run
+from aanirids_isp.aanirids_isp.utils.backend import BackendUnavailable, backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.detail_fetch import fetch_details, map_concurrent
+from aanirids_isp.aanirids_isp.utils.memory import MemoryMonitor, release_batch_memory
+from aanirids_isp.aanirids_isp.utils.orphans import purge_orphans
+from aanirids_isp.aanirids_isp.utils.tuning import commit_size, page_size
+from aanirids_isp.aanirids_isp.utils.rate_limit import AdaptiveConcurrency
+from aanirids_isp.aanirids_isp.utils.lanes import (
+    BULK_QUEUE,
+    bulk_slot,
+    enqueue_interactive,
+    interactive_job,
+    refresh_bulk_slot,
+    yield_to_interactive,
+)
+from aanirids_isp.aanirids_isp.utils.locks import (
+    enqueue_once,
+    job_id_for,
+    refresh_lock,
+    singleton_sync,
+    sync_lock,
+    wait_for_unlock,
+)
+from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import (
+    apply_rollup_deltas,
+    collect_subscriber_delta,
+    rebuild_subscriber_rollups,
+    update_subscriber_rollups,
+)
+from aanirids_isp.aanirids_isp.doctype.nas.nas import assign_least_loaded_nas
+from aanirids_isp.aanirids_isp.doctype.subscriber_search_token.subscriber_search_token import (
+    delete_search_tokens,
+    rebuild_search_index,
+    update_search_index,
+)
+from aanirids_isp.aanirids_isp.doctype.subscriber_backend_push.subscriber_backend_push import (
+    pending_push_ids,
+    queue_backend_push,
+)
+from aanirids_isp.aanirids_isp.doctype.subscriber_sync_retry.subscriber_sync_retry import (
+    clear_retries,
+    pending_external_ids,
+    record_failure,
+)
+from aanirids_isp.aanirids_isp.doctype.sync_run.sync_run import (
+    finish_run,
+    save_checkpoint,
+    start_or_resume,
+    start_run,
+)
 
 API_URL = "http://172.24.160.1:5003/api/subscribers"
 RAD_CHECK_URL = "http://172.24.160.1:5003/api/radcheck"
@@ -11,6 +68,32 @@ SUBSCRIBER_SERVICES_URL = "http://172.24.160.1:5003/api/subscriber-services"
 
 TIMEOUT = 60
 DEFAULT_LIMIT = 50
+# starting points; both are tuned at runtime (utils/tuning.py)
+DEFAULT_COMMIT_SIZE = 25
+
+# site_config: "aanirids_lazy_credentials": 1 -> bulk/scheduled syncs never touch passwords
+LAZY_CREDENTIALS_KEY = "aanirids_lazy_credentials"
+
+# lock / job-id scopes (see utils/locks.py)
+LIST_SYNC_LOCK = "Subscriber:list"
+BULK_DETAILS_LOCK = "Subscriber:details:bulk"
+BULK_DETAILS_TIMEOUT = 7200
+BULK_DETAILS_JOB = "Subscriber Details Bulk"
+SUBSET_DETAILS_JOB = "Subscriber Details Subset"
+LIST_SYNC_JOB = "Subscriber List"
+# short TTL refreshed every batch: a killed worker frees the lock within minutes
+BULK_DETAILS_LOCK_TTL = 15 * 60
+# ids per detail fetch in the bulk job (the backend may advertise a lower limit)
+DETAILS_FETCH_BATCH = 100
+
+# first import (empty Subscriber table)
+BOOTSTRAP_PAGE_SIZE = 500
+BOOTSTRAP_WORKERS = 8
+BOOTSTRAP_INSERT_CHUNK = 1000
+
+
+def details_lock(subscriber_name):
+    return f"Subscriber:details:{subscriber_name}"
 
 
 # ============================================================
@@ -74,6 +157,31 @@ def build_payload(doc):
     return payload
 
 
+def credentials_digest(password, connection_password):
+    """Keyed digest of synced credentials (never store plain hashes of passwords)."""
+    message = f"{password or ''}\0{connection_password or ''}".encode()
+    return hmac.new(get_encryption_key().encode(), message, hashlib.sha256).hexdigest()
+
+
+def apply_synced_credentials(doc, data):
+    """
+    Assign backend passwords only when they changed since the last sync.
+    Unchanged Password fields keep their masked value, so Frappe skips the
+    re-encryption and the __Auth writes on save.
+    """
+    password = data.get("password")
+    connection_password = data.get("connection_password")
+
+    digest = credentials_digest(password, connection_password)
+    if digest == doc.credentials_digest:
+        return False
+
+    doc.password = password
+    doc.connection_password = connection_password
+    doc.credentials_digest = digest
+    return True
+
+
 # ============================================================
 # ✅ BACKEND CRUD HELPERS
 # ============================================================
@@ -81,11 +189,11 @@ def backend_create_subscriber(doc):
     """POST create subscriber in backend and return external_id."""
     payload = build_payload(doc)
 
-    r = requests.post(API_URL, json=payload, timeout=TIMEOUT)
+    r = backend_request("post", API_URL, json=payload, timeout=TIMEOUT)
     if r.status_code not in (200, 201):
         frappe.throw(f"Create API Error {r.status_code}: {r.text}")
 
-    data = r.json()
+    data = response_json(r)
     external_id = data.get("id") or (data.get("data") or {}).get("id")
 
     if not external_id:
@@ -106,7 +214,7 @@ def backend_update_subscriber(doc):
         message=json.dumps(payload, indent=2)
     )
 
-    r = requests.put(url, json=payload, timeout=TIMEOUT)
+    r = backend_request("put", url, json=payload, timeout=TIMEOUT)
 
     if r.status_code not in (200, 201):
         frappe.throw(f"Update API Error {r.status_code}: {r.text}")
@@ -118,7 +226,7 @@ def backend_delete_subscriber(doc):
         return
 
     url = f"{API_URL}/{doc.external_id}"
-    r = requests.delete(url, timeout=TIMEOUT)
+    r = backend_request("delete", url, timeout=TIMEOUT)
     if r.status_code not in (200, 204):
         frappe.throw(f"Delete API Error {r.status_code}: {r.text}")
 
@@ -129,11 +237,11 @@ def create_radcheck_for_subscriber(doc):
 
     payload = {"username": doc.username}
 
-    r = requests.post(RAD_CHECK_URL, json=payload, timeout=TIMEOUT)
+    r = backend_request("post", RAD_CHECK_URL, json=payload, timeout=TIMEOUT)
     if r.status_code not in (200, 201):
         frappe.throw(f"Radcheck Create Error {r.status_code}: {r.text}")
 
-    return r.json()
+    return response_json(r)
 
 
 def create_radusergroup_for_subscriber(doc):
@@ -142,11 +250,11 @@ def create_radusergroup_for_subscriber(doc):
 
     payload = {"username": doc.username}
 
-    r = requests.post(RADUSERGROUP_URL, json=payload, timeout=TIMEOUT)
+    r = backend_request("post", RADUSERGROUP_URL, json=payload, timeout=TIMEOUT)
     if r.status_code not in (200, 201):
         frappe.throw(f"Radusergroup Create Error {r.status_code}: {r.text}")
 
-    return r.json()
+    return response_json(r)
 
 
 def create_subscriber_services_for_subscriber(doc):
@@ -164,11 +272,11 @@ def create_subscriber_services_for_subscriber(doc):
         "updated_at": str(now_datetime()),
     }
 
-    r = requests.post(SUBSCRIBER_SERVICES_URL, json=payload, timeout=TIMEOUT)
+    r = backend_request("post", SUBSCRIBER_SERVICES_URL, json=payload, timeout=TIMEOUT)
     if r.status_code not in (200, 201):
         frappe.throw(f"Subscriber Services Create Error {r.status_code}: {r.text}")
     
-    return r.json()
+    return response_json(r)
 
 
 # ============================================================
@@ -181,7 +289,7 @@ def rollback_backend_subscriber(external_id):
     
     try:
         url = f"{API_URL}/{external_id}"
-        requests.delete(url, timeout=TIMEOUT)
+        backend_request("delete", url, timeout=TIMEOUT)
         frappe.log_error(
             title="✅ Backend Rollback Success",
             message=f"Deleted external_id={external_id} due to Frappe validation failure"
@@ -193,6 +301,32 @@ def rollback_backend_subscriber(external_id):
         )
 
 
+# ============================================================
+# ✅ INDEXES (keyset read API pages on modified, name)
+# ============================================================
+def on_doctype_update():
+    frappe.db.add_index("Subscriber", ["modified", "name"])
+    for field in ("branch", "nas_server", "package_link", "status"):
+        frappe.db.add_index("Subscriber", [field, "modified", "name"])
+
+
+# ============================================================
+# ✅ DEFERRED BACKEND WRITES (queued while the circuit is open)
+# ============================================================
+def deferred_backend_update(subscriber_name):
+    if not subscriber_name or not frappe.db.exists("Subscriber", subscriber_name):
+        return
+    backend_update_subscriber(frappe.get_doc("Subscriber", subscriber_name))
+
+
+def deferred_backend_delete(external_id):
+    if not external_id:
+        return
+    r = backend_request("delete", f"{API_URL}/{external_id}", timeout=TIMEOUT)
+    if r.status_code not in (200, 204, 404):
+        raise Exception(f"Delete API Error {r.status_code}: {r.text}")
+
+
 # ============================================================
 # ✅ DOC CONTROLLER (OPTIMIZED CRUD)
 # ============================================================
@@ -213,17 +347,52 @@ class Subscriber(Document):
         
         if not self.full_name:
             frappe.throw("Full Name is required")
+
+        # ✅ Auto-pick least loaded NAS for new subscribers without one
+        if self.is_new() and not self.nas_server:
+            self.nas_server = assign_least_loaded_nas(self.branch)
         
         # Add more validations as needed
         # This ensures Frappe validates BEFORE we call backend APIs
 
 
+    def before_save(self):
+        """
+        ✅ Keep derived index columns in step with the source fields
+        Runs for manual saves AND backend sync saves
+        (integer IPs for IP reverse lookup, geohash for spatial queries)
+        """
+        # Credentials typed in the form: the stored sync digest no longer applies
+        if not getattr(self.flags, "from_backend_sync", False):
+            for field in ("password", "connection_password"):
+                if self.get(field) and not self.is_dummy_password(self.get(field)):
+                    self.credentials_digest = None
+
+        self.ip_address_int = ip_to_int(self.ip_address)
+        self.cpe_ip_int = ip_to_int(self.cpe_ip_address)
+
+        if geo.has_coordinates(self.latitude, self.longitude):
+            self.geohash = geo.encode(float(self.latitude), float(self.longitude))
+        else:
+            self.geohash = None
+
+
+    def save_version(self):
+        """
+        ✅ Sync saves record at most one compact Version per run (none if unchanged)
+        """
+        if getattr(self.flags, "from_backend_sync", False):
+            return record_sync_version(self)
+        return super().save_version()
+
+
     def after_insert(self):
         """
         ✅ ONLY CREATE BACKEND RECORDS AFTER FRAPPE SUCCESSFULLY SAVES
         This runs AFTER Frappe validation passes and document is inserted
         """
         if getattr(self.flags, "from_backend_sync", False):
+            update_subscriber_rollups(None, self)
             return
 
         created_external_id = None
@@ -268,7 +437,9 @@ class Subscriber(Document):
                     title="✅ SUBSCRIBER SERVICES CREATED",
                     message=f"Subscriber={self.name}, external_id={self.external_id}, username={self.username}"
                 )
-            
+
+            # Counter bump right before commit: its row lock is not held across the calls above
+            update_subscriber_rollups(None, self)
             frappe.db.commit()
             
         except Exception as e:
@@ -290,6 +461,13 @@ class Subscriber(Document):
         """
         ✅ Update backend only when user updates manually in Frappe
         """
+        # Rollup counters follow every update (manual and sync); inserts are counted in after_insert
+        if not getattr(self.flags, "in_insert", False):
+            update_subscriber_rollups(self.get_doc_before_save(), self)
+
+        # Search index (runs after after_insert, so external_id is already set)
+        update_search_index(self.get_doc_before_save(), self)
+
         # Skip updates coming from API sync jobs
         if getattr(self.flags, "from_backend_sync", False):
             return
@@ -304,6 +482,11 @@ class Subscriber(Document):
 
         try:
             backend_update_subscriber(self)
+        except BackendUnavailable as e:
+            # ⚠️ Backend down: keep the Frappe save, push the update once it recovers
+            # one pending push per subscriber; it sends the latest state anyway
+            queue_backend_push("Update", self.external_id, self.name, retry_in=e.retry_in)
+            frappe.msgprint(f"{str(e)} Saved in Frappe; backend update has been queued.", indicator="orange")
         except Exception as e:
             frappe.log_error(
                 title="❌ Backend Update Failed",
@@ -316,11 +499,16 @@ class Subscriber(Document):
         """
         ✅ Delete backend record when user deletes manually in Frappe
         """
+        update_subscriber_rollups(self, None)
+        update_search_index(self, None)
+
         if getattr(self.flags, "from_backend_sync", False):
             return
 
         try:
             backend_delete_subscriber(self)
+        except BackendUnavailable as e:
+            queue_backend_push("Delete", self.external_id, self.name, retry_in=e.retry_in)
         except Exception as e:
             frappe.log_error(
                 title="❌ Backend Delete Failed",
@@ -333,26 +521,106 @@ class Subscriber(Document):
 # ✅ FETCH LIST (PAGINATION)
 # ============================================================
 def fetch_subscribers_page(limit=DEFAULT_LIMIT, offset=0):
+    return fetch_subscribers_page_sized(limit=limit, offset=offset)[0]
+
+
+def fetch_subscribers_page_sized(limit=DEFAULT_LIMIT, offset=0):
+    """(payload, response bytes) - the size feeds the adaptive page size."""
     params = {"limit": limit, "offset": offset}
-    r = requests.get(API_URL, params=params, timeout=TIMEOUT)
+    r = backend_request("get", API_URL, params=params, timeout=TIMEOUT)
 
     if r.status_code != 200:
         frappe.throw(f"API Error {r.status_code}: {r.text}")
 
-    return r.json()
+    return response_json(r), len(r.content or b"")
+
+
+def map_list_fields(s):
+    """Subscriber fields carried by the list endpoint."""
+    return {
+        "username": s.get("username"),
+        "full_name": s.get("fullname") or "",
+        "phone": s.get("phone"),
+        "email": s.get("email"),
+        "status": "Active" if str(s.get("connection_status")) == "1" else "Inactive",
+    }
+
+
+def upsert_subscriber_from_list(s):
+    """Create / update one Subscriber from a list-endpoint row -> "created" | "updated" | "unchanged" | None."""
+    external_id = s.get("id")
+    username = s.get("username")
+
+    if not external_id or not username:
+        return None
+
+    external_id = str(external_id)
+
+    existing = frappe.db.get_value(
+        "Subscriber", {"external_id": external_id}, "name"
+    )
+
+    if existing:
+        doc = frappe.get_doc("Subscriber", existing)
+        is_new = False
+    else:
+        doc = frappe.new_doc("Subscriber")
+        doc.external_id = external_id
+        is_new = True
+
+        doc.details_synced = 0
+        doc.details_synced_on = None
+
+    # ✅ LIST FIELDS
+    doc.update(map_list_fields(s))
+
+    # ✅ critical to avoid CRUD loop
+    doc.flags.from_backend_sync = True
+    doc.save(ignore_permissions=True)
+
+    if is_new:
+        return "created"
+    return "updated" if has_changes(doc) else "unchanged"
+
+
+def purge_subscriber_side_tables(rows):
+    """Orphan cleanup deletes rows without hooks: keep rollups / search index / retries in step."""
+    deltas = {}
+    for row in rows:
+        collect_subscriber_delta(row, None, deltas)
+    apply_rollup_deltas(deltas)
+    delete_search_tokens([row.name for row in rows])
+    clear_retries([row.external_id for row in rows])
 
 
 # ============================================================
 # ✅ LIST SYNC ONLY (AUTO + MANUAL)
 # ============================================================
+@singleton_sync(LIST_SYNC_LOCK, ttl=BULK_DETAILS_TIMEOUT)
 def sync_subscribers_list_only(limit=DEFAULT_LIMIT):
+    start_sync_run()
+    # full sweep: draw from the bulk budget even when run from the list button
+    frappe.flags.backend_lane = "bulk"
+
+    run = start_run(LIST_SYNC_JOB)
+
     created = 0
     updated = 0
+    unchanged = 0
     total_fetched = 0
     offset = 0
+    pages = 0
+    seen = []
+
+    # ✅ Page size follows fetch latency / response size, commit size follows transaction time
+    pager = page_size(limit)
+    committer = commit_size(DEFAULT_COMMIT_SIZE)
 
     while True:
-        data = fetch_subscribers_page(limit=limit, offset=offset)
+        current_limit = pager.value
+        started = time.monotonic()
+        data, size_bytes = fetch_subscribers_page_sized(limit=current_limit, offset=offset)
+        fetch_seconds = time.monotonic() - started
 
         rows = data.get("data", []) if isinstance(data, dict) else data
         pagination = data.get("pagination", {}) if isinstance(data, dict) else {}
@@ -361,67 +629,67 @@ def sync_subscribers_list_only(limit=DEFAULT_LIMIT):
             break
 
         total_fetched += len(rows)
+        pages += 1
 
+        txn_started = time.monotonic()
+        since_commit = 0
         for s in rows:
+            seen.append(s.get("id"))
             try:
-                external_id = s.get("id")
-                username = s.get("username")
-
-                if not external_id or not username:
-                    continue
-
-                external_id = str(external_id)
-
-                existing = frappe.db.get_value(
-                    "Subscriber", {"external_id": external_id}, "name"
-                )
-
-                if existing:
-                    doc = frappe.get_doc("Subscriber", existing)
-                    is_new = False
-                else:
-                    doc = frappe.new_doc("Subscriber")
-                    doc.external_id = external_id
-                    is_new = True
-
-                    doc.details_synced = 0
-                    doc.details_synced_on = None
-
-                # ✅ LIST FIELDS
-                doc.username = username
-                doc.full_name = s.get("fullname") or ""
-                doc.phone = s.get("phone")
-                doc.email = s.get("email")
-                doc.status = "Active" if str(s.get("connection_status")) == "1" else "Inactive"
-
-                # ✅ critical to avoid CRUD loop
-                doc.flags.from_backend_sync = True
-                doc.save(ignore_permissions=True)
-
-                if is_new:
+                result = upsert_subscriber_from_list(s)
+                if result == "created":
                     created += 1
-                else:
+                elif result == "updated":
                     updated += 1
+                elif result == "unchanged":
+                    unchanged += 1
 
             except Exception as e:
                 frappe.log_error(str(e), "Subscriber List Sync Error")
 
+            since_commit += 1
+            if since_commit >= committer.value:
+                frappe.db.commit()
+                committer.observe(time.monotonic() - txn_started)
+                txn_started = time.monotonic()
+                since_commit = 0
+
         frappe.db.commit()
+        release_batch_memory(pages)
+        pager.observe(fetch_seconds, size_bytes)
 
         # Pagination
         if pagination.get("hasMore") is True:
-            offset += limit
+            offset += current_limit
             continue
 
-        if len(rows) < limit:
+        if len(rows) < current_limit:
             break
 
-        offset += limit
+        offset += current_limit
+
+    # ✅ Subscribers deleted upstream (only after every page came back)
+    # offset pages are not a snapshot: only ids missing in two consecutive runs are removed
+    orphans = purge_orphans("Subscriber", seen, on_delete=purge_subscriber_side_tables, confirm=True)
+
+    finish_run(
+        run,
+        metrics={"pages": pages, "page_size": pager.summary(), "commit_size": committer.summary()},
+        total=total_fetched,
+        processed=total_fetched,
+        success=created + updated + unchanged,
+    )
+    frappe.db.commit()
 
     return {
         "total_fetched": total_fetched,
         "created": created,
-        "updated": updated
+        "updated": updated,
+        "changes": created + updated + orphans["deleted"],
+        "orphans_deleted": orphans["deleted"],
+        "orphans_blocked": orphans["blocked"],
+        "page_size": pager.value,
+        "commit_size": committer.value,
     }
 
 
@@ -433,16 +701,172 @@ def sync_subscribers_list_only(limit=DEFAULT_LIMIT):
 def sync_list_and_enqueue_bulk_details(limit=DEFAULT_LIMIT):
     """
     ✅ Use this for:
-    - Auto scheduler hourly
+    - Sync Schedule (interval adapts to the change rate)
     - Manual list button
     """
+    # ✅ Empty table (new site / restore): parallel bootstrap instead of serial paging
+    if not frappe.db.count("Subscriber"):
+        return enqueue_subscriber_bootstrap()
+
     result = sync_subscribers_list_only(limit=limit)
-    enqueue_bulk_details_sync()
+    queued = enqueue_bulk_details_sync()
+
+    return {
+        **result,
+        "status": "success",
+        "message": "List synced ✅ + " + queued["message"],
+    }
+
+
+# ============================================================
+# ✅ COLD-START BOOTSTRAP (FIRST IMPORT)
+# Pages fetched in parallel, rows bulk-inserted without controller hooks,
+# link validation or Versions; enrichment + details run afterwards.
+# ============================================================
+@frappe.whitelist()
+def enqueue_subscriber_bootstrap():
+    job = enqueue_once(
+        "aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.bootstrap_subscribers",
+        job_id=job_id_for("Subscriber", "bootstrap"),
+        queue=BULK_QUEUE,
+        timeout=BULK_DETAILS_TIMEOUT,
+    )
+    if job is None:
+        return {"status": "already_queued", "message": "Subscriber bootstrap already queued / running ⏳"}
+    return {"status": "queued", "message": "First-time subscriber import queued ✅"}
+
+
+def _page_rows(data):
+    rows = data.get("data", []) if isinstance(data, dict) else data
+    pagination = data.get("pagination", {}) if isinstance(data, dict) else {}
+    return rows or [], pagination
+
+
+def _fetch_all_pages(limit, concurrency):
+    """
+    Page one gives the total; the remaining offsets are fetched in parallel.
+    Without a total, pages go out in waves until one comes back short.
+    """
+    first, pagination = _page_rows(fetch_subscribers_page(limit=limit, offset=0))
+    pages = [first]
+    if len(first) < limit and not pagination.get("hasMore"):
+        return pages
+
+    total = cint(pagination.get("total"))
+
+    def fetch(offset):
+        return _page_rows(fetch_subscribers_page(limit=limit, offset=offset))[0]
+
+    if total:
+        offsets = range(limit, total, limit)
+        results = map_concurrent(fetch, offsets, concurrency.value)
+        for offset in offsets:
+            if isinstance(results[offset], Exception):
+                raise results[offset]
+            pages.append(results[offset])
+        return pages
+
+    offset = limit
+    while True:
+        wave = [offset + n * limit for n in range(concurrency.value)]
+        results = map_concurrent(fetch, wave, concurrency.value)
+        concurrency.adjust()
+        for o in wave:
+            if isinstance(results[o], Exception):
+                raise results[o]
+            pages.append(results[o])
+            if len(results[o]) < limit:
+                return pages
+        offset = wave[-1] + limit
+
+
+@singleton_sync(LIST_SYNC_LOCK, ttl=BULK_DETAILS_TIMEOUT)
+def bootstrap_subscribers(limit=BOOTSTRAP_PAGE_SIZE):
+    """
+    First import: fetch every list page in parallel, bulk-insert new
+    subscribers, then rebuild the derived tables in one pass each and queue
+    the detail sync (which goes through the normal save path).
+    """
+    start_sync_run()
+    frappe.flags.backend_lane = "bulk"
+
+    concurrency = AdaptiveConcurrency(
+        initial=cint(frappe.conf.get("aanirids_bootstrap_workers")) or BOOTSTRAP_WORKERS
+    )
+    pages = _fetch_all_pages(cint(limit), concurrency)
+
+    existing_ids = set(frappe.get_all("Subscriber", pluck="external_id"))
+    existing_names = set(frappe.get_all("Subscriber", pluck="name"))
+
+    # defaults a normal insert would have set
+    meta = frappe.get_meta("Subscriber")
+    defaults = {df.fieldname: df.default for df in meta.fields if df.default and df.fieldtype not in no_value_fields}
+
+    now = now_datetime()
+    user = frappe.session.user
+    seen = set()
+    records = []
+    skipped = 0
+    total_fetched = 0
+
+    for rows in pages:
+        total_fetched += len(rows)
+        for s in rows:
+            external_id = str(s.get("id") or "")
+            fields = map_list_fields(s)
+            username = fields["username"]
+
+            if not external_id or not username or external_id in existing_ids:
+                skipped += 1
+                continue
+            # autoname is field:username
+            if username in existing_names or username in seen:
+                skipped += 1
+                continue
+            seen.add(username)
+
+            records.append({
+                **defaults,
+                **fields,
+                "name": username,
+                "owner": user,
+                "modified_by": user,
+                "creation": now,
+                "modified": now,
+                "external_id": external_id,
+                "details_synced": 0,
+            })
+
+    if records:
+        columns = sorted({key for r in records for key in r})
+        frappe.db.bulk_insert(
+            "Subscriber",
+            columns,
+            [tuple(r.get(c) for c in columns) for r in records],
+            chunk_size=BOOTSTRAP_INSERT_CHUNK,
+            ignore_duplicates=True,
+        )
+        frappe.db.commit()
+
+    # ✅ Enrichment: derived tables in one pass each (inserts skipped the hooks)
+    rebuild_subscriber_rollups()
+    rebuild_search_index()
+
+    # ✅ Detail phase: per-record saves compute IP ints, geohash, NAS, credentials
+    queued = enqueue_bulk_details_sync()
+
+    frappe.log_error(
+        title="✅ Subscriber Bootstrap Completed",
+        message=f"Fetched={total_fetched} | Inserted={len(records)} | Skipped={skipped} | Pages={len(pages)}"
+    )
 
     return {
         "status": "success",
-        "message": "List synced ✅ + Bulk details queued ✅",
-        **result
+        "message": f"Bootstrap inserted {len(records)} subscribers ✅ + " + queued["message"],
+        "total_fetched": total_fetched,
+        "created": len(records),
+        "updated": 0,
+        "skipped": skipped,
     }
 
 
@@ -451,45 +875,167 @@ def sync_list_and_enqueue_bulk_details(limit=DEFAULT_LIMIT):
 # ============================================================
 @frappe.whitelist()
 def enqueue_bulk_details_sync():
-    frappe.enqueue(
-        method="aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.sync_subscriber_details_bulk_job",
-        queue="long",
-        timeout=7200,
+    # ✅ Stable job id: while a bulk run is queued or running, new requests join it
+    job = enqueue_once(
+        "aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.sync_subscriber_details_bulk_job",
+        job_id=job_id_for("Subscriber", "details", "bulk"),
+        queue=BULK_QUEUE,
+        timeout=BULK_DETAILS_TIMEOUT,
         is_async=True
     )
+    if job is None:
+        return {"status": "already_queued", "message": "Bulk details sync already queued / running ⏳"}
     return {"status": "queued", "message": "Bulk details sync queued ✅"}
 
 
 def sync_subscriber_details_bulk_job():
-    subscriber_names = frappe.get_all("Subscriber", pluck="name")
+    # ✅ One bulk details run at a time (job-id dedup covers the queue, the lock covers direct calls)
+    with sync_lock(BULK_DETAILS_LOCK, ttl=BULK_DETAILS_LOCK_TTL) as owner:
+        if not owner:
+            return
 
-    total = len(subscriber_names)
-    success = 0
-    failed = 0
-    batch_commit = 25
+        # ✅ Bulk lane: bounded number of concurrent bulk runs across all workers
+        with bulk_slot(ttl=BULK_DETAILS_LOCK_TTL) as got_slot:
+            if not got_slot:
+                frappe.log_error(
+                    title="Subscriber Bulk Details Sync Skipped",
+                    message="All bulk sync slots are busy; the next scheduled run will pick this up."
+                )
+                return
 
-    for i, name in enumerate(subscriber_names, start=1):
-        try:
-            sync_single_subscriber_details(name)
-            success += 1
+            run_subscriber_details_bulk_sync()
 
-            if i % batch_commit == 0:
-                frappe.db.commit()
+
+def bulk_metrics(monitor, committer, concurrency):
+    return {**monitor.summary(), "commit_size": committer.summary(), "fetch_concurrency": concurrency.value}
+
+
+def run_subscriber_details_bulk_sync(names=None):
+    """
+    names: only these Subscribers (tests / targeted re-syncs). Such a run gets
+    its own Sync Run and never resumes or moves the full job's checkpoint.
+    """
+    start_sync_run()
+
+    # ✅ Checkpointed: a killed / timed-out run continues after its last committed batch
+    run = start_or_resume(BULK_DETAILS_JOB) if names is None else start_run(SUBSET_DETAILS_JOB)
+    frappe.flags.sync_run_id = run.run_id or frappe.flags.sync_run_id
+
+    filters = []
+    if run.checkpoint:
+        filters.append(["name", ">", run.checkpoint])
+    if names is not None:
+        filters.append(["name", "in", list(names)])
+
+    subscribers = frappe.get_all(
+        "Subscriber",
+        filters=filters,
+        fields=["name", "external_id"],
+        order_by="name asc",
+    )
+
+    counts = {k: cint(run.get(k)) for k in ("processed", "success", "failed", "skipped")}
+    counts["total"] = cint(run.total) if run.checkpoint else len(subscribers)
+
+    # ✅ Rows per commit tuned from measured transaction time
+    committer = commit_size(DEFAULT_COMMIT_SIZE)
+    since_commit = 0
+    batches = 0
+    txn_started = time.monotonic()
+
+    include_credentials = not cint(frappe.conf.get(LAZY_CREDENTIALS_KEY))
+
+    # ✅ Retry queue: failures are recorded, successes clear any open retry row
+    pending_retries = pending_external_ids()
+    recovered = []
+
+    # local edits still waiting to reach the backend win over backend details
+    unpushed = pending_push_ids()
+
+    # ✅ Details come in batches (?ids= / NDJSON bulk, or concurrent singles)
+    concurrency = AdaptiveConcurrency()
+    details = {}
+
+    # ✅ RSS (+ tracemalloc when enabled) sampled per batch, stored on the Sync Run
+    monitor = MemoryMonitor().start()
+
+    for i, row in enumerate(subscribers, start=1):
+        name = row.name
+        if (i - 1) % DETAILS_FETCH_BATCH == 0:
+            window = subscribers[i - 1:i - 1 + DETAILS_FETCH_BATCH]
+            details = fetch_details(
+                [r.external_id for r in window],
+                API_URL,
+                timeout=TIMEOUT,
+                concurrency=concurrency,
+            )
+
+        # let queued single-record (form) syncs go first
+        yield_to_interactive()
+
+        if not row.external_id or row.external_id in unpushed:
+            counts["skipped"] += 1
+            counts["processed"] += 1
+            continue
+
+        try:
+            with sync_lock(details_lock(name), ttl=TIMEOUT * 5) as owner:
+                if owner:
+                    data = details.get(str(row.external_id))
+                    if isinstance(data, Exception):
+                        raise data
+                    doc = frappe.get_doc("Subscriber", name)
+                    apply_subscriber_details(doc, data, include_credentials=include_credentials)
+                    counts["success"] += 1
+                    if row.external_id in pending_retries:
+                        recovered.append(row.external_id)
+                else:
+                    # a form-triggered sync is refreshing this record right now
+                    counts["skipped"] += 1
 
         except Exception as e:
-            failed += 1
+            counts["failed"] += 1
+            record_failure(row.external_id, name, e)
             frappe.log_error(
                 title="Subscriber Bulk Details Sync Error",
                 message=f"{name}\n{str(e)}"
             )
 
+        counts["processed"] += 1
+        since_commit += 1
+
+        if since_commit >= committer.value:
+            batches += 1
+            clear_retries(recovered)
+            recovered = []
+            release_batch_memory(batches)
+            monitor.sample(counts["processed"], commit_size=since_commit)
+            save_checkpoint(run, name, metrics=bulk_metrics(monitor, committer, concurrency), **counts)
+            frappe.db.commit()
+            committer.observe(time.monotonic() - txn_started)
+            refresh_lock(BULK_DETAILS_LOCK, ttl=BULK_DETAILS_LOCK_TTL)
+            refresh_bulk_slot(ttl=BULK_DETAILS_LOCK_TTL)
+            txn_started = time.monotonic()
+            since_commit = 0
+
+    clear_retries(recovered)
+    monitor.sample(counts["processed"], commit_size=since_commit)
+    monitor.stop()
+    memory = monitor.summary()
+    finish_run(run, metrics=bulk_metrics(monitor, committer, concurrency), **counts)
     frappe.db.commit()
 
     frappe.log_error(
         title="✅ Bulk Subscriber Details Sync Completed",
-        message=f"Total={total} | Success={success} | Failed={failed}"
+        message=(
+            f"Total={counts['total']} | Success={counts['success']} | Failed={counts['failed']}"
+            f" | Skipped={counts['skipped']} | Resumed={cint(run.resumed)}x"
+            f" | Peak RSS={memory['peak_rss_mb']}MB (+{memory['rss_growth_mb']}MB)"
+        )
     )
 
+    return {"sync_run": run.name, **counts, "memory": memory}
+
 
 # ============================================================
 # ✅ DIRECT DETAILS SYNC (FORM BUTTON / DIRECT CALL)
@@ -500,9 +1046,15 @@ def fetch_subscriber_details_direct(subscriber_name):
     Direct sync (not background).
     Recommended only for button action.
     """
-    sync_single_subscriber_details(subscriber_name)
-    frappe.db.commit()
-    return {"status": "success", "message": "Details synced directly ✅"}
+    with sync_lock(details_lock(subscriber_name), ttl=TIMEOUT * 5) as owner:
+        if owner:
+            sync_single_subscriber_details(subscriber_name)
+            frappe.db.commit()
+            return {"status": "success", "message": "Details synced directly ✅"}
+
+    # another worker is syncing this subscriber: wait for it instead of fetching twice
+    wait_for_unlock(details_lock(subscriber_name), timeout=TIMEOUT)
+    return {"status": "success", "joined": True, "message": "Details synced by a running sync ✅"}
 
 
 # ============================================================
@@ -513,37 +1065,53 @@ def enqueue_fetch_subscriber_details(subscriber_name):
     """
     Background sync for form open (no refresh conflict).
     """
-    frappe.enqueue(
-        method="aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.fetch_subscriber_details_job",
-        queue="long",
-        timeout=600,
+    # ✅ Interactive lane: short queue, ahead of bulk work; one pending job per subscriber
+    job = enqueue_interactive(
+        "aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.fetch_subscriber_details_job",
+        timeout=300,
+        job_id=job_id_for("Subscriber", "details", subscriber_name),
         subscriber_name=subscriber_name
     )
+    if job is None:
+        return {"status": "already_queued", "message": "Subscriber details sync already queued ⏳"}
     return {"status": "queued", "message": "Subscriber details sync queued ✅"}
 
 
-def fetch_subscriber_details_job(subscriber_name):
-    sync_single_subscriber_details(subscriber_name)
-    frappe.db.commit()
+def fetch_subscriber_details_job(subscriber_name, lane_token=None):
+    # a user is waiting on this one
+    with interactive_job(lane_token), sync_lock(details_lock(subscriber_name), ttl=TIMEOUT * 5) as owner:
+        if not owner:
+            return
+        start_sync_run()
+        include_credentials = not cint(frappe.conf.get(LAZY_CREDENTIALS_KEY))
+        sync_single_subscriber_details(subscriber_name, include_credentials=include_credentials)
+        frappe.db.commit()
 
 
 # ============================================================
 # ✅ SINGLE SUBSCRIBER DETAIL SYNC LOGIC
 # ============================================================
-def sync_single_subscriber_details(subscriber_name):
+def sync_single_subscriber_details(subscriber_name, include_credentials=True):
+    """
+    include_credentials=False leaves passwords untouched (lazy mode);
+    the form "Sync Details" button always includes them.
+    """
     doc = frappe.get_doc("Subscriber", subscriber_name)
 
     if not doc.external_id:
         return
 
     url = f"{API_URL}/{doc.external_id}"
-    r = requests.get(url, timeout=TIMEOUT)
+    r = backend_request("get", url, timeout=TIMEOUT)
 
     if r.status_code != 200:
         raise Exception(f"API Error {r.status_code}: {r.text}")
 
-    data = r.json()
+    apply_subscriber_details(doc, response_json(r), include_credentials=include_credentials)
+
 
+def apply_subscriber_details(doc, data, include_credentials=True):
+    """Map one backend detail record onto the Subscriber doc and save it."""
     # Basic
     doc.full_name = data.get("fullname") or doc.full_name
     doc.phone = data.get("phone")
@@ -554,9 +1122,9 @@ def sync_single_subscriber_details(subscriber_name):
     doc.date_of_birth = clean_date(data.get("dob"))
     doc.status = "Active" if str(data.get("connection_status")) == "1" else "Inactive"
 
-    # passwords (if allowed)
-    doc.password = data.get("password")
-    doc.connection_password = data.get("connection_password")
+    # passwords (only when changed, and not at all in lazy mode)
+    if include_credentials:
+        apply_synced_credentials(doc, data)
 
     # NAS
     doc.nas_server = None
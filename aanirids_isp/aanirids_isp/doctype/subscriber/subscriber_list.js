@@ -15,13 +15,25 @@ frappe.listview_settings["Subscriber"] = {
                                 Total Fetched: ${r.message.total_fetched}<br>
                                 Created: ${r.message.created}<br>
                                 Updated: ${r.message.updated}<br><br>
-                                <i>Detailed sync for all subscribers has been queued in the background.</i>
+                                <i>${r.message.message}</i>
                             `
                         });
                         listview.refresh();
+                    } else if (r.message) {
+                        frappe.msgprint({
+                            title: __("Subscriber Sync"),
+                            indicator: "orange",
+                            message: r.message.message
+                        });
                     }
                 }
             });
         });
+
+        listview.page.add_inner_button(__("Export CSV (Streaming)"), () => {
+            window.open(
+                "/api/method/aanirids_isp.aanirids_isp.api.export.export_subscribers?fmt=csv"
+            );
+        });
     }
 };
@@ -1,9 +1,216 @@
 # Copyright (c) 2026, Mohammed Zeeshan and Contributors
 # See license.txt
 
-# import frappe
+import json
+from unittest.mock import patch
+from urllib.parse import urlparse
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now_datetime
+
+from aanirids_isp.aanirids_isp.doctype.subscriber.subscriber import (
+	API_URL,
+	purge_subscriber_side_tables,
+	run_subscriber_details_bulk_sync,
+)
+from aanirids_isp.aanirids_isp.utils import detail_fetch
+from aanirids_isp.aanirids_isp.utils.versioning import merge_changed
+
+BACKEND_ROOT = "http://172.24.160.1:5003"
+
+
+class StubResponse:
+	def __init__(self, status_code=200, payload=None, lines=None):
+		self.status_code = status_code
+		self._payload = payload
+		self._lines = lines or []
+		self.headers = {}
+		self.text = json.dumps(payload) if payload is not None else ""
+		self.content = self.text.encode()
+
+	def json(self):
+		return self._payload
+
+	def iter_lines(self):
+		yield from self._lines
+
+
+class StubBackend:
+	"""
+	In-process stand-in for the :5003 subscribers API.
+	mode="ndjson" / "ids" advertise the batch endpoints, mode="single" has no
+	capabilities endpoint at all (older backends).
+	"""
+
+	def __init__(self, mode, records, batch_ids=100):
+		self.mode = mode
+		self.records = {str(r["id"]): r for r in records}
+		self.batch_ids = batch_ids
+		self.calls = []
+
+	def __call__(self, method, url, **kwargs):
+		path = urlparse(url).path
+		self.calls.append((method.upper(), path))
+
+		if path == "/api/capabilities":
+			if self.mode == "single":
+				return StubResponse(404)
+			caps = {"batch_ids": self.batch_ids}
+			if self.mode == "ndjson":
+				caps["ndjson_bulk"] = "/api/subscribers/bulk"
+			return StubResponse(payload={"subscribers": caps})
+
+		if path == "/api/subscribers/bulk" and self.mode == "ndjson":
+			ids = json.loads(kwargs["data"])["ids"]
+			return StubResponse(lines=[json.dumps(self.records[i]).encode() for i in ids if i in self.records])
+
+		if path == "/api/subscribers" and (kwargs.get("params") or {}).get("ids"):
+			ids = kwargs["params"]["ids"].split(",")
+			return StubResponse(payload={"data": [self.records[i] for i in ids if i in self.records]})
+
+		external_id = path.rsplit("/", 1)[-1]
+		if external_id in self.records:
+			return StubResponse(payload=self.records[external_id])
+		return StubResponse(404, {"error": "not found"})
 
 
 class TestSubscriber(FrappeTestCase):
-	pass
+	def setUp(self):
+		cache = frappe.cache()
+		cache.delete(cache.make_key(f"aanirids:capabilities:{BACKEND_ROOT}"))
+
+	def fetch(self, backend, ids):
+		with patch("aanirids_isp.aanirids_isp.utils.backend.requests.request", side_effect=backend):
+			return detail_fetch.fetch_details(ids, API_URL)
+
+	def test_fetch_details_ids_mode_batches_requests(self):
+		backend = StubBackend("ids", [{"id": i, "fullname": f"S{i}"} for i in range(1, 251)])
+		result = self.fetch(backend, [str(i) for i in range(1, 251)])
+
+		self.assertEqual(len(result), 250)
+		self.assertEqual(result["42"]["fullname"], "S42")
+		# capabilities probe + 3 batches of <= 100
+		self.assertEqual(len(backend.calls), 4)
+
+	def test_fetch_details_ndjson_mode(self):
+		backend = StubBackend("ndjson", [{"id": i} for i in range(1, 11)])
+		result = self.fetch(backend, [str(i) for i in range(1, 12)])
+
+		self.assertEqual(result["10"], {"id": 10})
+		self.assertIsInstance(result["11"], detail_fetch.RecordNotReturned)
+		self.assertIn(("POST", "/api/subscribers/bulk"), backend.calls)
+
+	def test_fetch_details_falls_back_to_single_fetches(self):
+		backend = StubBackend("single", [{"id": i} for i in range(1, 6)])
+		result = self.fetch(backend, ["1", "2", "3", "4", "5", "6"])
+
+		self.assertEqual(result["3"], {"id": 3})
+		self.assertIsInstance(result["6"], Exception)
+		# capabilities probe + one GET per id
+		self.assertEqual(len(backend.calls), 7)
+
+
+class TestBulkDetailsSyncMemory(FrappeTestCase):
+	PREFIX = "memtest-"
+	FIRST_ID = 900000
+
+	def setUp(self):
+		cache = frappe.cache()
+		cache.delete(cache.make_key(f"aanirids:capabilities:{BACKEND_ROOT}"))
+		self._trace = frappe.conf.get("aanirids_trace_memory")
+		frappe.conf.aanirids_trace_memory = 1
+		self.created = 0
+		self.names = []
+		self.sync_runs = []
+		self.started = now_datetime()
+		self.rollups = set(frappe.get_all("Subscriber Rollup", pluck="name"))
+
+	def tearDown(self):
+		frappe.conf.aanirids_trace_memory = self._trace
+		# the sync commits per batch, so undo everything it wrote by hand
+		rows = frappe.get_all("Subscriber", filters={"name": ["in", self.names]}, fields=["*"]) if self.names else []
+		if rows:
+			# rollups, search tokens and retry rows
+			purge_subscriber_side_tables(rows)
+			frappe.db.delete("Version", {"ref_doctype": "Subscriber", "docname": ["in", self.names]})
+			frappe.db.delete("Subscriber", {"name": ["in", self.names]})
+		# rollup rows the fixtures created are back at zero now
+		for name in frappe.get_all("Subscriber Rollup", filters={"subscriber_count": 0}, pluck="name"):
+			if name not in self.rollups:
+				frappe.db.delete("Subscriber Rollup", name)
+		if self.sync_runs:
+			frappe.db.delete("Sync Run", {"name": ["in", self.sync_runs]})
+		frappe.db.delete(
+			"Error Log",
+			{"method": "✅ Bulk Subscriber Details Sync Completed", "creation": [">=", self.started]},
+		)
+		frappe.db.commit()
+
+	def add_subscribers(self, count):
+		for n in range(self.created, self.created + count):
+			doc = frappe.new_doc("Subscriber")
+			doc.update({
+				"username": f"{self.PREFIX}{n}",
+				"full_name": f"Memory Test {n}",
+				"external_id": str(self.FIRST_ID + n),
+			})
+			doc.flags.from_backend_sync = True
+			doc.insert(ignore_permissions=True)
+			self.names.append(doc.name)
+		self.created += count
+		frappe.db.commit()
+
+	def run_bulk(self):
+		records = [
+			{"id": self.FIRST_ID + n, "fullname": f"Synced {n}", "phone": f"98{n:08d}"}
+			for n in range(self.created)
+		]
+		backend = StubBackend("ids", records)
+		with patch("aanirids_isp.aanirids_isp.utils.backend.requests.request", side_effect=backend):
+			# only the fixture records, never the rest of the site's subscribers
+			result = run_subscriber_details_bulk_sync(names=self.names)
+		self.sync_runs.append(result["sync_run"])
+		return result
+
+	def test_peak_memory_stays_flat_as_subscribers_grow(self):
+		self.add_subscribers(50)
+		small = self.run_bulk()
+
+		self.add_subscribers(200)
+		large = self.run_bulk()
+
+		self.assertEqual(large["processed"], 250)
+		# 5x the subscribers must not mean (anywhere near) 5x the traced peak
+		self.assertLess(
+			large["memory"]["traced_peak_mb"],
+			small["memory"]["traced_peak_mb"] * 1.5 + 2,
+		)
+		self.assertTrue(frappe.db.get_value("Sync Run", large["sync_run"], "metrics"))
+
+
+class TestSyncVersionMerge(FrappeTestCase):
+	def test_keeps_first_old_and_last_new_value(self):
+		self.assertEqual(
+			merge_changed([["phone", "1", "2"]], [["phone", "2", "3"], ["email", None, "a@b.c"]]),
+			[["phone", "1", "3"], ["email", None, "a@b.c"]],
+		)
+
+	def test_reverted_fields_drop_out(self):
+		self.assertEqual(merge_changed([["status", "Active", "Suspended"]], [["status", "Suspended", "Active"]]), [])
+		self.assertEqual(
+			merge_changed([["status", "Active", "Suspended"], ["phone", "1", "2"]], [["status", "Suspended", "Active"]]),
+			[["phone", "1", "2"]],
+		)
+
+	def test_merge_is_associative_over_a_run(self):
+		runs = [[["plan", "A", "B"]], [["plan", "B", "C"], ["nas", "N1", "N2"]], [["nas", "N2", "N3"]]]
+		left = merge_changed(merge_changed(runs[0], runs[1]), runs[2])
+		right = merge_changed(runs[0], merge_changed(runs[1], runs[2]))
+		self.assertEqual(sorted(left), sorted(right))
+		self.assertEqual(sorted(left), [["nas", "N1", "N3"], ["plan", "A", "C"]])
+
+	def test_empty_inputs(self):
+		self.assertEqual(merge_changed(None, None), [])
+		self.assertEqual(merge_changed([], [["phone", "1", "2"]]), [["phone", "1", "2"]])
+		self.assertEqual(merge_changed([["phone", "1", "2"]], None), [["phone", "1", "2"]])
@@ -0,0 +1,156 @@
+# Copyright (c) 2026, Mohammed Zeeshan and contributors
+# For license information, please see license.txt
+
+from datetime import timedelta
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+from aanirids_isp.aanirids_isp.doctype.subscriber_sync_retry.subscriber_sync_retry import (
+    backoff_seconds,
+    max_attempts,
+)
+from aanirids_isp.aanirids_isp.utils.backend import BackendUnavailable
+from aanirids_isp.aanirids_isp.utils.locks import sync_lock
+
+
+class SubscriberBackendPush(Document):
+	pass
+
+
+# Manual updates / deletes that could not reach the backend (circuit open).
+# Written in the same transaction as the Frappe change, drained by
+# push_pending_backend_changes; attempts and backoff follow Subscriber Sync Retry.
+PUSH_BATCH = 200
+PUSH_LOCK = "Subscriber:backend_push"
+
+
+def on_doctype_update():
+    frappe.db.add_index("Subscriber Backend Push", ["status", "next_attempt_at"])
+
+
+def queue_backend_push(operation, external_id, subscriber=None, retry_in=None):
+    """
+    Upsert the pending push for external_id. A later Delete replaces a
+    pending Update; an Update never replaces a pending Delete.
+    """
+    if not external_id:
+        return
+
+    now = now_datetime()
+    frappe.db.sql(
+        """
+        INSERT INTO `tabSubscriber Backend Push`
+            (name, creation, modified, owner, modified_by,
+             external_id, subscriber, operation, status, attempts, next_attempt_at)
+        VALUES (%(name)s, %(now)s, %(now)s, %(user)s, %(user)s,
+             %(name)s, %(subscriber)s, %(operation)s, 'Pending', 0, %(next)s)
+        ON DUPLICATE KEY UPDATE
+            subscriber = IFNULL(%(subscriber)s, subscriber),
+            operation = IF(operation = 'Delete', 'Delete', %(operation)s),
+            status = 'Pending',
+            next_attempt_at = %(next)s,
+            modified = %(now)s
+        """,
+        {
+            "name": str(external_id),
+            "now": now,
+            "user": frappe.session.user,
+            "subscriber": subscriber,
+            "operation": operation,
+            "next": now + timedelta(seconds=int(retry_in or backoff_seconds(1))),
+        },
+    )
+
+
+def pending_push_ids():
+    """
+    External ids with local changes still waiting to be pushed (detail syncs
+    must not overwrite them). Dead pushes were given up on and logged, so the
+    backend's version is what the record gets refreshed to.
+    """
+    return set(frappe.get_all("Subscriber Backend Push", filters={"status": "Pending"}, pluck="name"))
+
+
+# ============================================================
+# ✅ PERIODIC PUSH JOB
+# ============================================================
+def push_pending_backend_changes():
+    """Scheduler (every 5 min): send queued updates / deletes once the backend is back."""
+    from aanirids_isp.aanirids_isp.doctype.subscriber.subscriber import (
+        deferred_backend_delete,
+        deferred_backend_update,
+    )
+
+    with sync_lock(PUSH_LOCK, ttl=30 * 60) as owner:
+        if not owner:
+            return
+
+        due = frappe.get_all(
+            "Subscriber Backend Push",
+            filters={"status": "Pending", "next_attempt_at": ["<=", now_datetime()]},
+            fields=["name", "subscriber", "operation", "attempts"],
+            order_by="next_attempt_at asc",
+            limit_page_length=PUSH_BATCH,
+        )
+
+        for row in due:
+            try:
+                if row.operation == "Delete":
+                    deferred_backend_delete(row.name)
+                else:
+                    deferred_backend_update(row.subscriber)
+                frappe.db.delete("Subscriber Backend Push", row.name)
+            except BackendUnavailable as e:
+                frappe.db.rollback()
+                _retry_later(row, e, delay=int(e.retry_in or backoff_seconds(1)), counts=False)
+                frappe.db.commit()
+                break
+            except Exception as e:
+                frappe.db.rollback()
+                _retry_later(row, e, delay=backoff_seconds(row.attempts + 1), counts=True)
+
+            frappe.db.commit()
+
+
+def _retry_later(row, error, delay, counts):
+    attempts = row.attempts + (1 if counts else 0)
+    now = now_datetime()
+    frappe.db.set_value(
+        "Subscriber Backend Push",
+        row.name,
+        {
+            "attempts": attempts,
+            "status": "Dead" if attempts >= max_attempts() else "Pending",
+            "next_attempt_at": now + timedelta(seconds=delay),
+            "last_attempt_at": now,
+            "last_error": str(error)[:1000],
+        },
+        update_modified=False,
+    )
+    if attempts >= max_attempts():
+        frappe.log_error(
+            title="❌ Backend Push Dead",
+            message=f"{row.operation} of Subscriber {row.subscriber or row.name} gave up after {attempts} attempts\n{error}",
+        )
+
+
+@frappe.whitelist()
+def requeue_dead(names=None):
+    """Move dead pushes (all, or the given names) back to Pending for an immediate retry."""
+    frappe.only_for("System Manager")
+    if isinstance(names, str):
+        names = frappe.parse_json(names)
+
+    filters = {"status": "Dead"}
+    if names:
+        filters["name"] = ["in", names]
+
+    for name in frappe.get_all("Subscriber Backend Push", filters=filters, pluck="name"):
+        frappe.db.set_value(
+            "Subscriber Backend Push",
+            name,
+            {"status": "Pending", "attempts": 0, "next_attempt_at": now_datetime()},
+        )
+    return {"status": "success"}
@@ -0,0 +1,247 @@
+# Copyright (c) 2026, Mohammed Zeeshan and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.db_query import DatabaseQuery
+from frappe.model.document import Document
+from frappe.utils import cint, now_datetime
+
+
+class SubscriberRollup(Document):
+	pass
+
+
+# Subscriber fields we keep counts for (split by status)
+ROLLUP_DIMENSIONS = ("nas_server", "package_link", "salesperson", "branch")
+
+# Derived dimensions: name -> (value from doc, SQL expression for rebuild)
+# geohash5 (~5km cells) backs the coverage heatmap
+HEATMAP_PRECISION = 5
+DERIVED_DIMENSIONS = {
+    "geohash5": (
+        lambda doc: (doc.get("geohash") or "")[:HEATMAP_PRECISION],
+        f"LEFT(IFNULL(geohash, ''), {HEATMAP_PRECISION})",
+    ),
+}
+
+
+def on_doctype_update():
+    frappe.db.add_unique(
+        "Subscriber Rollup",
+        ["dimension", "dimension_value", "status"],
+        constraint_name="unique_dimension_value_status",
+    )
+
+
+# ============================================================
+# ✅ INCREMENTAL MAINTENANCE
+# ============================================================
+def _rollup_keys(doc):
+    """(dimension, value, status) keys a subscriber currently counts towards."""
+    if not doc:
+        return set()
+    status = doc.get("status") or ""
+    keys = {(dim, doc.get(dim) or "", status) for dim in ROLLUP_DIMENSIONS}
+    for dim, (get_value, _) in DERIVED_DIMENSIONS.items():
+        keys.add((dim, get_value(doc), status))
+    return keys
+
+
+def collect_subscriber_delta(old, new, deltas=None):
+    """
+    Add the counter changes for one subscriber (old -> new) into `deltas`.
+    old=None means insert, new=None means delete.
+    """
+    deltas = {} if deltas is None else deltas
+
+    old_keys = _rollup_keys(old)
+    new_keys = _rollup_keys(new)
+
+    for key in old_keys - new_keys:
+        deltas[key] = deltas.get(key, 0) - 1
+    for key in new_keys - old_keys:
+        deltas[key] = deltas.get(key, 0) + 1
+
+    return deltas
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Apply {(dimension, value, status): delta} with one atomic upsert per key.
+    Safe under concurrent writers (counter math happens in the database).
+    Bulk sync paths collect deltas for a whole batch and call this once.
+    """
+    deltas = {k: v for k, v in (deltas or {}).items() if v}
+    if not deltas:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+
+    for (dimension, value, status), delta in deltas.items():
+        frappe.db.sql(
+            """
+            INSERT INTO `tabSubscriber Rollup`
+                (name, creation, modified, owner, modified_by,
+                 dimension, dimension_value, status, subscriber_count)
+            VALUES (%(name)s, %(now)s, %(now)s, %(user)s, %(user)s,
+                 %(dimension)s, %(value)s, %(status)s, %(initial)s)
+            ON DUPLICATE KEY UPDATE
+                subscriber_count = GREATEST(subscriber_count + %(delta)s, 0),
+                modified = %(now)s
+            """,
+            {
+                "name": frappe.generate_hash(length=10),
+                "now": now,
+                "user": user,
+                "dimension": dimension,
+                "value": value,
+                "status": status,
+                "initial": max(delta, 0),
+                "delta": delta,
+            },
+        )
+
+
+def read_rollup_counts(dimension, values, status):
+    """{value: count} for `values` (plain read, no row locks). Missing rows count as 0."""
+    values = list(values)
+    if not values:
+        return {}
+
+    rows = frappe.db.sql(
+        """
+        SELECT dimension_value, subscriber_count
+        FROM `tabSubscriber Rollup`
+        WHERE dimension = %s AND status = %s AND dimension_value IN %s
+        """,
+        (dimension, status, tuple(values)),
+        as_dict=True,
+    )
+    return {r.dimension_value: cint(r.subscriber_count) for r in rows}
+
+
+def update_subscriber_rollups(old, new):
+    """Single-record entry point used by the Subscriber hooks."""
+    apply_rollup_deltas(collect_subscriber_delta(old, new))
+
+
+def _dimension_expression(dimension):
+    """SQL expression over tabSubscriber giving a subscriber's value for `dimension`."""
+    if dimension in DERIVED_DIMENSIONS:
+        return DERIVED_DIMENSIONS[dimension][1]
+    return f"IFNULL(`{dimension}`, '')"
+
+
+# ============================================================
+# ✅ FULL REBUILD
+# ============================================================
+def rebuild_subscriber_rollups():
+    """Recompute every counter from tabSubscriber (GROUP BY per dimension)."""
+    frappe.db.delete("Subscriber Rollup")
+
+    deltas = {}
+    for dimension in (*ROLLUP_DIMENSIONS, *DERIVED_DIMENSIONS):
+        expression = _dimension_expression(dimension)
+        rows = frappe.db.sql(
+            f"""
+            SELECT {expression} AS value, IFNULL(status, '') AS status, COUNT(*) AS cnt
+            FROM `tabSubscriber`
+            GROUP BY {expression}, IFNULL(status, '')
+            """,
+            as_dict=True,
+        )
+        for r in rows:
+            deltas[(dimension, r.value, r.status)] = cint(r.cnt)
+
+    apply_rollup_deltas(deltas)
+    frappe.db.commit()
+
+    return {"status": "success", "rows": len(deltas)}
+
+
+@frappe.whitelist()
+def rebuild_subscriber_rollups_now():
+    frappe.only_for("System Manager")
+    return rebuild_subscriber_rollups()
+
+
+# ============================================================
+# ✅ READ API
+# ============================================================
+@frappe.whitelist()
+def get_subscriber_counts(dimension, dimension_value=None):
+    """
+    Counts per value of `dimension`, split by status.
+    Returns {value: {"Active": n, "Inactive": n, "total": n}}
+    """
+    dimensions = (*ROLLUP_DIMENSIONS, *DERIVED_DIMENSIONS)
+    if dimension not in dimensions:
+        frappe.throw(f"Unknown dimension {dimension}. Use one of: {', '.join(dimensions)}")
+
+    frappe.has_permission("Subscriber", "read", throw=True)
+
+    conditions = subscriber_match_conditions()
+    if conditions:
+        # site-wide counters would leak totals past User Permissions
+        rows = scoped_counts(dimension, conditions, dimension_value=dimension_value)
+    else:
+        filters = {"dimension": dimension}
+        if dimension_value is not None:
+            filters["dimension_value"] = dimension_value
+
+        rows = frappe.get_all(
+            "Subscriber Rollup",
+            filters=filters,
+            fields=["dimension_value", "status", "subscriber_count"],
+            ignore_permissions=True,
+        )
+
+    counts = {}
+    for r in rows:
+        bucket = counts.setdefault(r.dimension_value, {"total": 0})
+        bucket[r.status] = bucket.get(r.status, 0) + cint(r.subscriber_count)
+        bucket["total"] += cint(r.subscriber_count)
+
+    return counts
+
+
+def subscriber_match_conditions():
+    """
+    WHERE fragment limiting Subscriber to what the session user may read
+    (User Permissions, if_owner, permission query conditions). Empty when the
+    user sees every subscriber and the rollup counters can be used as they are.
+    """
+    return DatabaseQuery("Subscriber").build_match_conditions()
+
+
+def scoped_counts(dimension, conditions, dimension_value=None, prefixes=None, status=None):
+    """
+    Live counts over the subscribers matching `conditions`, in the shape of
+    Subscriber Rollup rows (dimension_value, status, subscriber_count).
+    prefixes: only values starting with one of them.
+    """
+    expression = _dimension_expression(dimension)
+    where = [f"({conditions})"]
+    values = {}
+
+    if dimension_value is not None:
+        where.append(f"{expression} = %(dimension_value)s")
+        values["dimension_value"] = dimension_value
+    if prefixes:
+        where.append("(" + " OR ".join(f"{expression} LIKE %(prefix_{i})s" for i in range(len(prefixes))) + ")")
+        values.update({f"prefix_{i}": f"{prefix}%" for i, prefix in enumerate(prefixes)})
+    if status:
+        where.append("status = %(status)s")
+        values["status"] = status
+
+    return frappe.db.sql(
+        f"""
+        SELECT {expression} AS dimension_value, IFNULL(status, '') AS status, COUNT(*) AS subscriber_count
+        FROM `tabSubscriber`
+        WHERE {" AND ".join(where)}
+        GROUP BY {expression}, IFNULL(status, '')
+        """,
+        values,
+        as_dict=True,
+    )
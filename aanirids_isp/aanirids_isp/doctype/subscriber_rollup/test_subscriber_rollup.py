@@ -0,0 +1,103 @@
+# Copyright (c) 2026, Mohammed Zeeshan and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import (
+	DERIVED_DIMENSIONS,
+	ROLLUP_DIMENSIONS,
+	collect_subscriber_delta,
+)
+from aanirids_isp.aanirids_isp.utils import geo
+
+SUBSCRIBER = {
+	"status": "Active",
+	"nas_server": "NAS-1",
+	"package_link": "PLAN-1",
+	"salesperson": "SP-1",
+	"branch": "Main",
+	"geohash": "tdr1y2b3c",
+}
+
+
+class TestSubscriberRollup(FrappeTestCase):
+	def test_insert_and_delete_touch_every_dimension(self):
+		inserted = collect_subscriber_delta(None, SUBSCRIBER)
+		self.assertEqual(len(inserted), len(ROLLUP_DIMENSIONS) + len(DERIVED_DIMENSIONS))
+		self.assertTrue(all(delta == 1 for delta in inserted.values()))
+		self.assertEqual(inserted[("geohash5", "tdr1y", "Active")], 1)
+
+		deleted = collect_subscriber_delta(SUBSCRIBER, None)
+		self.assertEqual(deleted, {key: -1 for key in inserted})
+
+	def test_update_moves_only_changed_dimensions(self):
+		moved = {**SUBSCRIBER, "nas_server": "NAS-2"}
+		self.assertEqual(
+			collect_subscriber_delta(SUBSCRIBER, moved),
+			{("nas_server", "NAS-1", "Active"): -1, ("nas_server", "NAS-2", "Active"): 1},
+		)
+		self.assertEqual(collect_subscriber_delta(SUBSCRIBER, dict(SUBSCRIBER)), {})
+
+	def test_status_change_moves_every_key(self):
+		deltas = collect_subscriber_delta(SUBSCRIBER, {**SUBSCRIBER, "status": "Suspended"})
+		self.assertEqual(sum(deltas.values()), 0)
+		self.assertEqual(len(deltas), 2 * (len(ROLLUP_DIMENSIONS) + len(DERIVED_DIMENSIONS)))
+
+	def test_deltas_accumulate(self):
+		deltas = collect_subscriber_delta(None, SUBSCRIBER)
+		collect_subscriber_delta(None, SUBSCRIBER, deltas)
+		collect_subscriber_delta(SUBSCRIBER, None, deltas)
+		self.assertTrue(all(delta == 1 for delta in deltas.values()))
+
+
+class TestGeohash(FrappeTestCase):
+	def test_encode_known_value(self):
+		self.assertEqual(geo.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+		self.assertEqual(geo.encode(57.64911, 10.40744, 5), "u4pru")
+
+	def test_decode_returns_the_cell_centre(self):
+		latitude, longitude = 12.9716, 77.5946
+		for precision in (5, 7, 9):
+			cell = geo.encode(latitude, longitude, precision)
+			lat_step, lon_step = geo.cell_size(precision)
+			centre_lat, centre_lon = geo.decode(cell)
+			self.assertLessEqual(abs(centre_lat - latitude), lat_step / 2)
+			self.assertLessEqual(abs(centre_lon - longitude), lon_step / 2)
+			self.assertEqual(geo.encode(centre_lat, centre_lon, precision), cell)
+
+	def test_haversine(self):
+		self.assertAlmostEqual(geo.haversine_km(12.97, 77.59, 12.97, 77.59), 0)
+		# Paris -> London
+		self.assertAlmostEqual(geo.haversine_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5, delta=1)
+		# one degree of latitude
+		self.assertAlmostEqual(geo.haversine_km(0, 0, 1, 0), 111.2, delta=0.2)
+
+	def test_radius_bbox_encloses_the_circle(self):
+		latitude, longitude, radius = 12.9716, 77.5946, 5
+		min_lat, min_lon, max_lat, max_lon = geo.radius_to_bbox(latitude, longitude, radius)
+		self.assertAlmostEqual(geo.haversine_km(latitude, longitude, max_lat, longitude), radius, delta=0.01)
+		self.assertAlmostEqual(geo.haversine_km(latitude, longitude, latitude, max_lon), radius, delta=0.01)
+		self.assertLess(min_lat, latitude)
+		self.assertLess(min_lon, longitude)
+
+	def test_cover_bbox_covers_every_point(self):
+		bbox = (12.90, 77.50, 13.05, 77.70)
+		cells = geo.cover_bbox(*bbox)
+		self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+
+		steps = 20
+		for i in range(steps + 1):
+			for j in range(steps + 1):
+				lat = bbox[0] + (bbox[2] - bbox[0]) * i / steps
+				lon = bbox[1] + (bbox[3] - bbox[1]) * j / steps
+				point = geo.encode(lat, lon)
+				self.assertTrue(any(point.startswith(cell) for cell in cells), (lat, lon))
+
+	def test_cover_bbox_too_large(self):
+		self.assertEqual(geo.cover_bbox(-80, -170, 80, 170, max_cells=1), [""])
+
+	def test_has_coordinates(self):
+		self.assertTrue(geo.has_coordinates(12.97, 77.59))
+		self.assertTrue(geo.has_coordinates("12.97", "77.59"))
+		for latitude, longitude in ((0, 0), (None, None), ("abc", 1), (91, 0), (0, 181)):
+			self.assertFalse(geo.has_coordinates(latitude, longitude), (latitude, longitude))
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Mohammed Zeeshan and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Subscriber Search Token", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,142 @@
+# Copyright (c) 2026, Mohammed Zeeshan and contributors
+# For license information, please see license.txt
+
+import re
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+
+class SubscriberSearchToken(Document):
+	pass
+
+
+# Subscriber fields that feed the search index
+SEARCH_FIELDS = (
+    "username",
+    "full_name",
+    "phone",
+    "email",
+    "external_id",
+    "cpe_ip_address",
+    "ip_address",
+)
+
+# fields that also get trigrams for partial (infix) matching
+NGRAM_FIELDS = ("username", "full_name", "phone")
+NGRAM_SIZE = 3
+TOKEN_LENGTH = 140
+
+
+def on_doctype_update():
+    frappe.db.add_index("Subscriber Search Token", ["kind", "token"])
+
+
+# ============================================================
+# ✅ NORMALIZATION
+# ============================================================
+def digits_only(value):
+    return re.sub(r"\D", "", str(value or ""))
+
+
+def normalize_text(value):
+    return " ".join(str(value or "").lower().split())
+
+
+def normalize_field(field, value):
+    """Normalized value tokens for one field (a phone yields full + local number)."""
+    if value in (None, ""):
+        return []
+
+    if field == "phone":
+        digits = digits_only(value)
+        if not digits:
+            return []
+        tokens = [digits]
+        # "+91 98450 12345" should also match a search for "9845012345"
+        if len(digits) > 10:
+            tokens.append(digits[-10:])
+        return tokens
+
+    if field in ("cpe_ip_address", "ip_address", "external_id"):
+        return [str(value).strip()]
+
+    return [normalize_text(value)]
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    text = text.replace(" ", "")
+    if len(text) < size:
+        return set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def build_tokens(doc):
+    """[(field, kind, token)] for one subscriber."""
+    tokens = set()
+    for field in SEARCH_FIELDS:
+        for value in normalize_field(field, doc.get(field)):
+            tokens.add((field, "value", value[:TOKEN_LENGTH]))
+            if field in NGRAM_FIELDS:
+                for gram in ngrams(value):
+                    tokens.add((field, "ngram", gram))
+    return sorted(tokens)
+
+
+# ============================================================
+# ✅ INDEX MAINTENANCE
+# ============================================================
+def _search_fields_changed(old, new):
+    if not old:
+        return True
+    return any(old.get(f) != new.get(f) for f in SEARCH_FIELDS)
+
+
+def delete_search_tokens(subscriber_names):
+    if subscriber_names:
+        frappe.db.delete("Subscriber Search Token", {"subscriber": ["in", list(subscriber_names)]})
+
+
+def index_subscribers(docs):
+    """Replace the tokens of several subscribers with two bulk statements."""
+    docs = [d for d in docs if d and d.get("name")]
+    if not docs:
+        return
+
+    delete_search_tokens([d.get("name") for d in docs])
+
+    now = now_datetime()
+    user = frappe.session.user
+    values = [
+        (frappe.generate_hash(length=12), now, now, user, user, d.get("name"), field, kind, token)
+        for d in docs
+        for field, kind, token in build_tokens(d)
+    ]
+    frappe.db.bulk_insert(
+        "Subscriber Search Token",
+        ["name", "creation", "modified", "owner", "modified_by", "subscriber", "field", "kind", "token"],
+        values,
+        ignore_duplicates=True,
+    )
+
+
+def update_search_index(old, new):
+    """Hook entry point: re-tokenize only when a searchable field changed."""
+    if new is None:
+        delete_search_tokens([old.name])
+        return
+
+    if _search_fields_changed(old, new):
+        index_subscribers([new])
+
+
+def rebuild_search_index(batch_size=2000):
+    frappe.db.delete("Subscriber Search Token")
+
+    rows = frappe.get_all("Subscriber", fields=["name", *SEARCH_FIELDS])
+    for i in range(0, len(rows), batch_size):
+        index_subscribers(rows[i:i + batch_size])
+        frappe.db.commit()
+
+    return {"status": "success", "indexed": len(rows)}
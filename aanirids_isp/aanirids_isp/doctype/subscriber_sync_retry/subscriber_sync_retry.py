@@ -0,0 +1,192 @@
+# Copyright (c) 2026, Mohammed Zeeshan and contributors
+# For license information, please see license.txt
+
+import random
+from datetime import timedelta
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, now_datetime
+
+from aanirids_isp.aanirids_isp.utils.backend import BackendUnavailable
+from aanirids_isp.aanirids_isp.utils.locks import sync_lock
+from aanirids_isp.aanirids_isp.utils.versioning import start_sync_run
+
+
+class SubscriberSyncRetry(Document):
+	pass
+
+
+# site_config overrides
+#   aanirids_retry_max_attempts  attempts before a record goes to "Dead" (8)
+#   aanirids_retry_base_delay    seconds before the first retry, doubled per attempt (60)
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BASE_DELAY = 60
+MAX_DELAY = 6 * 60 * 60
+RETRY_BATCH = 200
+RETRY_LOCK = "Subscriber:details:retry"
+
+
+def on_doctype_update():
+    frappe.db.add_index("Subscriber Sync Retry", ["status", "next_attempt_at"])
+
+
+def max_attempts():
+    return cint(frappe.conf.get("aanirids_retry_max_attempts")) or DEFAULT_MAX_ATTEMPTS
+
+
+def backoff_seconds(attempts):
+    """Exponential backoff with +-20% jitter, capped at MAX_DELAY."""
+    base = cint(frappe.conf.get("aanirids_retry_base_delay")) or DEFAULT_BASE_DELAY
+    delay = min(base * 2 ** max(attempts - 1, 0), MAX_DELAY)
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+# ============================================================
+# ✅ RECORD / CLEAR
+# ============================================================
+def record_failure(external_id, subscriber=None, error=None, counts=True):
+    """
+    Upsert the retry row for external_id. A failure while the backend circuit
+    is open (or with counts=False, e.g. deferred behind another sync) does not
+    count as an attempt; it only pushes the next attempt out.
+    """
+    if not external_id:
+        return
+
+    external_id = str(external_id)
+    now = now_datetime()
+
+    if isinstance(error, BackendUnavailable):
+        delay = int(error.retry_in or backoff_seconds(1))
+        increment = 0
+    elif not counts:
+        delay = backoff_seconds(1)
+        increment = 0
+    else:
+        attempts = cint(frappe.db.get_value("Subscriber Sync Retry", external_id, "attempts")) + 1
+        delay = backoff_seconds(attempts)
+        increment = 1
+
+    dead_after = max_attempts()
+    frappe.db.sql(
+        """
+        INSERT INTO `tabSubscriber Sync Retry`
+            (name, creation, modified, owner, modified_by,
+             external_id, subscriber, status, attempts,
+             next_attempt_at, last_attempt_at, last_error)
+        VALUES (%(name)s, %(now)s, %(now)s, %(user)s, %(user)s,
+             %(name)s, %(subscriber)s, 'Pending', %(increment)s,
+             %(next)s, %(now)s, %(error)s)
+        ON DUPLICATE KEY UPDATE
+            subscriber = IFNULL(%(subscriber)s, subscriber),
+            attempts = attempts + %(increment)s,
+            status = IF(attempts >= %(dead_after)s, 'Dead', 'Pending'),
+            next_attempt_at = %(next)s,
+            last_attempt_at = %(now)s,
+            last_error = %(error)s,
+            modified = %(now)s
+        """,
+        {
+            "name": external_id,
+            "now": now,
+            "user": frappe.session.user,
+            "subscriber": subscriber,
+            "increment": increment,
+            "next": now + timedelta(seconds=delay),
+            "error": str(error or "")[:1000],
+            "dead_after": dead_after,
+        },
+    )
+
+
+def clear_retries(external_ids):
+    external_ids = [str(e) for e in external_ids or [] if e]
+    if external_ids:
+        frappe.db.delete("Subscriber Sync Retry", {"name": ["in", external_ids]})
+
+
+def pending_external_ids():
+    """External ids with a retry row, Pending or Dead: any later success clears it."""
+    return set(frappe.get_all("Subscriber Sync Retry", pluck="name"))
+
+
+# ============================================================
+# ✅ PERIODIC RETRY JOB
+# ============================================================
+def retry_failed_syncs():
+    """
+    Scheduler (every 5 min): re-fetch only the subscribers whose detail sync
+    failed and whose backoff has elapsed. Stops early while the backend is down.
+    """
+    from aanirids_isp.aanirids_isp.doctype.subscriber.subscriber import (
+        LAZY_CREDENTIALS_KEY,
+        details_lock,
+        sync_single_subscriber_details,
+    )
+
+    with sync_lock(RETRY_LOCK, ttl=30 * 60) as owner:
+        if not owner:
+            return
+
+        due = frappe.get_all(
+            "Subscriber Sync Retry",
+            filters={"status": "Pending", "next_attempt_at": ["<=", now_datetime()]},
+            fields=["name", "subscriber"],
+            order_by="next_attempt_at asc",
+            limit_page_length=RETRY_BATCH,
+        )
+        if not due:
+            return
+
+        start_sync_run()
+        frappe.flags.backend_lane = "bulk"
+        # same credential handling as the bulk details sync
+        include_credentials = not cint(frappe.conf.get(LAZY_CREDENTIALS_KEY))
+
+        recovered = []
+        for row in due:
+            subscriber = row.subscriber or frappe.db.get_value("Subscriber", {"external_id": row.name}, "name")
+            if not subscriber or not frappe.db.exists("Subscriber", subscriber):
+                # record is gone locally, nothing left to retry
+                recovered.append(row.name)
+                continue
+
+            with sync_lock(details_lock(subscriber), ttl=300) as got_lock:
+                if not got_lock:
+                    continue
+                try:
+                    sync_single_subscriber_details(subscriber, include_credentials=include_credentials)
+                    recovered.append(row.name)
+                except BackendUnavailable as e:
+                    frappe.db.rollback()
+                    record_failure(row.name, subscriber, e)
+                    break
+                except Exception as e:
+                    frappe.db.rollback()
+                    record_failure(row.name, subscriber, e)
+
+            frappe.db.commit()
+
+        clear_retries(recovered)
+        frappe.db.commit()
+
+
+@frappe.whitelist()
+def requeue_dead(names=None):
+    """Move dead-lettered rows (all, or the given names) back to Pending for an immediate retry."""
+    frappe.only_for("System Manager")
+    if isinstance(names, str):
+        names = frappe.parse_json(names)
+
+    filters = {"status": "Dead"}
+    if names:
+        filters["name"] = ["in", names]
+
+    for name in frappe.get_all("Subscriber Sync Retry", filters=filters, pluck="name"):
+        frappe.db.set_value(
+            "Subscriber Sync Retry",
+            name,
+            {"status": "Pending", "attempts": 0, "next_attempt_at": now_datetime()},
+        )
+    return {"status": "success"}
@@ -0,0 +1,83 @@
+# Copyright (c) 2026, Mohammed Zeeshan and contributors
+# For license information, please see license.txt
+
+import json
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_to_date, cint, flt, get_datetime, now_datetime
+
+
+class SyncRun(Document):
+	pass
+
+
+COUNTERS = ("total", "processed", "success", "failed", "skipped")
+
+# a checkpoint older than this is not resumed (data has moved on; start fresh)
+DEFAULT_MAX_RESUME_AGE_HOURS = 24
+
+
+# ============================================================
+# ✅ CHECKPOINTS FOR LONG-RUNNING SYNC JOBS
+# ============================================================
+def start_or_resume(job):
+    """
+    Return the Sync Run for `job`: the last one still marked Running (its
+    worker died, timed out or was restarted) or a new one.
+    Callers hold the job's singleton lock, so a Running row here is never live.
+    """
+    max_age = cint(frappe.conf.get("aanirids_max_resume_age_hours")) or DEFAULT_MAX_RESUME_AGE_HOURS
+    cutoff = add_to_date(now_datetime(), hours=-max_age)
+
+    for name in frappe.get_all(
+        "Sync Run",
+        filters={"job": job, "status": "Running"},
+        order_by="started_at desc",
+        pluck="name",
+    ):
+        run = frappe.get_doc("Sync Run", name)
+        if get_datetime(run.last_checkpoint_at or run.started_at) >= cutoff:
+            run.db_set("resumed", cint(run.resumed) + 1)
+            return run
+        run.db_set({"status": "Abandoned", "finished_at": now_datetime()})
+
+    return _new_run(job)
+
+
+def start_run(job):
+    """Fresh Sync Run for jobs that don't resume; leftovers of dead runs are closed."""
+    for name in frappe.get_all("Sync Run", filters={"job": job, "status": "Running"}, pluck="name"):
+        frappe.db.set_value("Sync Run", name, {"status": "Abandoned", "finished_at": now_datetime()})
+    return _new_run(job)
+
+
+def _new_run(job):
+    run = frappe.get_doc({
+        "doctype": "Sync Run",
+        "job": job,
+        "status": "Running",
+        "run_id": frappe.flags.sync_run_id,
+        "started_at": now_datetime(),
+    })
+    run.insert(ignore_permissions=True)
+    frappe.db.commit()
+    return run
+
+
+def save_checkpoint(run, checkpoint=None, metrics=None, **counters):
+    """Persist progress (and the run's metrics dict); call right before the batch commit."""
+    values = {k: cint(v) for k, v in counters.items() if k in COUNTERS}
+    if checkpoint is not None:
+        values["checkpoint"] = checkpoint
+    if metrics is not None:
+        values["metrics"] = json.dumps(metrics, default=str)
+        values["peak_rss_mb"] = flt(metrics.get("peak_rss_mb"))
+        values["rss_growth_mb"] = flt(metrics.get("rss_growth_mb"))
+    values["last_checkpoint_at"] = now_datetime()
+    run.db_set(values, update_modified=False)
+
+
+def finish_run(run, metrics=None, **counters):
+    save_checkpoint(run, metrics=metrics, **counters)
+    run.db_set({"status": "Completed", "finished_at": now_datetime()}, update_modified=False)
@@ -0,0 +1,93 @@
+# Copyright (c) 2026, Mohammed Zeeshan and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from aanirids_isp.aanirids_isp.utils import rate_limit
+from aanirids_isp.aanirids_isp.utils.tuning import AdaptiveSize
+
+# lanes / size names with no site_config overrides
+TEST_LANE = "unittest"
+TEST_SIZE = "unittest_size"
+
+
+class TestAdaptiveSize(FrappeTestCase):
+	def size(self, initial=100, max_bytes=None):
+		return AdaptiveSize(TEST_SIZE, initial, minimum=10, maximum=200, target_seconds=2, max_bytes=max_bytes)
+
+	def test_initial_value_is_clamped(self):
+		self.assertEqual(self.size(initial=1).value, 10)
+		self.assertEqual(self.size(initial=1000).value, 200)
+
+	def test_over_target_halves(self):
+		size = self.size()
+		self.assertEqual(size.observe(3), 50)
+		self.assertEqual(size.observe(3), 25)
+		for _ in range(5):
+			size.observe(3)
+		self.assertEqual(size.value, 10)
+
+	def test_fast_batches_grow_additively(self):
+		size = self.size()
+		self.assertEqual(size.observe(0.5), 125)
+		self.assertEqual(size.observe(0.5), 156)
+		for _ in range(10):
+			size.observe(0.5)
+		self.assertEqual(size.value, 200)
+
+	def test_near_target_holds(self):
+		size = self.size()
+		self.assertEqual(size.observe(1.5), 100)
+
+	def test_oversized_response_halves(self):
+		size = self.size(max_bytes=1000)
+		self.assertEqual(size.observe(0.1, size_bytes=5000), 50)
+		self.assertEqual(size.observe(0.1, size_bytes=500), 62)
+
+	def test_summary(self):
+		size = self.size()
+		size.observe(3)
+		size.observe(0.5)
+		summary = size.summary()
+		self.assertEqual(summary["current"], 62)
+		self.assertEqual((summary["min_used"], summary["max_used"]), (50, 62))
+		self.assertEqual(summary["bounds"], [10, 200])
+
+
+class TestBackendThrottling(FrappeTestCase):
+	def setUp(self):
+		cache = frappe.cache()
+		cache.delete(cache.make_key(f"aanirids:ratelimit:{TEST_LANE}"))
+		cache.delete(cache.make_key(f"aanirids:throttled:{TEST_LANE}"))
+		frappe.conf[f"aanirids_rate_{TEST_LANE}"] = 1
+		frappe.conf[f"aanirids_burst_{TEST_LANE}"] = 3
+
+	def tearDown(self):
+		frappe.conf.pop(f"aanirids_rate_{TEST_LANE}", None)
+		frappe.conf.pop(f"aanirids_burst_{TEST_LANE}", None)
+
+	def test_token_bucket_allows_the_burst_then_waits(self):
+		for _ in range(3):
+			self.assertEqual(rate_limit._try_acquire(TEST_LANE), 0)
+
+		# bucket empty at 1 token/s: about a second until the next one
+		wait = rate_limit._try_acquire(TEST_LANE)
+		self.assertGreater(wait, 0.5)
+		self.assertLessEqual(wait, 1)
+
+	def test_aimd_concurrency(self):
+		concurrency = rate_limit.AdaptiveConcurrency(initial=4, minimum=1, maximum=6, lane=TEST_LANE)
+		self.assertEqual(concurrency.adjust(), 5)
+		self.assertEqual(concurrency.adjust(), 6)
+		self.assertEqual(concurrency.adjust(), 6)
+
+		rate_limit.record_throttle(TEST_LANE)
+		self.assertEqual(concurrency.adjust(), 3)
+		# throttles are counted once
+		self.assertEqual(concurrency.adjust(), 4)
+
+		for _ in range(3):
+			rate_limit.record_throttle(TEST_LANE)
+			concurrency.adjust()
+		self.assertEqual(concurrency.value, 1)
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Mohammed Zeeshan and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Sync Schedule", {
+// 	refresh(frm) {
+
+// 	},
+// });
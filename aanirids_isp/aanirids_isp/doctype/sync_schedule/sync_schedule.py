@@ -0,0 +1,173 @@
+# Copyright (c) 2026, Mohammed Zeeshan and contributors
+# For license information, please see license.txt
+
+from datetime import timedelta
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, flt, get_datetime, now_datetime
+
+from aanirids_isp.aanirids_isp.utils.change_events import push_active
+from aanirids_isp.aanirids_isp.utils.lanes import BULK_QUEUE
+from aanirids_isp.aanirids_isp.utils.locks import enqueue_once, job_id_for
+
+
+class SyncSchedule(Document):
+	def validate(self):
+		if cint(self.min_interval) < 1:
+			frappe.throw("Min Interval must be at least 1 minute")
+		if cint(self.max_interval) < cint(self.min_interval):
+			frappe.throw("Max Interval can't be lower than Min Interval")
+
+
+# site_config overrides
+#   aanirids_schedule_target_changes  changes one run should pick up (50)
+#   aanirids_schedule_alpha           weight of the latest run in the change rate (0.3)
+DEFAULT_TARGET_CHANGES = 50
+DEFAULT_ALPHA = 0.3
+INITIAL_INTERVAL = 60
+SYNC_TIMEOUT = 7200
+
+# entity (DocType) -> sync method, min / max interval in minutes
+DEFAULT_SCHEDULES = {
+    "Subscriber": ("aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.sync_list_and_enqueue_bulk_details", 10, 360),
+    "Plan": ("aanirids_isp.aanirids_isp.doctype.plan.plan.sync_plans", 60, 1440),
+    "ISP": ("aanirids_isp.aanirids_isp.doctype.isp.isp.sync_isps", 120, 1440),
+    "NAS": ("aanirids_isp.aanirids_isp.doctype.nas.nas.sync_nas", 60, 1440),
+    "NAS Group": ("aanirids_isp.aanirids_isp.doctype.nas_group.nas_group.sync_nas_groups", 120, 1440),
+    "IP Pool": ("aanirids_isp.aanirids_isp.doctype.ip_pool.ip_pool.sync_ip_pools", 120, 1440),
+    "IP Address": ("aanirids_isp.aanirids_isp.doctype.ip_address.ip_address.sync_ip_addresses_bulk", 30, 720),
+    "Salesperson": ("aanirids_isp.aanirids_isp.doctype.salesperson.salesperson.sync_salespersons", 120, 1440),
+}
+
+
+def ensure_schedules():
+    """Create the default rows once; after that min / max / enabled are edited from the desk."""
+    existing = set(frappe.get_all("Sync Schedule", pluck="name"))
+    for entity, (method, min_interval, max_interval) in DEFAULT_SCHEDULES.items():
+        if entity in existing:
+            continue
+        frappe.get_doc({
+            "doctype": "Sync Schedule",
+            "entity": entity,
+            "method": method,
+            "min_interval": min_interval,
+            "max_interval": max_interval,
+            "interval": min(max(INITIAL_INTERVAL, min_interval), max_interval),
+        }).insert(ignore_permissions=True)
+
+
+# ============================================================
+# ✅ CHANGE MEASUREMENT
+# Each sync returns "changes": rows it created, actually modified
+# (has_changes) or deleted. A result without it is not measured.
+# ============================================================
+def next_interval(schedule, changes, elapsed_hours):
+    """
+    Fold this run into the change-rate EWMA and pick the interval that should
+    collect about target_changes per run. Shrinks at once, grows at most 2x per
+    run, always within [min_interval, max_interval].
+    Returns (interval minutes, change rate per hour).
+    """
+    alpha = flt(frappe.conf.get("aanirids_schedule_alpha")) or DEFAULT_ALPHA
+    target = cint(frappe.conf.get("aanirids_schedule_target_changes")) or DEFAULT_TARGET_CHANGES
+
+    observed = changes / max(elapsed_hours, 1 / 60)
+    rate = alpha * observed + (1 - alpha) * flt(schedule.change_rate) if schedule.last_run_at else observed
+
+    current = cint(schedule.interval) or INITIAL_INTERVAL
+    ideal = target / rate * 60 if rate > 0 else cint(schedule.max_interval)
+    interval = min(ideal, current * 2)
+    interval = int(min(max(interval, cint(schedule.min_interval)), cint(schedule.max_interval)))
+    return interval, rate
+
+
+# ============================================================
+# ✅ SCHEDULER
+# ============================================================
+def run_due_syncs():
+    """Scheduler (every 5 min): queue every enabled entity whose next run is due."""
+    ensure_schedules()
+    now = now_datetime()
+
+    for row in frappe.get_all(
+        "Sync Schedule", filters={"enabled": 1}, fields=["name", "next_run_at"], order_by="next_run_at asc"
+    ):
+        if row.next_run_at and get_datetime(row.next_run_at) > now:
+            continue
+        enqueue_scheduled_sync(row.name)
+
+
+def enqueue_scheduled_sync(entity):
+    return enqueue_once(
+        "aanirids_isp.aanirids_isp.doctype.sync_schedule.sync_schedule.run_scheduled_sync",
+        job_id=job_id_for("Sync Schedule", entity),
+        queue=BULK_QUEUE,
+        timeout=SYNC_TIMEOUT,
+        entity=entity,
+    )
+
+
+def run_scheduled_sync(entity):
+    schedule = frappe.get_doc("Sync Schedule", entity)
+    started = now_datetime()
+    frappe.flags.backend_lane = "bulk"
+
+    try:
+        result = frappe.get_attr(schedule.method)()
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(title=f"{entity} Scheduled Sync Failed", message=frappe.get_traceback())
+        _reschedule(schedule, started, status="Failed", error=str(e))
+        return
+
+    result = result if isinstance(result, dict) else {}
+    # joined another run, or an empty table handed off to the bootstrap: nothing measured
+    if result.get("joined") or "changes" not in result:
+        _reschedule(schedule, started, status="Skipped")
+        return
+
+    changes = cint(result["changes"])
+    elapsed = (started - get_datetime(schedule.last_run_at)).total_seconds() / 3600 if schedule.last_run_at else (
+        cint(schedule.interval) or INITIAL_INTERVAL
+    ) / 60
+    interval, rate = next_interval(schedule, changes, elapsed)
+    if push_active(entity):
+        # webhooks deliver the changes; polling is only the reconciliation fallback
+        interval = cint(schedule.max_interval)
+
+    _reschedule(
+        schedule,
+        started,
+        status="Success",
+        interval=interval,
+        change_rate=rate,
+        last_changes=changes,
+        last_run_at=started,
+    )
+
+
+def _reschedule(schedule, started, status, error=None, **values):
+    interval = values.get("interval") or cint(schedule.interval) or INITIAL_INTERVAL
+    schedule.db_set({
+        **values,
+        "interval": interval,
+        "last_status": status,
+        "last_error": error,
+        "next_run_at": started + timedelta(minutes=interval),
+    })
+    frappe.db.commit()
+
+
+@frappe.whitelist()
+def run_now(entity):
+    """Queue the entity's sync immediately; its interval keeps adapting from the result."""
+    frappe.only_for("System Manager")
+    if not frappe.db.exists("Sync Schedule", entity):
+        frappe.throw(f"No Sync Schedule for {entity}")
+
+    job = enqueue_scheduled_sync(entity)
+    return {
+        "status": "queued" if job else "already_queued",
+        "message": f"{entity} sync queued ✅" if job else f"{entity} sync already queued/running ⏳",
+    }
@@ -0,0 +1,167 @@
+"""
+Shared HTTP client for the Aanirids backend (:5003).
+
+Every call goes through a per-endpoint circuit breaker whose state lives in
+Redis, so all gunicorn / rq workers see the same state. While a breaker is
+open, calls fail immediately with BackendUnavailable instead of waiting for
+the request timeout. Calls also draw from the cluster-wide token bucket of
+their lane (see utils/rate_limit.py). Bodies are encoded / negotiated
+through utils/codec.py (fast JSON, gzip / br responses).
+
+site_config overrides:
+    aanirids_breaker_failures   consecutive failures before opening (5)
+    aanirids_breaker_cooldown   seconds to stay open before a probe (30)
+    aanirids_breaker_slow_call  seconds after which a call counts as failed (10)
+"""
+
+import time
+from urllib.parse import urlparse
+
+import frappe
+import requests
+from frappe.utils import cint, flt
+
+from aanirids_isp.aanirids_isp.utils import codec, rate_limit
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN = 30
+DEFAULT_SLOW_CALL = 10
+FAILURE_WINDOW = 120
+MAX_429_RETRIES = 3
+
+
+class BackendUnavailable(Exception):
+    """Raised without calling the backend while its circuit breaker is open."""
+
+    def __init__(self, endpoint, retry_in=None):
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+        wait = f" Retrying in ~{int(retry_in)}s." if retry_in else ""
+        super().__init__(f"Backend '{endpoint}' is unavailable (circuit open).{wait}")
+
+
+def endpoint_for(url):
+    """http://host/api/subscribers/12 -> "subscribers" """
+    parts = [p for p in urlparse(url).path.split("/") if p]
+    if parts and parts[0] == "api":
+        parts = parts[1:]
+    return parts[0] if parts else "root"
+
+
+# ============================================================
+# ✅ CIRCUIT BREAKER (state shared through Redis)
+# ============================================================
+class CircuitBreaker:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.cache = frappe.cache()
+        self.failure_threshold = cint(frappe.conf.get("aanirids_breaker_failures")) or DEFAULT_FAILURE_THRESHOLD
+        self.cooldown = cint(frappe.conf.get("aanirids_breaker_cooldown")) or DEFAULT_COOLDOWN
+        self.slow_call = flt(frappe.conf.get("aanirids_breaker_slow_call")) or DEFAULT_SLOW_CALL
+
+    def _key(self, name):
+        return self.cache.make_key(f"aanirids:breaker:{self.endpoint}:{name}")
+
+    def state(self):
+        open_until = flt(self.cache.get(self._key("open_until")))
+        if not open_until:
+            return "closed"
+        if time.time() < open_until:
+            return "open"
+        return "half_open"
+
+    def before_call(self):
+        """Raise BackendUnavailable unless this call may go through."""
+        open_until = flt(self.cache.get(self._key("open_until")))
+        if not open_until:
+            return
+
+        now = time.time()
+        if now < open_until:
+            raise BackendUnavailable(self.endpoint, open_until - now)
+
+        # half-open: exactly one worker gets to probe
+        if not self.cache.set(self._key("probe"), 1, nx=True, ex=self.cooldown):
+            raise BackendUnavailable(self.endpoint, self.cooldown)
+
+    def record_success(self):
+        self.cache.delete(self._key("failures"), self._key("open_until"), self._key("probe"))
+
+    def record_failure(self):
+        failures = self.cache.incr(self._key("failures"))
+        self.cache.expire(self._key("failures"), FAILURE_WINDOW)
+
+        probing = self.cache.get(self._key("probe"))
+        if failures >= self.failure_threshold or probing:
+            self.trip()
+
+    def trip(self):
+        self.cache.set(self._key("open_until"), time.time() + self.cooldown, ex=self.cooldown * 10)
+        self.cache.delete(self._key("probe"))
+        # concurrent callers (e.g. fetch threads) trip together: log once per cooldown
+        if not self.cache.set(self._key("logged"), 1, nx=True, ex=self.cooldown):
+            return
+        frappe.log_error(
+            title=f"⚠️ Backend circuit opened: {self.endpoint}",
+            message=f"Failing fast for {self.cooldown}s after repeated failures / slow calls",
+        )
+
+
+@frappe.whitelist()
+def get_breaker_states(endpoints=None):
+    """{endpoint: state} for monitoring."""
+    frappe.only_for("System Manager")
+    if isinstance(endpoints, str):
+        endpoints = frappe.parse_json(endpoints)
+    endpoints = endpoints or ("subscribers", "radcheck", "radusergroup", "subscriber-services")
+    return {ep: CircuitBreaker(ep).state() for ep in endpoints}
+
+
+# ============================================================
+# ✅ REQUEST WRAPPER
+# ============================================================
+def backend_request(method, url, endpoint=None, lane=None, **kwargs):
+    """
+    requests.request(...) guarded by the endpoint's circuit breaker and
+    rate limited on its lane ("interactive" / "bulk", see rate_limit.current_lane).
+    Connection errors, timeouts, 5xx responses and calls slower than the
+    slow-call threshold count as failures. 4xx responses do not.
+    A backend 429 counts as throttling; bulk calls wait Retry-After and retry.
+    json= bodies are encoded with the fast codec; read responses with
+    codec.response_json(r).
+    """
+    breaker = CircuitBreaker(endpoint or endpoint_for(url))
+    lane = lane or rate_limit.current_lane()
+
+    headers = {"Accept-Encoding": codec.ACCEPT_ENCODING, **(kwargs.pop("headers", None) or {})}
+    if "json" in kwargs:
+        kwargs["data"] = codec.dumps(kwargs.pop("json"))
+        headers.setdefault("Content-Type", "application/json")
+    kwargs["headers"] = headers
+
+    for attempt in range(MAX_429_RETRIES + 1):
+        breaker.before_call()
+        rate_limit.acquire(lane)
+
+        started = time.monotonic()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+
+        elapsed = time.monotonic() - started
+        if response.status_code >= 500 or elapsed > breaker.slow_call:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        if response.status_code != 429:
+            return response
+
+        rate_limit.record_throttle(lane)
+        if lane != "bulk" or attempt == MAX_429_RETRIES:
+            return response
+        time.sleep(min(flt(response.headers.get("Retry-After")) or 2 ** attempt, 30))
+
+    return response
@@ -0,0 +1,316 @@
+"""
+Change events pushed by the backend (see api/webhook.py).
+
+Events are queued in one Redis hash keyed by "<entity>:<external_id>", so
+repeated changes to a record within the coalescing window collapse into
+the latest one (by event "ts", then arrival). A single flush job waits out
+the window, drains the hash atomically and applies the batch through the
+same mapping code the polling syncs use.
+
+Event: {"entity": "subscriber" | "nas" | "plan" | "ip_address",
+        "action": "upsert" | "delete", "id": <backend id>,
+        "ts": <epoch seconds, optional>, "data": {<API object>, optional}}
+
+Subscriber upserts are re-fetched in batches (fetch_details); failures, and
+records another sync holds the details lock for, go to the Subscriber Sync
+Retry queue. NAS / plan / IP address upserts must carry "data" (same shape
+as the list API); for events without it the entity's scheduled sync is
+queued right away (push_active has backed its polling off to max_interval).
+
+site_config:
+    aanirids_webhook_window   coalescing window in seconds (5)
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint, flt
+
+from aanirids_isp.aanirids_isp.utils.codec import dumps, loads
+from aanirids_isp.aanirids_isp.utils.lanes import BULK_QUEUE, bulk_slot, refresh_bulk_slot, yield_to_interactive
+from aanirids_isp.aanirids_isp.utils.locks import enqueue_once, job_id_for, sync_lock
+from aanirids_isp.aanirids_isp.utils.orphans import remove_records
+from aanirids_isp.aanirids_isp.utils.versioning import start_sync_run
+
+DEFAULT_WINDOW = 5
+APPLY_BATCH = 100
+FLUSH_LOCK = "webhook:flush"
+FLUSH_TIMEOUT = 30 * 60
+# while events keep arriving, polling for the entity backs off to its max interval
+PUSH_ACTIVE_TTL = 60 * 60
+
+ENTITIES = {
+    "subscriber": {"doctype": "Subscriber", "upsert": None},
+    "nas": {"doctype": "NAS", "upsert": "aanirids_isp.aanirids_isp.doctype.nas.nas.upsert_nas"},
+    "plan": {"doctype": "Plan", "upsert": "aanirids_isp.aanirids_isp.doctype.plan.plan.upsert_plan"},
+    "ip_address": {
+        "doctype": "IP Address",
+        "upsert": "aanirids_isp.aanirids_isp.doctype.ip_address.ip_address.upsert_ip_address",
+    },
+}
+ACTIONS = ("upsert", "delete")
+
+# keep the newer event per field; equal ts -> the later arrival wins
+PUSH_LUA = """
+local stored = 0
+for i = 1, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if not current or tonumber(cjson.decode(current)['ts']) <= tonumber(ARGV[i + 2]) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        stored = stored + 1
+    end
+end
+return stored
+"""
+
+DRAIN_LUA = """
+local items = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return items
+"""
+
+
+def _key(name):
+    return frappe.cache().make_key(f"aanirids:webhook:{name}")
+
+
+def window_seconds():
+    return flt(frappe.conf.get("aanirids_webhook_window")) or DEFAULT_WINDOW
+
+
+def push_active(doctype):
+    """True if the backend pushed events for this doctype within the last hour."""
+    return bool(frappe.cache().get(_key(f"active:{doctype}")))
+
+
+# ============================================================
+# ✅ QUEUE
+# ============================================================
+def normalize_event(event):
+    """Validated event dict, or None."""
+    if not isinstance(event, dict):
+        return None
+
+    entity = str(event.get("entity") or "").lower().replace(" ", "_").replace("-", "_")
+    action = str(event.get("action") or "upsert").lower()
+    external_id = event.get("id") or (event.get("data") or {}).get("id")
+    if entity not in ENTITIES or action not in ACTIONS or external_id in (None, ""):
+        return None
+
+    return {
+        "entity": entity,
+        "action": action,
+        "id": str(external_id),
+        "ts": flt(event.get("ts")) or time.time(),
+        "data": event.get("data") if isinstance(event.get("data"), dict) else None,
+    }
+
+
+def queue_events(events):
+    """Coalesce events into the pending hash and make sure a flush is queued -> (accepted, rejected)."""
+    valid = [e for e in map(normalize_event, events or []) if e]
+    rejected = len(events or []) - len(valid)
+    if not valid:
+        return 0, rejected
+
+    cache = frappe.cache()
+    args = []
+    for event in valid:
+        args.extend([f"{event['entity']}:{event['id']}", dumps(event), event["ts"]])
+    cache.eval(PUSH_LUA, 1, _key("pending"), *args)
+
+    for doctype in {ENTITIES[e["entity"]]["doctype"] for e in valid}:
+        cache.set(_key(f"active:{doctype}"), 1, ex=PUSH_ACTIVE_TTL)
+
+    # window starts with the first event since the last drain
+    cache.set(_key("first"), time.time(), nx=True, ex=PUSH_ACTIVE_TTL)
+    enqueue_flush()
+    return len(valid), rejected
+
+
+def enqueue_flush():
+    return enqueue_once(
+        "aanirids_isp.aanirids_isp.utils.change_events.flush_events",
+        job_id=job_id_for("webhook", "flush"),
+        queue=BULK_QUEUE,
+        timeout=FLUSH_TIMEOUT,
+    )
+
+
+def _drain():
+    items = frappe.cache().eval(DRAIN_LUA, 1, _key("pending")) or []
+    return [loads(value) for value in items[1::2]]
+
+
+# ============================================================
+# ✅ FLUSH JOB
+# ============================================================
+def flush_events():
+    """
+    Background job (queued on every push; also every 5 min as a safety net for
+    events that arrived while a flush was finishing). Runs in the bulk lane:
+    while every bulk slot is busy the events stay in the pending hash and the
+    next flush picks them up.
+    """
+    with sync_lock(FLUSH_LOCK, ttl=FLUSH_TIMEOUT) as owner:
+        if not owner:
+            return
+
+        with bulk_slot(ttl=FLUSH_TIMEOUT) as got_slot:
+            if not got_slot:
+                return
+
+            frappe.set_user("Administrator")
+            start_sync_run()
+
+            cache = frappe.cache()
+            totals = {"applied": 0, "deleted": 0, "failed": 0, "skipped": 0}
+            while True:
+                first = flt(cache.get(_key("first")))
+                if first:
+                    time.sleep(max(0, first + window_seconds() - time.time()))
+                cache.delete(_key("first"))
+
+                events = _drain()
+                if not events:
+                    break
+                for key, value in apply_events(events).items():
+                    totals[key] += value
+                refresh_bulk_slot(ttl=FLUSH_TIMEOUT)
+
+            return totals
+
+
+def apply_events(events):
+    totals = {"applied": 0, "deleted": 0, "failed": 0, "skipped": 0}
+    by_entity = {}
+    for event in events:
+        by_entity.setdefault(event["entity"], []).append(event)
+
+    for entity, entity_events in by_entity.items():
+        doctype = ENTITIES[entity]["doctype"]
+
+        deletes = [e["id"] for e in entity_events if e["action"] == "delete"]
+        if deletes:
+            totals["deleted"] += _apply_deletes(doctype, deletes)
+
+        upserts = [e for e in entity_events if e["action"] == "upsert"]
+        if entity != "subscriber" and any(not e["data"] for e in upserts):
+            _request_catch_up(doctype)
+        for i in range(0, len(upserts), APPLY_BATCH):
+            # single-record syncs a user is waiting on go first
+            yield_to_interactive()
+            batch = upserts[i:i + APPLY_BATCH]
+            if entity == "subscriber":
+                result = _apply_subscriber_upserts([e["id"] for e in batch])
+            else:
+                result = _apply_upserts(entity, batch)
+            for key, value in result.items():
+                totals[key] += value
+            frappe.db.commit()
+
+    return totals
+
+
+def _apply_deletes(doctype, external_ids):
+    names = frappe.get_all(doctype, filters={"external_id": ["in", external_ids]}, pluck="name")
+    if not names:
+        return 0
+
+    on_delete = None
+    if doctype == "Subscriber":
+        from aanirids_isp.aanirids_isp.doctype.subscriber.subscriber import purge_subscriber_side_tables
+
+        on_delete = purge_subscriber_side_tables
+
+    deleted, _ = remove_records(doctype, names, on_delete=on_delete)
+    frappe.db.commit()
+    return len(deleted)
+
+
+def _apply_upserts(entity, events):
+    upsert = frappe.get_attr(ENTITIES[entity]["upsert"])
+    result = {"applied": 0, "failed": 0, "skipped": 0}
+
+    for event in events:
+        if not event["data"]:
+            result["skipped"] += 1
+            continue
+        try:
+            upsert({**event["data"], "id": event["data"].get("id") or event["id"]})
+            result["applied"] += 1
+        except Exception as e:
+            result["failed"] += 1
+            frappe.log_error(title=f"{ENTITIES[entity]['doctype']} Webhook Apply Failed", message=f"{event['id']}\n{str(e)}")
+
+    return result
+
+
+def _request_catch_up(doctype):
+    """Events without data can't be applied here: let the entity's own sync fetch them now."""
+    from aanirids_isp.aanirids_isp.doctype.sync_schedule.sync_schedule import enqueue_scheduled_sync
+
+    if frappe.db.exists("Sync Schedule", doctype):
+        enqueue_scheduled_sync(doctype)
+
+
+def _apply_subscriber_upserts(external_ids):
+    from aanirids_isp.aanirids_isp.doctype.subscriber.subscriber import (
+        API_URL,
+        LAZY_CREDENTIALS_KEY,
+        TIMEOUT,
+        apply_subscriber_details,
+        details_lock,
+        upsert_subscriber_from_list,
+    )
+    from aanirids_isp.aanirids_isp.doctype.subscriber_sync_retry.subscriber_sync_retry import (
+        clear_retries,
+        record_failure,
+    )
+    from aanirids_isp.aanirids_isp.utils.detail_fetch import fetch_details
+
+    include_credentials = not cint(frappe.conf.get(LAZY_CREDENTIALS_KEY))
+    result = {"applied": 0, "failed": 0, "skipped": 0}
+    details = fetch_details(external_ids, API_URL, timeout=TIMEOUT)
+    recovered = []
+
+    for external_id in external_ids:
+        data = details.get(external_id)
+        name = frappe.db.get_value("Subscriber", {"external_id": external_id}, "name")
+        try:
+            if isinstance(data, Exception):
+                raise data
+            if not data:
+                raise Exception(f"No details returned for {external_id}")
+
+            if not name:
+                # new upstream: nothing else can be syncing it yet
+                upsert_subscriber_from_list(data)
+                name = frappe.db.get_value("Subscriber", {"external_id": external_id}, "name")
+                if not name:
+                    # mapping dropped it (e.g. missing username); nothing to retry
+                    result["skipped"] += 1
+                    continue
+                doc = frappe.get_doc("Subscriber", name)
+                apply_subscriber_details(doc, data, include_credentials=include_credentials)
+            else:
+                with sync_lock(details_lock(name), ttl=TIMEOUT * 5) as owner:
+                    if not owner:
+                        # a form / bulk sync is refreshing this record right now; that
+                        # fetch may predate the event, so re-apply once it's done
+                        record_failure(external_id, name, "Details sync in progress", counts=False)
+                        result["skipped"] += 1
+                        continue
+                    upsert_subscriber_from_list(data)
+                    doc = frappe.get_doc("Subscriber", name)
+                    apply_subscriber_details(doc, data, include_credentials=include_credentials)
+
+            result["applied"] += 1
+            recovered.append(external_id)
+
+        except Exception as e:
+            result["failed"] += 1
+            record_failure(external_id, name, e)
+
+    clear_retries(recovered)
+    return result
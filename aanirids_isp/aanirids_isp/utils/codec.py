@@ -0,0 +1,86 @@
+"""
+JSON codec and transport encoding for backend traffic.
+
+Uses orjson when it is installed (Frappe v15 ships it) and the stdlib json
+module otherwise. Anything orjson refuses (ints beyond 64 bits, NaN,
+unknown types) falls back to stdlib json, so callers never see the
+difference.
+
+Responses are requested with gzip (and br when brotli is installed);
+requests / urllib3 decompress them transparently, including streamed
+ndjson bodies.
+"""
+
+import json
+import time
+
+from frappe.utils.response import json_handler
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import brotli  # urllib3 decodes br when this is importable
+
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi
+
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+ACCEPT_ENCODING = "br, gzip, deflate" if HAS_BROTLI else "gzip, deflate"
+BACKEND = "orjson" if orjson else "json"
+
+if orjson:
+    # datetimes go through json_handler so they serialize exactly like frappe.as_json
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def loads(data):
+    """bytes / str -> object."""
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(obj):
+    """object -> UTF-8 bytes (compact)."""
+    if orjson:
+        try:
+            return orjson.dumps(obj, default=json_handler, option=ORJSON_OPTIONS)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=json_handler, separators=(",", ":")).encode()
+
+
+def response_json(response):
+    """Drop-in for response.json() on backend responses."""
+    return loads(response.content)
+
+
+def benchmark_decode(body, rounds=20):
+    """Seconds per decode of one response body, stdlib json vs the active codec."""
+
+    def timed(fn):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            fn(body)
+        return (time.perf_counter() - started) / rounds
+
+    stdlib = timed(json.loads)
+    fast = timed(loads)
+    return {
+        "codec": BACKEND,
+        "bytes": len(body),
+        "stdlib_seconds": round(stdlib, 5),
+        "codec_seconds": round(fast, 5),
+        "speedup": round(stdlib / fast, 2) if fast else None,
+    }
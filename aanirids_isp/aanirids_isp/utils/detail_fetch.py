@@ -0,0 +1,181 @@
+"""
+Batched detail fetch for backend records (subscribers).
+
+The backend advertises what it supports at GET /api/capabilities:
+
+    {"subscribers": {"batch_ids": 100, "ndjson_bulk": "/api/subscribers/bulk"}}
+
+    ndjson   POST <ndjson_bulk> {"ids": [...]}  -> one JSON record per line
+    ids      GET  /api/subscribers?ids=1,2,3    -> {"data": [...]} or [...]
+    single   GET  /api/subscribers/<id>, run concurrently (fallback)
+
+Capabilities are cached in Redis for an hour. site_config
+"aanirids_detail_fetch_mode" forces a mode.
+"""
+
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import frappe
+from frappe.utils import cint
+
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import loads, response_json
+from aanirids_isp.aanirids_isp.utils.rate_limit import AdaptiveConcurrency
+
+DEFAULT_BATCH_SIZE = 100
+CAPABILITIES_TTL = 60 * 60
+MODES = ("ndjson", "ids", "single")
+
+
+class RecordNotReturned(Exception):
+    """The backend answered the batch but left this id out."""
+
+
+def _backend_root(url):
+    parts = urlparse(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_capabilities(base_url, timeout=10):
+    """Capabilities document of the backend serving base_url ({} if it has none)."""
+    root = _backend_root(base_url)
+    cache = frappe.cache()
+    key = cache.make_key(f"aanirids:capabilities:{root}")
+
+    cached = cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    caps = {}
+    try:
+        r = backend_request("get", f"{root}/api/capabilities", endpoint="capabilities", timeout=timeout)
+        if r.status_code == 200:
+            caps = response_json(r) or {}
+    except Exception:
+        # older backends: no capabilities endpoint, fall back to single fetches
+        caps = {}
+
+    cache.set(key, json.dumps(caps), ex=CAPABILITIES_TTL)
+    return caps
+
+
+def fetch_mode(base_url, resource="subscribers"):
+    """(mode, batch_size, bulk_url) for the resource behind base_url."""
+    forced = frappe.conf.get("aanirids_detail_fetch_mode")
+    caps = get_capabilities(base_url).get(resource) or {}
+    batch_size = cint(caps.get("batch_ids")) or DEFAULT_BATCH_SIZE
+    bulk_url = caps.get("ndjson_bulk")
+    if bulk_url and bulk_url.startswith("/"):
+        bulk_url = _backend_root(base_url) + bulk_url
+
+    if forced == "ndjson" and not bulk_url:
+        forced = "ids"
+    if forced in MODES:
+        return forced, batch_size, bulk_url
+    if bulk_url:
+        return "ndjson", batch_size, bulk_url
+    if caps.get("batch_ids"):
+        return "ids", batch_size, None
+    return "single", batch_size, None
+
+
+# ============================================================
+# ✅ FETCH MODES
+# ============================================================
+def _fetch_ndjson(bulk_url, ids, timeout):
+    r = backend_request(
+        "post",
+        bulk_url,
+        json={"ids": ids},
+        headers={"Accept": "application/x-ndjson"},
+        timeout=timeout,
+        stream=True,
+    )
+    if r.status_code != 200:
+        raise Exception(f"Bulk API Error {r.status_code}: {r.text}")
+
+    records = []
+    for line in r.iter_lines():
+        if line:
+            records.append(loads(line))
+    return records
+
+
+def _fetch_ids(base_url, ids, timeout):
+    r = backend_request("get", base_url, params={"ids": ",".join(ids)}, timeout=timeout)
+    if r.status_code != 200:
+        raise Exception(f"API Error {r.status_code}: {r.text}")
+
+    payload = response_json(r)
+    return payload.get("data", []) if isinstance(payload, dict) else payload
+
+
+def _fetch_single(base_url, external_id, timeout):
+    r = backend_request("get", f"{base_url}/{external_id}", timeout=timeout)
+    if r.status_code != 200:
+        raise Exception(f"API Error {r.status_code}: {r.text}")
+    return response_json(r)
+
+
+def map_concurrent(fn, items, workers):
+    """
+    {item: fn(item) | Exception} using a thread pool. Each thread runs in a
+    copy of the caller's context (frappe.local); fn must stick to HTTP / Redis
+    work (backend_request) - the database connection is not thread safe.
+    """
+    def run(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    items = list(items)
+    workers = max(1, min(workers, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, run, item) for item in items]
+        return dict(zip(items, (f.result() for f in futures), strict=True))
+
+
+def _fetch_concurrent(base_url, ids, timeout, concurrency):
+    """Fallback: single GETs, concurrency adjusted (AIMD) after every batch."""
+    results = map_concurrent(lambda i: _fetch_single(base_url, i, timeout), ids, concurrency.value)
+    concurrency.adjust()
+    return results
+
+
+def fetch_details(external_ids, base_url, timeout=60, concurrency=None):
+    """
+    {external_id: record | Exception} for every requested id, in as few
+    backend calls as the backend allows. Per-record problems come back as
+    exceptions in the map so one bad id doesn't fail the batch.
+    """
+    ids = [str(i) for i in external_ids if i]
+    if not ids:
+        return {}
+
+    mode, batch_size, bulk_url = fetch_mode(base_url)
+    if mode == "single":
+        return _fetch_concurrent(base_url, ids, timeout, concurrency or AdaptiveConcurrency())
+
+    results = {}
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        try:
+            if mode == "ndjson":
+                records = _fetch_ndjson(bulk_url, chunk, timeout)
+            else:
+                records = _fetch_ids(base_url, chunk, timeout)
+        except Exception as e:
+            results.update(dict.fromkeys(chunk, e))
+            continue
+
+        by_id = {str(rec.get("id")): rec for rec in records if rec.get("id") is not None}
+        for external_id in chunk:
+            results[external_id] = by_id.get(external_id) or RecordNotReturned(
+                f"Backend did not return subscriber {external_id}"
+            )
+
+    return results
@@ -0,0 +1,124 @@
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+
+GEOHASH_PRECISION = 9   # ~5m cells, stored on Subscriber
+MAX_COVER_CELLS = 32
+
+
+def has_coordinates(latitude, longitude):
+    """0/0 is what the sync writes when the backend has no location."""
+    try:
+        latitude = float(latitude or 0)
+        longitude = float(longitude or 0)
+    except (TypeError, ValueError):
+        return False
+    if not latitude and not longitude:
+        return False
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(BASE32[ch])
+            bit = 0
+            ch = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(lat_degrees, lon_degrees) of one geohash cell."""
+    bits = precision * 5
+    lon_bits = math.ceil(bits / 2)
+    lat_bits = bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_to_bbox(latitude, longitude, radius_km):
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return (
+        max(latitude - dlat, -90.0),
+        max(longitude - dlon, -180.0),
+        min(latitude + dlat, 90.0),
+        min(longitude + dlon, 180.0),
+    )
+
+
+def cover_bbox(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS, max_precision=GEOHASH_PRECISION):
+    """
+    Geohash prefixes covering a bounding box.
+    Uses the finest precision that needs at most `max_cells` prefixes, so each
+    prefix maps to one index range scan on Subscriber.geohash.
+    """
+    for precision in range(max_precision, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        rows = math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1
+        cols = math.floor(max_lon / lon_step) - math.floor(min_lon / lon_step) + 1
+        if rows * cols > max_cells:
+            continue
+
+        cells = set()
+        for r in range(rows):
+            lat = min(min_lat + r * lat_step, max_lat)
+            for c in range(cols):
+                lon = min(min_lon + c * lon_step, max_lon)
+                cells.add(encode(lat, lon, precision))
+        # corners can fall outside the stepped grid when bbox edges are unaligned
+        for lat in (min_lat, max_lat):
+            for lon in (min_lon, max_lon):
+                cells.add(encode(lat, lon, precision))
+        return sorted(cells)
+
+    return [""]
+
+
+def decode(geohash):
+    """Centre (latitude, longitude) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
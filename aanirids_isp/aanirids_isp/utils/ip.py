@@ -0,0 +1,39 @@
+import ipaddress
+
+
+def ip_to_int(value):
+    """
+    Convert an IPv4 address string to its integer form.
+    Returns None for empty / invalid / non-IPv4 values so it is safe
+    to call on free-text Data fields.
+    """
+    if not value:
+        return None
+    try:
+        ip = ipaddress.ip_address(str(value).strip())
+    except ValueError:
+        return None
+
+    if ip.version != 4:
+        return None
+
+    return int(ip)
+
+
+def int_to_ip(value):
+    if value is None:
+        return None
+    return str(ipaddress.IPv4Address(int(value)))
+
+
+def cidr_to_range(cidr):
+    """
+    "10.0.1.0/24" -> (start_int, end_int), both inclusive.
+    A bare address is treated as a /32.
+    """
+    network = ipaddress.ip_network(str(cidr).strip(), strict=False)
+
+    if network.version != 4:
+        raise ValueError("Only IPv4 ranges are supported")
+
+    return int(network.network_address), int(network.broadcast_address)
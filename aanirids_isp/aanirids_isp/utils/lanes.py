@@ -0,0 +1,123 @@
+"""
+Job lanes for subscriber syncs.
+
+    interactive  one record a user is waiting on -> "short" queue, front of line
+    bulk         scheduled / full sweeps         -> "long" queue, bounded slots
+
+Bulk jobs call yield_to_interactive() between records so pending interactive
+syncs get the backend budget (and row locks) first.
+"""
+
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint
+
+from aanirids_isp.aanirids_isp.utils.locks import refresh_lock, sync_lock
+
+INTERACTIVE_QUEUE = "short"
+BULK_QUEUE = "long"
+
+DEFAULT_BULK_SLOTS = 1
+# slot keys expire unless the holder refreshes them (refresh_bulk_slot, per batch)
+SLOT_TTL = 15 * 60
+MAX_YIELD_SECONDS = 10
+# an interactive job that never reports back stops counting after its timeout + this
+PENDING_GRACE = 10 * 60
+
+
+def _key(name):
+    return frappe.cache().make_key(f"aanirids:lanes:{name}")
+
+
+# ============================================================
+# ✅ INTERACTIVE LANE
+# Pending jobs are members of a sorted set scored by their expiry, so a job
+# that is dropped or whose worker dies stops holding bulk jobs back on its own.
+# ============================================================
+def enqueue_interactive(method, timeout=300, job_id=None, **kwargs):
+    """
+    Enqueue a single-record job ahead of everything else on the short queue.
+    With job_id, a job already queued/running under that id is not added
+    again (returns None). The job must accept lane_token and pass it to
+    interactive_job().
+    """
+    cache = frappe.cache()
+    token = job_id or frappe.generate_hash(length=16)
+    cache.zadd(_key("interactive_pending"), {token: time.time() + timeout + PENDING_GRACE})
+
+    job = frappe.enqueue(
+        method=method,
+        queue=INTERACTIVE_QUEUE,
+        timeout=timeout,
+        at_front=True,
+        job_id=job_id,
+        deduplicate=bool(job_id),
+        lane_token=token,
+        **kwargs,
+    )
+    if job is None and not job_id:
+        cache.zrem(_key("interactive_pending"), token)
+    return job
+
+
+@contextmanager
+def interactive_job(lane_token=None):
+    """Wrap the body of an interactive job so bulk jobs know when it is done."""
+    frappe.flags.backend_lane = "interactive"
+    try:
+        yield
+    finally:
+        if lane_token:
+            frappe.cache().zrem(_key("interactive_pending"), lane_token)
+
+
+def interactive_pending():
+    cache = frappe.cache()
+    key = _key("interactive_pending")
+    cache.zremrangebyscore(key, "-inf", time.time())
+    return cint(cache.zcard(key))
+
+
+def yield_to_interactive(max_wait=MAX_YIELD_SECONDS):
+    """Pause a bulk job (bounded) while interactive syncs are queued or running."""
+    deadline = time.monotonic() + max_wait
+    while interactive_pending() and time.monotonic() < deadline:
+        time.sleep(0.25)
+
+
+# ============================================================
+# ✅ BULK LANE
+# One token-owned lock per slot: a worker killed inside bulk_slot() frees
+# its slot when the key expires.
+# ============================================================
+def bulk_slots():
+    return cint(frappe.conf.get("aanirids_bulk_slots")) or DEFAULT_BULK_SLOTS
+
+
+@contextmanager
+def bulk_slot(ttl=SLOT_TTL):
+    """
+    Yields True if this job got one of the bulk slots, False if the lane is
+    full (caller should just return). Long holders call refresh_bulk_slot().
+    """
+    for i in range(bulk_slots()):
+        with sync_lock(f"lanes:bulk_slot:{i}", ttl=ttl) as owner:
+            if not owner:
+                continue
+            frappe.flags.backend_lane = "bulk"
+            frappe.flags.bulk_slot = f"lanes:bulk_slot:{i}"
+            try:
+                yield True
+            finally:
+                frappe.flags.bulk_slot = None
+            return
+
+    yield False
+
+
+def refresh_bulk_slot(ttl=SLOT_TTL):
+    """Heartbeat for the slot held by this job (no-op outside bulk_slot())."""
+    if frappe.flags.bulk_slot:
+        refresh_lock(frappe.flags.bulk_slot, ttl=ttl)
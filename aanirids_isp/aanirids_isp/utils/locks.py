@@ -0,0 +1,136 @@
+"""
+Singleton sync runs across all web / worker processes.
+
+    sync_lock(key)       Redis lock, at most one holder per (entity, scope)
+    singleton_sync(key)  decorator for sync entry points: a second caller gets
+                         joined=True (a job waits for the running sync and gets
+                         its result; a web request returns at once)
+    enqueue_once(...)    frappe.enqueue with a stable job_id; a duplicate
+                         request while the job is queued/running is dropped
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+
+import frappe
+
+DEFAULT_TTL = 60 * 60
+DEFAULT_JOIN_TIMEOUT = 120
+RESULT_TTL = 10 * 60
+
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _key(name):
+    return frappe.cache().make_key(f"aanirids:lock:{name}")
+
+
+def _result_key(name):
+    return frappe.cache().make_key(f"aanirids:lock_result:{name}")
+
+
+def job_id_for(*parts):
+    """job_id_for("Subscriber", "details", "SUB-0001") -> "aanirids:Subscriber:details:SUB-0001" """
+    return ":".join(["aanirids", *(str(p) for p in parts)])
+
+
+# ============================================================
+# ✅ LOCK
+# ============================================================
+def is_locked(name):
+    return bool(frappe.cache().get(_key(name)))
+
+
+@contextmanager
+def sync_lock(name, ttl=DEFAULT_TTL):
+    """
+    Yields True if this process now owns the lock, False if someone else does.
+    The TTL only matters if the holder dies; release checks the token so an
+    expired-and-retaken lock is never deleted by its old owner.
+    """
+    cache = frappe.cache()
+    key = _key(name)
+    token = frappe.generate_hash(length=16)
+
+    if not cache.set(key, token, nx=True, ex=ttl):
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        cache.eval(RELEASE_LUA, 1, key, token)
+
+
+def refresh_lock(name, ttl=DEFAULT_TTL):
+    """Heartbeat for long-running holders (caller must own the lock)."""
+    frappe.cache().expire(_key(name), ttl)
+
+
+def wait_for_unlock(name, timeout=DEFAULT_JOIN_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while is_locked(name) and time.monotonic() < deadline:
+        time.sleep(0.5)
+    return not is_locked(name)
+
+
+def singleton_sync(name, ttl=DEFAULT_TTL, join_timeout=DEFAULT_JOIN_TIMEOUT):
+    """
+    Only one run of the decorated sync at a time. Callers arriving while it
+    runs wait for it (up to join_timeout) and return its result instead of
+    starting another pass over the same records. Inside a web request the
+    caller returns immediately instead, so no gunicorn worker sits blocked.
+    Put it below @frappe.whitelist().
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with sync_lock(name, ttl=ttl) as owner:
+                if owner:
+                    result = fn(*args, **kwargs)
+                    if isinstance(result, dict):
+                        frappe.cache().set(_result_key(name), frappe.as_json(result), ex=RESULT_TTL)
+                    return result
+
+            if getattr(frappe.local, "request", None):
+                return {
+                    "status": "running",
+                    "joined": True,
+                    "message": f"{name} sync is already running in another process ⏳",
+                }
+
+            finished = wait_for_unlock(name, timeout=join_timeout)
+            last = frappe.cache().get(_result_key(name))
+            result = frappe.parse_json(last) if finished and last else {}
+            return {
+                **result,
+                "status": result.get("status", "success") if finished else "running",
+                "joined": True,
+                "message": (
+                    f"{name} sync was already running; returned its result ✅"
+                    if finished
+                    else f"{name} sync is still running in another process ⏳"
+                ),
+            }
+
+        return wrapper
+
+    return decorator
+
+
+# ============================================================
+# ✅ JOB DEDUPLICATION
+# ============================================================
+def enqueue_once(method, job_id, **kwargs):
+    """
+    frappe.enqueue(..., job_id=job_id, deduplicate=True).
+    Returns the job, or None if the same job_id is already queued or running.
+    """
+    return frappe.enqueue(method, job_id=job_id, deduplicate=True, **kwargs)
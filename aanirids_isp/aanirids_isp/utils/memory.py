@@ -0,0 +1,118 @@
+"""
+Memory instrumentation and per-batch cache release for long sync jobs.
+
+MemoryMonitor samples RSS (and tracemalloc, when enabled) after every batch.
+release_batch_memory() drops the request-local caches that would otherwise
+grow with every document a worker touches during a multi-hour run.
+
+site_config "aanirids_trace_memory": 1 turns on tracemalloc for sync jobs
+(slower; use it while chasing a leak).
+"""
+
+import gc
+import os
+import resource
+import time
+import tracemalloc
+
+import frappe
+from frappe.utils import cint, flt
+
+MAX_SAMPLES = 200
+GC_EVERY_BATCHES = 20
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, else peak RSS from getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def release_batch_memory(batch=0):
+    """
+    Clear request-local caches between batches. Everything here is rebuilt on
+    demand; nothing a later batch depends on is dropped.
+    """
+    local = frappe.local
+    for attr in ("document_cache", "sync_versions"):
+        if isinstance(getattr(local, attr, None), dict):
+            getattr(local, attr).clear()
+
+    # frappe.local.cache backs @request_cache / frappe.local_cache
+    if isinstance(getattr(local, "cache", None), dict):
+        local.cache.clear()
+
+    if getattr(frappe, "db", None) and isinstance(getattr(frappe.db, "value_cache", None), dict):
+        frappe.db.value_cache.clear()
+
+    # msgprints from hooks pile up in a job that never returns a response;
+    # a web request still has to deliver them
+    if not getattr(local, "request", None) and isinstance(getattr(local, "message_log", None), list):
+        del local.message_log[:]
+
+    if batch and batch % GC_EVERY_BATCHES == 0:
+        gc.collect()
+
+
+class MemoryMonitor:
+    """
+    monitor = MemoryMonitor(); monitor.start()
+    ... per batch: monitor.sample(processed) ...
+    monitor.stop(); monitor.summary()
+    """
+
+    def __init__(self, trace=None):
+        self.trace = cint(frappe.conf.get("aanirids_trace_memory")) if trace is None else trace
+        self.samples = []
+        self.start_rss = 0
+        self.peak_rss = 0
+        self.trace_peak = 0
+        self._started_tracing = False
+        self._t0 = 0
+
+    def start(self):
+        self._t0 = time.monotonic()
+        self.start_rss = self.peak_rss = rss_mb()
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        return self
+
+    def sample(self, processed, **extra):
+        rss = rss_mb()
+        self.peak_rss = max(self.peak_rss, rss)
+        row = {"processed": processed, "rss_mb": round(rss, 1), "t": round(time.monotonic() - self._t0, 1)}
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            self.trace_peak = max(self.trace_peak, peak)
+            row["traced_mb"] = round(current / (1024 * 1024), 2)
+
+        row.update(extra)
+        self.samples.append(row)
+        # keep the first sample (baseline) and a bounded tail
+        if len(self.samples) > MAX_SAMPLES:
+            del self.samples[1]
+        return row
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def summary(self):
+        end_rss = self.samples[-1]["rss_mb"] if self.samples else self.start_rss
+        return {
+            "rss_start_mb": round(self.start_rss, 1),
+            "rss_end_mb": round(flt(end_rss), 1),
+            "peak_rss_mb": round(self.peak_rss, 1),
+            "rss_growth_mb": round(flt(end_rss) - self.start_rss, 1),
+            "traced_peak_mb": round(self.trace_peak / (1024 * 1024), 2),
+            "samples": self.samples,
+        }
@@ -0,0 +1,201 @@
+"""
+Remove local records whose external id no longer exists in the backend.
+
+A sync collects the external ids it saw during a complete run and calls
+purge_orphans(). Orphans are archived as "Deleted Document" rows (restorable
+from the desk) and removed with bulk deletes. Controller hooks do not run, so
+on_trash never tries to delete them from the backend again.
+
+Safety: if a run would remove more than aanirids_orphan_max_ratio (default
+0.1) of the table, and more than ORPHAN_MIN_BLOCK rows, nothing is deleted.
+A truncated or empty backend response then can't wipe the table.
+
+Doctypes other records link to (Plan, NAS, Salesperson, ...) go through
+frappe.delete_doc so link checks apply; a still-linked record is kept (and
+set Inactive / disabled where the doctype has such a field). Syncs whose
+"seen" set is not a snapshot (offset pagination) pass confirm=True: an id
+is only removed once it was missing in two consecutive runs.
+"""
+
+import json
+
+import frappe
+from frappe.utils import cint, flt, now_datetime
+
+DEFAULT_MAX_RATIO = 0.1
+ORPHAN_MIN_BLOCK = 50
+CHUNK_SIZE = 500
+# a candidate not seen again within this long starts over
+CANDIDATE_TTL = 3 * 24 * 60 * 60
+
+
+def _normalize(external_id):
+    return str(cint(external_id)) if str(external_id).strip().isdigit() else str(external_id).strip()
+
+
+def find_orphans(doctype, seen_external_ids, id_field="external_id"):
+    """Local names whose id_field is set but was not in seen_external_ids (one query)."""
+    seen = {_normalize(i) for i in seen_external_ids if i not in (None, "")}
+    rows = frappe.db.sql(
+        f"""
+        SELECT `name`, `{id_field}` AS external_id
+        FROM `tab{doctype}`
+        WHERE IFNULL(`{id_field}`, '') NOT IN ('', '0')
+        """,
+        as_dict=True,
+    )
+    return [r.name for r in rows if _normalize(r.external_id) not in seen]
+
+
+def archive_and_delete(doctype, names, on_delete=None):
+    """
+    Archive full rows into Deleted Document, then bulk delete.
+    on_delete(rows) runs before the delete to clean up derived tables.
+    """
+    now = now_datetime()
+    user = frappe.session.user
+
+    for i in range(0, len(names), CHUNK_SIZE):
+        chunk = names[i:i + CHUNK_SIZE]
+        rows = frappe.get_all(doctype, filters={"name": ["in", chunk]}, fields=["*"])
+
+        frappe.db.bulk_insert(
+            "Deleted Document",
+            ["name", "creation", "modified", "owner", "modified_by",
+             "deleted_name", "deleted_doctype", "data", "restored"],
+            [
+                (frappe.generate_hash(length=10), now, now, user, user,
+                 row.name, doctype, json.dumps({"doctype": doctype, **row}, default=str), 0)
+                for row in rows
+            ],
+        )
+
+        if on_delete:
+            on_delete(rows)
+
+        frappe.db.delete(doctype, {"name": ["in", chunk]})
+
+
+def has_incoming_links(doctype):
+    return bool(
+        frappe.get_all("DocField", filters={"fieldtype": "Link", "options": doctype}, limit=1)
+        or frappe.get_all("Custom Field", filters={"fieldtype": "Link", "options": doctype}, limit=1)
+    )
+
+
+def delete_with_link_checks(doctype, names):
+    """
+    frappe.delete_doc per record (archives to Deleted Document, refuses while
+    linked). Linked records are kept and deactivated. Returns (deleted, kept).
+    """
+    deleted, kept = [], []
+    for name in names:
+        frappe.db.savepoint("orphan_delete")
+        try:
+            frappe.delete_doc(doctype, name, ignore_permissions=True, flags={"from_backend_sync": True})
+            deleted.append(name)
+        except frappe.LinkExistsError:
+            frappe.db.rollback(save_point="orphan_delete")
+            frappe.clear_last_message()
+            kept.append(name)
+
+    deactivate(doctype, kept)
+    drop_rollup_rows(doctype, deleted)
+    return deleted, kept
+
+
+def deactivate(doctype, names):
+    """Mark records that are gone upstream but still linked locally."""
+    if not names:
+        return
+    meta = frappe.get_meta(doctype)
+    status = meta.get_field("status")
+    if status and "Inactive" in (status.options or "").split("\n"):
+        frappe.db.set_value(doctype, {"name": ["in", names]}, "status", "Inactive")
+    elif meta.get_field("disabled"):
+        frappe.db.set_value(doctype, {"name": ["in", names]}, "disabled", 1)
+
+
+def drop_rollup_rows(doctype, names):
+    """Subscriber Rollup rows keyed by a deleted master would point at nothing."""
+    from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import ROLLUP_DIMENSIONS
+
+    if not names:
+        return
+    meta = frappe.get_meta("Subscriber")
+    for dimension in ROLLUP_DIMENSIONS:
+        df = meta.get_field(dimension)
+        if df and df.fieldtype == "Link" and df.options == doctype:
+            frappe.db.delete("Subscriber Rollup", {"dimension": dimension, "dimension_value": ["in", names]})
+
+
+def remove_records(doctype, names, on_delete=None):
+    """
+    Remove records deleted upstream -> (deleted, kept). Callers that clean up
+    their own derived tables (on_delete) take the bulk path.
+    """
+    if on_delete is None and has_incoming_links(doctype):
+        return delete_with_link_checks(doctype, names)
+    archive_and_delete(doctype, names, on_delete=on_delete)
+    return names, []
+
+
+def _candidates_key(doctype):
+    return frappe.cache().make_key(f"aanirids:orphan_candidates:{doctype}")
+
+
+def confirmed_orphans(doctype, orphans):
+    """Orphans that were already candidates last run; this run's orphans become the new candidates."""
+    cache = frappe.cache()
+    previous = set(json.loads(cache.get(_candidates_key(doctype)) or "[]"))
+    cache.set(_candidates_key(doctype), json.dumps(orphans), ex=CANDIDATE_TTL)
+    return [name for name in orphans if name in previous]
+
+
+def purge_orphans(doctype, seen_external_ids, id_field="external_id", on_delete=None, force=False, confirm=False):
+    """
+    Call only after a complete (all pages, no fetch errors) sync run.
+    Returns {"orphans": n, "deleted": n, "kept": n, "pending": n, "blocked": bool}.
+    """
+    orphans = find_orphans(doctype, seen_external_ids, id_field=id_field)
+    result = {"orphans": len(orphans), "deleted": 0, "kept": 0, "pending": 0, "blocked": False}
+    if not orphans:
+        if confirm:
+            confirmed_orphans(doctype, [])
+        return result
+
+    local_count = frappe.db.count(doctype)
+    max_ratio = flt(frappe.conf.get("aanirids_orphan_max_ratio")) or DEFAULT_MAX_RATIO
+    too_many = len(orphans) > ORPHAN_MIN_BLOCK and len(orphans) > local_count * max_ratio
+
+    if (too_many or not seen_external_ids) and not force:
+        result["blocked"] = True
+        frappe.log_error(
+            title=f"⚠️ {doctype} Orphan Cleanup Blocked",
+            message=(
+                f"{len(orphans)} of {local_count} local records are missing upstream "
+                f"(limit {int(max_ratio * 100)}%). Nothing was deleted; check the backend "
+                f"response, or run purge with force=1 if this is expected.\n"
+                f"Sample: {orphans[:20]}"
+            ),
+        )
+        return result
+
+    if confirm and not force:
+        confirmed = confirmed_orphans(doctype, orphans)
+        result["pending"] = len(orphans) - len(confirmed)
+        orphans = confirmed
+    if not orphans:
+        return result
+
+    deleted, kept = remove_records(doctype, orphans, on_delete=on_delete)
+    frappe.db.commit()
+
+    result["deleted"] = len(deleted)
+    result["kept"] = len(kept)
+    if kept:
+        frappe.log_error(
+            title=f"⚠️ {doctype} Orphans Still Linked",
+            message=f"{len(kept)} records are gone upstream but still linked locally; kept and deactivated.\n{kept[:50]}",
+        )
+    return result
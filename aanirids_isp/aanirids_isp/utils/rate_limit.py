@@ -0,0 +1,122 @@
+"""
+Cluster-wide token bucket for outbound backend traffic.
+
+Buckets live in Redis (one per lane) and are updated by a Lua script, so every
+web and worker process draws from the same budget. Lanes:
+
+    interactive  form saves / buttons (request context)   default 20 req/s, burst 40
+    bulk         scheduled + background syncs              default 10 req/s, burst 20
+
+site_config overrides: aanirids_rate_<lane> (req/s) and aanirids_burst_<lane>.
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint, flt
+
+LANES = {
+    "interactive": (20, 40),
+    "bulk": (10, 20),
+}
+
+# interactive callers never wait longer than this for a token
+MAX_INTERACTIVE_WAIT = 5
+
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+class BackendThrottled(Exception):
+    """Interactive call could not get a token within MAX_INTERACTIVE_WAIT."""
+
+
+def current_lane():
+    """Explicit flag from sync entry points, else interactive inside a web request."""
+    if frappe.flags.backend_lane:
+        return frappe.flags.backend_lane
+    return "interactive" if getattr(frappe.local, "request", None) else "bulk"
+
+
+def _lane_config(lane):
+    rate, burst = LANES.get(lane, LANES["bulk"])
+    rate = flt(frappe.conf.get(f"aanirids_rate_{lane}")) or rate
+    burst = cint(frappe.conf.get(f"aanirids_burst_{lane}")) or burst
+    return rate, burst
+
+
+def _try_acquire(lane):
+    """Seconds to wait before a token is available (0 = token taken)."""
+    cache = frappe.cache()
+    rate, burst = _lane_config(lane)
+    key = cache.make_key(f"aanirids:ratelimit:{lane}")
+    return flt(cache.eval(TOKEN_BUCKET_LUA, 1, key, rate, burst, time.time()))
+
+
+def acquire(lane=None):
+    """Block until the lane has a token. Waiting counts as throttling."""
+    lane = lane or current_lane()
+    deadline = time.monotonic() + MAX_INTERACTIVE_WAIT
+
+    while True:
+        wait = _try_acquire(lane)
+        if wait <= 0:
+            return lane
+
+        record_throttle(lane)
+        if lane == "interactive" and time.monotonic() + wait > deadline:
+            raise BackendThrottled("Backend request budget exhausted, please retry in a moment")
+        time.sleep(min(wait, 1))
+
+
+def record_throttle(lane):
+    cache = frappe.cache()
+    cache.incr(cache.make_key(f"aanirids:throttled:{lane}"))
+
+
+def throttle_count(lane):
+    cache = frappe.cache()
+    return cint(cache.get(cache.make_key(f"aanirids:throttled:{lane}")))
+
+
+# ============================================================
+# ✅ ADAPTIVE CONCURRENCY (AIMD) FOR BULK JOBS
+# ============================================================
+class AdaptiveConcurrency:
+    """
+    Additive increase / multiplicative decrease on worker count.
+    Call adjust() between batches: any throttle since the last call (local
+    limiter wait or backend 429) halves concurrency, a clean batch adds one.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, lane="bulk"):
+        self.value = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.lane = lane
+        self._seen = throttle_count(lane)
+
+    def adjust(self):
+        seen = throttle_count(self.lane)
+        if seen > self._seen:
+            self.value = max(self.minimum, self.value // 2)
+        else:
+            self.value = min(self.maximum, self.value + 1)
+        self._seen = seen
+        return self.value
@@ -0,0 +1,310 @@
+"""
+Range-hash (Merkle-style) reconciliation between local tables and the backend.
+
+Both sides hash every record to 64 bits and XOR the row hashes over a range of
+numeric external ids. Equal (count, hash) means the range matches. Only
+ranges that differ get split (FANOUT sub-ranges) and compared again, down to
+leaves small enough to diff row by row.
+
+Row hash: first 16 hex chars of md5("<id>|<col1>|<col2>|...") as an unsigned
+int. Text NULL hashes as "", numeric NULL as "0". Range hash: XOR of the row
+hashes, as 16 hex chars ("0000000000000000" for an empty range).
+
+Backend contract (per resource path, e.g. "subscribers"):
+    GET /api/reconcile/<path>                      {"min_id", "max_id", "count", "hash"}
+    GET /api/reconcile/<path>?ranges=1-100,101-200 {"data": [{"lo", "hi", "count", "hash"}, ...]}
+    GET /api/reconcile/<path>/rows?lo=1&hi=100     {"data": [<regular API objects>]}
+"""
+
+import hashlib
+import math
+
+import frappe
+from frappe.utils import cint
+
+from aanirids_isp.aanirids_isp.utils.backend import backend_request
+from aanirids_isp.aanirids_isp.utils.codec import response_json
+from aanirids_isp.aanirids_isp.utils.locks import sync_lock
+
+RECONCILE_URL = "http://172.24.160.1:5003/api/reconcile"
+TIMEOUT = 60
+
+FANOUT = 16
+LEAF_ROWS = 500
+RANGES_PER_REQUEST = 64
+EMPTY_HASH = "0" * 16
+
+# doctype -> backend path, hashed columns as (backend key, local SQL expression),
+# and the fixer that upserts one backend object locally
+RESOURCES = {
+    "Subscriber": {
+        "path": "subscribers",
+        "columns": [
+            ("username", "IFNULL(`username`, '')"),
+            ("fullname", "IFNULL(`full_name`, '')"),
+            ("phone", "IFNULL(`phone`, '')"),
+            ("email", "IFNULL(`email`, '')"),
+            ("connection_status", "IF(`status` = 'Active', '1', '0')"),
+        ],
+        "normalize": {"connection_status": lambda v: "1" if str(v) == "1" else "0"},
+        "fix": "aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.upsert_subscriber_from_list",
+    },
+    "NAS": {
+        "path": "nas",
+        "columns": [
+            ("nasname", "IFNULL(`nasname`, '')"),
+            ("shortname", "IFNULL(`shortname`, '')"),
+            ("type", "IFNULL(`type`, '')"),
+            ("ports", "IFNULL(`ports`, 0)"),
+            ("secret", "IFNULL(`secret`, '')"),
+        ],
+        "normalize": {"ports": lambda v: str(cint(v))},
+        "fix": "aanirids_isp.aanirids_isp.doctype.nas.nas.upsert_nas",
+    },
+    "IP Address": {
+        "path": "ip-addresses",
+        "columns": [
+            ("ip_address", "IFNULL(`ip_address`, '')"),
+        ],
+        "normalize": {},
+        "fix": "aanirids_isp.aanirids_isp.doctype.ip_address.ip_address.upsert_ip_address",
+    },
+}
+
+
+# ============================================================
+# ✅ HASHING
+# ============================================================
+def row_hash(external_id, values):
+    text = "|".join([str(external_id), *("" if v is None else str(v) for v in values)])
+    return int(hashlib.md5(text.encode()).hexdigest()[:16], 16)
+
+
+def _remote_row_hash(cfg, row):
+    normalize = cfg["normalize"]
+    values = []
+    for key, _ in cfg["columns"]:
+        value = row.get(key)
+        values.append(normalize[key](value) if key in normalize else value)
+    return row_hash(cint(row.get("id")), values)
+
+
+def _id_expr():
+    return "CAST(`external_id` AS UNSIGNED)"
+
+
+def _hash_expr(cfg):
+    parts = ", ".join([_id_expr(), *(expr for _, expr in cfg["columns"])])
+    return (
+        "LPAD(LOWER(HEX(BIT_XOR(CAST(CONV(LEFT(MD5(CONCAT_WS('|', "
+        f"{parts})), 16), 16, 10) AS UNSIGNED)))), 16, '0')"
+    )
+
+
+def _split(lo, hi):
+    step = max(1, math.ceil((hi - lo + 1) / FANOUT))
+    return step, [(start, min(hi, start + step - 1)) for start in range(lo, hi + 1, step)]
+
+
+# ============================================================
+# ✅ LOCAL SIDE (one GROUP BY query per parent range)
+# ============================================================
+def _local_summary(doctype, cfg):
+    row = frappe.db.sql(
+        f"""
+        SELECT MIN({_id_expr()}) AS min_id, MAX({_id_expr()}) AS max_id,
+               COUNT(*) AS count, {_hash_expr(cfg)} AS hash
+        FROM `tab{doctype}`
+        WHERE IFNULL(`external_id`, '') NOT IN ('', '0')
+        """,
+        as_dict=True,
+    )[0]
+    row.hash = row.hash if row.count else EMPTY_HASH
+    return row
+
+
+def _local_children(doctype, cfg, lo, hi):
+    """{(lo, hi): (count, hash)} for the FANOUT sub-ranges of [lo, hi]."""
+    step, children = _split(lo, hi)
+    rows = frappe.db.sql(
+        f"""
+        SELECT FLOOR(({_id_expr()} - %(lo)s) / %(step)s) AS bucket,
+               COUNT(*) AS count, {_hash_expr(cfg)} AS hash
+        FROM `tab{doctype}`
+        WHERE {_id_expr()} BETWEEN %(lo)s AND %(hi)s
+        GROUP BY bucket
+        """,
+        {"lo": lo, "hi": hi, "step": step},
+        as_dict=True,
+    )
+    by_bucket = {cint(r.bucket): (cint(r.count), r.hash) for r in rows}
+    return {child: by_bucket.get(i, (0, EMPTY_HASH)) for i, child in enumerate(children)}
+
+
+def _local_rows(doctype, cfg, lo, hi):
+    columns = ", ".join(f"{expr} AS `{key}`" for key, expr in cfg["columns"])
+    rows = frappe.db.sql(
+        f"""
+        SELECT `name`, {_id_expr()} AS id, {columns}
+        FROM `tab{doctype}`
+        WHERE {_id_expr()} BETWEEN %s AND %s
+        """,
+        (lo, hi),
+        as_dict=True,
+    )
+    return {
+        cint(r.id): (r.name, row_hash(cint(r.id), [r.get(key) for key, _ in cfg["columns"]]))
+        for r in rows
+    }
+
+
+# ============================================================
+# ✅ BACKEND SIDE
+# ============================================================
+def _get(path, params=None):
+    r = backend_request("get", f"{RECONCILE_URL}/{path}", endpoint="reconcile", params=params, timeout=TIMEOUT)
+    if r.status_code != 200:
+        raise Exception(f"Reconcile API Error {r.status_code}: {r.text}")
+    return response_json(r)
+
+
+def _remote_ranges(cfg, ranges):
+    result = {}
+    for i in range(0, len(ranges), RANGES_PER_REQUEST):
+        chunk = ranges[i:i + RANGES_PER_REQUEST]
+        payload = _get(cfg["path"], {"ranges": ",".join(f"{lo}-{hi}" for lo, hi in chunk)})
+        for row in payload.get("data") or []:
+            result[(cint(row["lo"]), cint(row["hi"]))] = (cint(row.get("count")), row.get("hash") or EMPTY_HASH)
+    return {r: result.get(r, (0, EMPTY_HASH)) for r in ranges}
+
+
+def _remote_rows(cfg, lo, hi):
+    payload = _get(f"{cfg['path']}/rows", {"lo": lo, "hi": hi})
+    rows = payload.get("data", []) if isinstance(payload, dict) else payload
+    return {cint(r.get("id")): r for r in rows if r.get("id")}
+
+
+# ============================================================
+# ✅ RECONCILE
+# ============================================================
+def diff_ranges(doctype):
+    """
+    Exact differences between the local table and the backend:
+    {"missing": [backend objects], "extra": [local names], "divergent": [backend objects],
+     "requests": n, "queries": n}
+    """
+    cfg = RESOURCES[doctype]
+    result = {"missing": [], "extra": [], "divergent": [], "requests": 1, "queries": 1}
+
+    local = _local_summary(doctype, cfg)
+    remote = _get(cfg["path"])
+    if cint(local.count) == cint(remote.get("count")) and local.hash == (remote.get("hash") or EMPTY_HASH):
+        return result
+
+    ids = [cint(v) for v in (local.min_id, local.max_id, remote.get("min_id"), remote.get("max_id")) if v]
+    if not ids:
+        return result
+
+    level = [((min(ids), max(ids)), max(cint(local.count), cint(remote.get("count"))))]
+    while level:
+        leaves = [rng for rng, size in level if size <= LEAF_ROWS or rng[1] - rng[0] < FANOUT]
+        parents = [rng for rng, size in level if rng not in leaves]
+
+        for lo, hi in leaves:
+            _diff_leaf(doctype, cfg, lo, hi, result)
+            result["requests"] += 1
+            result["queries"] += 1
+
+        local_children = {}
+        for lo, hi in parents:
+            local_children.update(_local_children(doctype, cfg, lo, hi))
+            result["queries"] += 1
+
+        remote_children = _remote_ranges(cfg, list(local_children)) if local_children else {}
+        result["requests"] += math.ceil(len(local_children) / RANGES_PER_REQUEST)
+
+        level = [
+            (rng, max(local_children[rng][0], remote_children[rng][0]))
+            for rng in local_children
+            if local_children[rng] != remote_children[rng]
+        ]
+
+    return result
+
+
+def _diff_leaf(doctype, cfg, lo, hi, result):
+    local = _local_rows(doctype, cfg, lo, hi)
+    remote = _remote_rows(cfg, lo, hi)
+
+    for external_id, row in remote.items():
+        if external_id not in local:
+            result["missing"].append(row)
+        elif local[external_id][1] != _remote_row_hash(cfg, row):
+            result["divergent"].append(row)
+
+    result["extra"].extend(name for external_id, (name, _) in local.items() if external_id not in remote)
+
+
+def reconcile(doctype, fix=True):
+    """
+    Diff one doctype against the backend and upsert only the missing and
+    divergent records. Extra local records are reported and left to the
+    orphan cleanup.
+    """
+    diff = diff_ranges(doctype)
+    fixed = failed = 0
+
+    if fix and (diff["missing"] or diff["divergent"]):
+        frappe.flags.backend_lane = "bulk"
+        upsert = frappe.get_attr(RESOURCES[doctype]["fix"])
+        for row in diff["missing"] + diff["divergent"]:
+            try:
+                upsert(row)
+                fixed += 1
+            except Exception as e:
+                failed += 1
+                frappe.log_error(title=f"{doctype} Reconcile Fix Failed", message=f"{row.get('id')}\n{str(e)}")
+        frappe.db.commit()
+
+    return {
+        "doctype": doctype,
+        "missing": len(diff["missing"]),
+        "divergent": len(diff["divergent"]),
+        "extra": len(diff["extra"]),
+        "extra_names": diff["extra"][:100],
+        "fixed": fixed,
+        "failed": failed,
+        "requests": diff["requests"],
+        "queries": diff["queries"],
+    }
+
+
+def reconcile_all():
+    """Daily scheduler job."""
+    for doctype in RESOURCES:
+        with sync_lock(f"{doctype}:reconcile") as owner:
+            if not owner:
+                continue
+            try:
+                result = reconcile(doctype)
+            except Exception as e:
+                frappe.log_error(title=f"{doctype} Reconcile Failed", message=str(e))
+                continue
+
+        if result["missing"] or result["divergent"] or result["extra"]:
+            frappe.log_error(
+                title=f"⚠️ {doctype} Reconcile",
+                message=(
+                    f"Missing={result['missing']} | Divergent={result['divergent']} | Extra={result['extra']}"
+                    f" | Fixed={result['fixed']} | Failed={result['failed']}"
+                    f" | Requests={result['requests']} | Queries={result['queries']}"
+                ),
+            )
+
+
+@frappe.whitelist()
+def reconcile_now(doctype="Subscriber", fix=1):
+    frappe.only_for("System Manager")
+    if doctype not in RESOURCES:
+        frappe.throw(f"Reconcile not supported for {doctype}")
+    return reconcile(doctype, fix=cint(fix))
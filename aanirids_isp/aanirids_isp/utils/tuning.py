@@ -0,0 +1,69 @@
+"""
+Runtime tuning of sync batch sizes (list page size, rows per commit).
+
+AdaptiveSize grows a size while observations stay under target and halves
+it when one goes over (AIMD, like rate_limit.AdaptiveConcurrency). Bounds
+and targets come from site_config:
+
+    aanirids_page_size_min / _max          list page size bounds (25 / 500)
+    aanirids_page_target_seconds           target fetch latency per page (2)
+    aanirids_page_max_bytes                largest response body we want (4 MB)
+    aanirids_commit_size_min / _max        rows per commit bounds (5 / 200)
+    aanirids_commit_target_seconds         target transaction duration (1)
+"""
+
+import frappe
+from frappe.utils import cint, flt
+
+MAX_HISTORY = 100
+
+
+class AdaptiveSize:
+    def __init__(self, name, initial, minimum, maximum, target_seconds, max_bytes=None):
+        self.name = name
+        self.minimum = cint(frappe.conf.get(f"aanirids_{name}_min")) or minimum
+        self.maximum = max(cint(frappe.conf.get(f"aanirids_{name}_max")) or maximum, self.minimum)
+        self.target = flt(frappe.conf.get(f"aanirids_{name.replace('_size', '')}_target_seconds")) or target_seconds
+        self.max_bytes = max_bytes
+        self.value = min(max(cint(initial), self.minimum), self.maximum)
+        self.history = []
+
+    def observe(self, seconds, size_bytes=None):
+        """Feed one measurement for the current size; returns the size to use next."""
+        too_big = self.max_bytes and size_bytes and size_bytes > self.max_bytes
+
+        if seconds > self.target or too_big:
+            self.value = max(self.minimum, self.value // 2)
+        elif seconds < self.target / 2:
+            self.value = min(self.maximum, self.value + max(1, self.value // 4))
+
+        self.history.append({"size": self.value, "seconds": round(seconds, 3), "bytes": size_bytes})
+        if len(self.history) > MAX_HISTORY:
+            del self.history[0]
+        return self.value
+
+    def summary(self):
+        sizes = [h["size"] for h in self.history] or [self.value]
+        return {
+            "current": self.value,
+            "min_used": min(sizes),
+            "max_used": max(sizes),
+            "bounds": [self.minimum, self.maximum],
+            "target_seconds": self.target,
+            "history": self.history,
+        }
+
+
+def page_size(initial):
+    return AdaptiveSize(
+        "page_size",
+        initial,
+        minimum=25,
+        maximum=500,
+        target_seconds=2,
+        max_bytes=cint(frappe.conf.get("aanirids_page_max_bytes")) or 4 * 1024 * 1024,
+    )
+
+
+def commit_size(initial):
+    return AdaptiveSize("commit_size", initial, minimum=5, maximum=200, target_seconds=1)
@@ -0,0 +1,169 @@
+import json
+import time
+
+import frappe
+from frappe.core.doctype.version.version import get_diff
+
+# Versions written by backend syncs carry this marker in Version.data
+SYNC_MARKER = "sync_run"
+
+COMPACT_DOCTYPES = ("Subscriber", "Plan")
+COMPACT_BATCH = 2000
+# seconds one daily run may spend; the docname cursor resumes from there next day
+COMPACT_TIME_BUDGET = 20 * 60
+
+
+def start_sync_run():
+    """Id shared by every save of one sync run (kept if a caller already set one)."""
+    if not frappe.flags.sync_run_id:
+        frappe.flags.sync_run_id = frappe.generate_hash(length=10)
+    return frappe.flags.sync_run_id
+
+
+def merge_changed(earlier, later):
+    """
+    Merge two Version "changed" lists ([field, old, new]) into one diff:
+    earliest old value, latest new value; fields that ended up unchanged drop out.
+    """
+    merged = {row[0]: [row[1], row[2]] for row in earlier or []}
+    for field, old, new in later or []:
+        if field in merged:
+            merged[field][1] = new
+        else:
+            merged[field] = [old, new]
+    return [[field, old, new] for field, (old, new) in merged.items() if old != new]
+
+
+def has_changes(doc):
+    """
+    After save(): did it change anything? Same diff as the Version log, so
+    re-saving identical backend data counts as no change. New docs always count.
+    """
+    before = doc.get_doc_before_save()
+    if not before:
+        return True
+    diff = get_diff(before, doc)
+    return bool(diff and (diff.changed or diff.added or diff.removed or diff.row_changed))
+
+
+def record_sync_version(doc):
+    """
+    Replacement for Document.save_version on sync-originated saves:
+    - nothing changed -> no Version
+    - first change in a run -> one compact Version
+    - further changes in the same run -> merged into that Version
+    """
+    # same gates as Document.save_version
+    if not doc.meta.track_changes or doc.flags.ignore_version:
+        return
+
+    before = doc.get_doc_before_save()
+    if not before:
+        return
+
+    version = frappe.new_doc("Version")
+    if not version.update_version_info(before, doc):
+        return
+
+    run_id = start_sync_run()
+    data = json.loads(version.data)
+
+    if not hasattr(frappe.local, "sync_versions"):
+        frappe.local.sync_versions = {}
+    cache = frappe.local.sync_versions
+    key = (doc.doctype, doc.name, run_id)
+
+    existing = cache.get(key)
+    if existing:
+        old_data = json.loads(frappe.db.get_value("Version", existing, "data") or "{}")
+        old_data["changed"] = merge_changed(old_data.get("changed"), data.get("changed"))
+        frappe.db.set_value("Version", existing, "data", json.dumps(old_data), update_modified=False)
+        return
+
+    data[SYNC_MARKER] = run_id
+    version.data = json.dumps(data)
+    version.insert(ignore_permissions=True)
+    cache[key] = version.name
+
+
+def compact_sync_versions():
+    """
+    Daily job: collapse consecutive sync-only Versions of a record into one.
+    A manual edit in between keeps both sides separate.
+    Walks records in docname order from a stored cursor, batch by batch, until
+    the time budget is spent, so records that can't be compacted never starve
+    the rest of the table.
+    """
+    deadline = time.monotonic() + COMPACT_TIME_BUDGET
+
+    for doctype in COMPACT_DOCTYPES:
+        cursor_key = f"aanirids_compact_cursor:{doctype}"
+        cursor = frappe.db.get_global(cursor_key) or ""
+
+        while time.monotonic() < deadline:
+            docnames = frappe.db.sql(
+                """
+                SELECT docname FROM `tabVersion`
+                WHERE ref_doctype = %s AND docname > %s AND data LIKE %s
+                GROUP BY docname
+                HAVING COUNT(*) > 1
+                ORDER BY docname
+                LIMIT %s
+                """,
+                (doctype, cursor, f'%"{SYNC_MARKER}"%', COMPACT_BATCH),
+                pluck=True,
+            )
+            if not docnames:
+                # reached the end: start over from the top next time
+                cursor = ""
+                break
+
+            for docname in docnames:
+                _compact_record(doctype, docname)
+                cursor = docname
+                frappe.db.commit()
+                if time.monotonic() >= deadline:
+                    break
+
+        frappe.db.set_global(cursor_key, cursor)
+        frappe.db.commit()
+
+
+def _compact_record(doctype, docname):
+    versions = frappe.get_all(
+        "Version",
+        filters={"ref_doctype": doctype, "docname": docname},
+        fields=["name", "data"],
+        order_by="creation asc",
+    )
+
+    run = []
+    for v in [*versions, None]:
+        data = json.loads(v.data or "{}") if v else {}
+        if v and SYNC_MARKER in data:
+            run.append((v.name, data))
+            continue
+
+        if len(run) > 1:
+            _merge_run(run)
+        run = []
+
+
+def _merge_run(run):
+    """Keep the newest Version of the run with the merged diff, delete the rest."""
+    changed = []
+    for _, data in run:
+        changed = merge_changed(changed, data.get("changed"))
+
+    names = [name for name, _ in run]
+    if not changed:
+        # the run ended where it started; nothing worth keeping
+        frappe.db.delete("Version", {"name": ["in", names]})
+        return
+
+    keep_name, keep_data = run[-1]
+    keep_data["changed"] = changed
+    keep_data["compacted"] = len(run)
+
+    frappe.db.set_value("Version", keep_name, "data", json.dumps(keep_data), update_modified=False)
+    frappe.db.delete("Version", {"name": ["in", names[:-1]]})
@@ -0,0 +1,85 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-subscriber-rollups")
+@pass_context
+def rebuild_subscriber_rollups(context):
+    """Recompute Subscriber Rollup counters from scratch"""
+    import frappe
+
+    from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import (
+        rebuild_subscriber_rollups as rebuild,
+    )
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        result = rebuild()
+        click.echo(f"Rebuilt {result['rows']} rollup rows on {site}")
+    finally:
+        frappe.destroy()
+
+
+@click.command("rebuild-subscriber-search-index")
+@pass_context
+def rebuild_subscriber_search_index(context):
+    """Re-tokenize every Subscriber into the search index"""
+    import frappe
+
+    from aanirids_isp.aanirids_isp.doctype.subscriber_search_token.subscriber_search_token import (
+        rebuild_search_index,
+    )
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        result = rebuild_search_index()
+        click.echo(f"Indexed {result['indexed']} subscribers on {site}")
+    finally:
+        frappe.destroy()
+
+
+@click.command("benchmark-backend-codec")
+@click.option("--limit", default=500, help="Subscribers per page to fetch")
+@click.option("--rounds", default=20, help="Decode rounds per body")
+@pass_context
+def benchmark_backend_codec(context, limit, rounds):
+    """Compare stdlib json vs the fast codec and compressed vs plain transfer on live responses"""
+    import frappe
+    import requests
+
+    from aanirids_isp.aanirids_isp.utils import codec
+
+    urls = {
+        "subscribers": f"http://172.24.160.1:5003/api/subscribers?limit={limit}&offset=0",
+        "ip-addresses": "http://172.24.160.1:5003/api/ip-addresses",
+    }
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        click.echo(f"codec={codec.BACKEND} accept-encoding='{codec.ACCEPT_ENCODING}'")
+        for name, url in urls.items():
+            sizes = {}
+            for encoding in ("identity", codec.ACCEPT_ENCODING):
+                r = requests.get(url, headers={"Accept-Encoding": encoding}, timeout=120, stream=True)
+                body = r.content
+                sizes[encoding] = (r.raw.tell(), r.elapsed.total_seconds(), r.headers.get("Content-Encoding"))
+
+            result = codec.benchmark_decode(body, rounds=rounds)
+            plain, compressed = sizes["identity"], sizes[codec.ACCEPT_ENCODING]
+            click.echo(
+                f"{name}: {result['bytes']} bytes | wire plain={plain[0]} ({plain[1]:.2f}s)"
+                f" {compressed[2] or 'uncompressed'}={compressed[0]} ({compressed[1]:.2f}s)"
+                f" | decode json={result['stdlib_seconds'] * 1000:.1f}ms"
+                f" {result['codec']}={result['codec_seconds'] * 1000:.1f}ms (x{result['speedup']})"
+            )
+    finally:
+        frappe.destroy()
+
+
+commands = [rebuild_subscriber_rollups, rebuild_subscriber_search_index, benchmark_backend_codec]
@@ -248,8 +248,17 @@ app_license = "mit"
 # ignore_translatable_strings_from = []
 
 scheduler_events = {
-    "hourly": [
-        "aanirids_isp.aanirids_isp.doctype.subscriber.subscriber.sync_list_and_enqueue_bulk_details"
+    "cron": {
+        "*/5 * * * *": [
+            "aanirids_isp.aanirids_isp.doctype.subscriber_sync_retry.subscriber_sync_retry.retry_failed_syncs",
+            "aanirids_isp.aanirids_isp.doctype.subscriber_backend_push.subscriber_backend_push.push_pending_backend_changes",
+            "aanirids_isp.aanirids_isp.doctype.sync_schedule.sync_schedule.run_due_syncs",
+            "aanirids_isp.aanirids_isp.utils.change_events.flush_events"
+        ]
+    },
+    "daily": [
+        "aanirids_isp.aanirids_isp.utils.versioning.compact_sync_versions",
+        "aanirids_isp.aanirids_isp.utils.reconcile.reconcile_all"
     ]
 }
 
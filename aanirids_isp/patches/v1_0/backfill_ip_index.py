@@ -0,0 +1,5 @@
+from aanirids_isp.aanirids_isp.api.ip_lookup import rebuild_ip_index
+
+
+def execute():
+    rebuild_ip_index()
@@ -0,0 +1,20 @@
+import frappe
+
+from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import rebuild_subscriber_rollups
+from aanirids_isp.aanirids_isp.utils import geo
+
+
+def execute():
+    rows = frappe.get_all("Subscriber", fields=["name", "latitude", "longitude"])
+
+    for i, row in enumerate(rows, start=1):
+        geohash = None
+        if geo.has_coordinates(row.latitude, row.longitude):
+            geohash = geo.encode(float(row.latitude), float(row.longitude))
+        frappe.db.set_value("Subscriber", row.name, "geohash", geohash, update_modified=False)
+
+        if i % 1000 == 0:
+            frappe.db.commit()
+
+    # geohash5 heatmap counters
+    rebuild_subscriber_rollups()
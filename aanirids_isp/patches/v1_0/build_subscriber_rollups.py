@@ -0,0 +1,5 @@
+from aanirids_isp.aanirids_isp.doctype.subscriber_rollup.subscriber_rollup import rebuild_subscriber_rollups
+
+
+def execute():
+    rebuild_subscriber_rollups()
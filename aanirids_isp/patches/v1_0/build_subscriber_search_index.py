@@ -0,0 +1,7 @@
+from aanirids_isp.aanirids_isp.doctype.subscriber_search_token.subscriber_search_token import (
+    rebuild_search_index,
+)
+
+
+def execute():
+    rebuild_search_index()